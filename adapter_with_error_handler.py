@@ -10,11 +10,17 @@ from botbuilder.core import (
     ConversationState,
     TurnContext,
 )
+from botbuilder.core.bot_framework_adapter import USER_AGENT
 from botbuilder.schema import ActivityTypes, Activity
+from botframework.connector.aio import ConnectorClient
+from botframework.connector.auth import AppCredentials, ClaimsIdentity, MicrosoftAppCredentials
 
 import logging
 from opencensus.ext.azure.log_exporter import AzureLogHandler, AzureEventHandler
 from config import DefaultConfig
+from helpers.connector_pool import ConnectorPool
+from helpers.keyed_lock import KeyedLock
+from helpers.token_validation import VerifiedTokenCache
 
 #To deal with warning logging
 CONFIG = DefaultConfig()
@@ -30,9 +36,19 @@ class AdapterWithErrorHandler(BotFrameworkAdapter):
         self,
         settings: BotFrameworkAdapterSettings,
         conversation_state: ConversationState,
+        turn_lock: KeyedLock = None,
+        token_cache: VerifiedTokenCache = None,
+        connector_pool: ConnectorPool = None,
     ):
         super().__init__(settings)
         self._conversation_state = conversation_state
+        # Runs the turns of a conversation one at a time, so they never load
+        # and save the same state concurrently.
+        self.turn_lock = turn_lock
+        # Skips validating again a token that already passed.
+        self.token_cache = token_cache
+        # Posts the replies over keep-alive connections with shared app tokens.
+        self.connector_pool = connector_pool
 
         # Catch-all for errors.
         async def on_error(context: TurnContext, error: Exception):
@@ -68,3 +84,49 @@ class AdapterWithErrorHandler(BotFrameworkAdapter):
             await self._conversation_state.delete(context)
 
         self.on_turn_error = on_error
+
+    async def _authenticate_request(
+        self, request: Activity, auth_header: str
+    ) -> ClaimsIdentity:
+        if self.token_cache is None or not auth_header:
+            return await super()._authenticate_request(request, auth_header)
+
+        validate = super(AdapterWithErrorHandler, self)._authenticate_request
+        return await self.token_cache.validate(
+            auth_header,
+            request.channel_id,
+            request.service_url,
+            lambda: validate(request, auth_header),
+        )
+
+    def _get_or_create_connector_client(
+        self, service_url: str, credentials: AppCredentials
+    ) -> ConnectorClient:
+        if self.connector_pool is None:
+            return super()._get_or_create_connector_client(service_url, credentials)
+
+        if not credentials:
+            credentials = MicrosoftAppCredentials.empty()
+        client_key = self.key_for_connector_client(
+            service_url, credentials.microsoft_app_id, credentials.oauth_scope
+        )
+        client = self._connector_client_cache.get(client_key)
+        if not client:
+            client = self.connector_pool.create_client(service_url, credentials)
+            client.config.add_user_agent(USER_AGENT)
+            self._connector_client_cache[client_key] = client
+        return client
+
+    async def process_activity_with_identity(
+        self, activity: Activity, identity: ClaimsIdentity, logic
+    ):
+        """
+        Run the turn once the previous turns of its conversation are done.
+        Raises asyncio.TimeoutError or asyncio.QueueFull, without running the
+        turn, when the conversation's queue is too slow or too long.
+        """
+        if self.turn_lock is None or activity.conversation is None:
+            return await super().process_activity_with_identity(activity, identity, logic)
+
+        async with self.turn_lock.hold((activity.channel_id, activity.conversation.id)):
+            return await super().process_activity_with_identity(activity, identity, logic)
@@ -1,3 +1,5 @@
+import asyncio
+import logging
 from http import HTTPStatus
 
 from aiohttp import web
@@ -10,7 +12,6 @@ from botbuilder.core import (
     TelemetryLoggerMiddleware,
 )
 from botbuilder.core.integration import aiohttp_error_middleware
-from botbuilder.schema import Activity
 from botbuilder.applicationinsights import ApplicationInsightsTelemetryClient
 from botbuilder.integration.applicationinsights.aiohttp import (
     AiohttpTelemetryProcessor,
@@ -23,68 +24,280 @@ from bots import DialogAndWelcomeBot
 
 from adapter_with_error_handler import AdapterWithErrorHandler
 from flight_booking_recognizer import FlightBookingRecognizer
+from gazetteer_recognizer import GazetteerRecognizer
+from luis_prediction_client import LuisPredictionClient
+from helpers.activity_decoder import decode_activity
+from helpers.admission import AdmissionController, admission_middleware
+from helpers.affinity import AffinityServer
+from helpers.bounded_memory_storage import BoundedMemoryStorage
+from helpers.circuit_breaker import CircuitBreaker
+from helpers.connector_pool import ConnectorPool
+from helpers.keyed_lock import KeyedLock
+from helpers.parsing_service import PARSING_SERVICE
+from helpers.prefork import PreforkServer, new_event_loop
+from helpers.recognizer_models import ModelType, RECOGNIZER_MODELS
+from helpers.snapshot_storage import (
+    SnapshotConversationState,
+    SnapshotMemoryStorage,
+    SnapshotUserState,
+)
+from helpers.sqlite_storage import SqliteStorage
+from helpers.token_validation import SigningKeyRefresher, VerifiedTokenCache
 
 CONFIG = DefaultConfig()
 
-# Create adapter.
-# See https://aka.ms/about-bot-adapter to learn more about how bots work.
-SETTINGS = BotFrameworkAdapterSettings(CONFIG.APP_ID, CONFIG.APP_PASSWORD)
-
-# Create MemoryStorage, UserState and ConversationState
-MEMORY = MemoryStorage()
-USER_STATE = UserState(MEMORY)
-CONVERSATION_STATE = ConversationState(MEMORY)
-
-# Create adapter.
-# See https://aka.ms/about-bot-adapter to learn more about how bots work.
-ADAPTER = AdapterWithErrorHandler(SETTINGS, CONVERSATION_STATE)
-
-# Create telemetry client.
-# Note the small 'client_queue_size'.  This is for demonstration purposes.  Larger queue sizes
-# result in fewer calls to ApplicationInsights, improving bot performance at the expense of
-# less frequent updates.
-INSTRUMENTATION_KEY = CONFIG.APPINSIGHTS_INSTRUMENTATION_KEY
-TELEMETRY_CLIENT = ApplicationInsightsTelemetryClient(
-    INSTRUMENTATION_KEY, telemetry_processor=AiohttpTelemetryProcessor(), client_queue_size=10
-)
+# The bot and everything it serves with, built by init_func in each process
+# that serves. The prefork supervisor, the dispatcher and the parsing workers
+# import this module too, and must not build (or warm) any of it.
+MEMORY = None
+TURN_LOCK = None
+TOKEN_CACHE = None
+SIGNING_KEYS = None
+CONNECTOR_POOL = None
+ADAPTER = None
+RECOGNIZER = None
+BOT = None
+ADMISSION = None
+
+
+def create_bot() -> None:
+    global MEMORY, TURN_LOCK, TOKEN_CACHE, SIGNING_KEYS, CONNECTOR_POOL
+    global ADAPTER, RECOGNIZER, BOT, ADMISSION
 
-# Code for enabling activity and personal information logging.
-TELEMETRY_LOGGER_MIDDLEWARE = TelemetryLoggerMiddleware(telemetry_client=TELEMETRY_CLIENT, log_personal_information=True)
-ADAPTER.use(TELEMETRY_LOGGER_MIDDLEWARE)
+    # Build the Recognizers-Text models once, before the first turn needs them
+    # (the registry logs each build time).
+    RECOGNIZER_MODELS.warm()
+    PARSING_SERVICE.configure(CONFIG.PARSING_MODE, CONFIG.PARSING_WORKERS)
 
-# Create dialogs and Bot
-RECOGNIZER = FlightBookingRecognizer(CONFIG)
-BOOKING_DIALOG = BookingDialog()
-DIALOG = MainDialog(RECOGNIZER, BOOKING_DIALOG, telemetry_client=TELEMETRY_CLIENT)
-BOT = DialogAndWelcomeBot(CONVERSATION_STATE, USER_STATE, DIALOG, TELEMETRY_CLIENT)
+    # Create adapter.
+    # See https://aka.ms/about-bot-adapter to learn more about how bots work.
+    settings = BotFrameworkAdapterSettings(CONFIG.APP_ID, CONFIG.APP_PASSWORD)
+
+    # Create the storage, UserState and ConversationState
+    if CONFIG.STORAGE == "sqlite":
+        MEMORY = SqliteStorage(
+            CONFIG.STORAGE_PATH, CONFIG.STORAGE_CACHE_SIZE, shared=CONFIG.STORAGE_SHARED
+        )
+    elif CONFIG.STORAGE == "bounded":
+        MEMORY = BoundedMemoryStorage(
+            CONFIG.STORAGE_MAX_ENTRIES, CONFIG.STORAGE_TTL, CONFIG.STORAGE_SWEEP_INTERVAL
+        )
+    elif CONFIG.STORAGE == "snapshot":
+        MEMORY = SnapshotMemoryStorage()
+    else:
+        MEMORY = MemoryStorage()
+
+    if isinstance(MEMORY, SnapshotMemoryStorage):
+        # Hands its change-detection snapshots straight to the storage.
+        user_state = SnapshotUserState(MEMORY)
+        conversation_state = SnapshotConversationState(MEMORY)
+    else:
+        user_state = UserState(MEMORY)
+        conversation_state = ConversationState(MEMORY)
+
+    # Create adapter.
+    # See https://aka.ms/about-bot-adapter to learn more about how bots work.
+    TURN_LOCK = KeyedLock(CONFIG.TURN_QUEUE_TIMEOUT, CONFIG.TURN_QUEUE_MAX_WAITERS)
+    TOKEN_CACHE = (
+        VerifiedTokenCache(CONFIG.AUTH_TOKEN_CACHE_SIZE) if CONFIG.AUTH_TOKEN_CACHE_SIZE else None
+    )
+    SIGNING_KEYS = SigningKeyRefresher(interval=CONFIG.AUTH_KEY_REFRESH_INTERVAL)
+    CONNECTOR_POOL = (
+        ConnectorPool(
+            CONFIG.OUTBOUND_POOL_SIZE,
+            CONFIG.OUTBOUND_KEEPALIVE_TIMEOUT,
+            CONFIG.OUTBOUND_TOKEN_REFRESH_MARGIN,
+        )
+        if CONFIG.CONNECTOR_CLIENT == "pooled"
+        else None
+    )
+    ADAPTER = AdapterWithErrorHandler(
+        settings, conversation_state, TURN_LOCK, TOKEN_CACHE, CONNECTOR_POOL
+    )
+
+    # Create telemetry client.
+    # Note the small 'client_queue_size'.  This is for demonstration purposes.  Larger queue sizes
+    # result in fewer calls to ApplicationInsights, improving bot performance at the expense of
+    # less frequent updates.
+    instrumentation_key = CONFIG.APPINSIGHTS_INSTRUMENTATION_KEY
+    telemetry_client = ApplicationInsightsTelemetryClient(
+        instrumentation_key, telemetry_processor=AiohttpTelemetryProcessor(), client_queue_size=10
+    )
+
+    # Code for enabling activity and personal information logging.
+    telemetry_logger_middleware = TelemetryLoggerMiddleware(telemetry_client=telemetry_client, log_personal_information=True)
+    ADAPTER.use(telemetry_logger_middleware)
+
+    # Create dialogs and Bot
+    RECOGNIZER = FlightBookingRecognizer(
+        CONFIG,
+        fallback_recognizer=GazetteerRecognizer() if CONFIG.LUIS_OFFLINE_FALLBACK else None,
+    )
+    booking_dialog = BookingDialog(
+        slot_recognizer=GazetteerRecognizer() if CONFIG.SLOT_FILLING else None
+    )
+    dialog = MainDialog(
+        RECOGNIZER,
+        booking_dialog,
+        telemetry_client=telemetry_client,
+        recognition_timeout=CONFIG.RECOGNITION_TIMEOUT,
+        typing_delay=CONFIG.TYPING_DELAY,
+        circuit_breaker=CircuitBreaker(
+            CONFIG.RECOGNITION_BREAKER_THRESHOLD, CONFIG.RECOGNITION_BREAKER_COOLDOWN
+        ),
+    )
+    BOT = DialogAndWelcomeBot(conversation_state, user_state, dialog, telemetry_client)
+
+    ADMISSION = AdmissionController(
+        CONFIG.ADMISSION_MAX_CONCURRENT,
+        CONFIG.ADMISSION_MAX_QUEUE,
+        CONFIG.ADMISSION_MAX_WAIT,
+        CONFIG.ADMISSION_MAX_LOOP_LAG,
+        lag_samples=CONFIG.ADMISSION_LAG_SAMPLES,
+    )
 
 
 # Listen for incoming requests on /api/messages.
 async def messages(req: Request) -> Response:
     # Main bot message handler.
     if "application/json" in req.headers["Content-Type"]:
-        body = await req.json()
+        activity = decode_activity(await req.read())
     else:
         return Response(status=HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
 
-    activity = Activity().deserialize(body)
     auth_header = req.headers["Authorization"] if "Authorization" in req.headers else ""
 
-    response = await ADAPTER.process_activity(activity, auth_header, BOT.on_turn)
+    try:
+        response = await ADAPTER.process_activity(activity, auth_header, BOT.on_turn)
+    except (asyncio.TimeoutError, asyncio.QueueFull):
+        # The conversation is backed up: the turn did not run and its state is
+        # untouched, so the channel can safely retry.
+        return Response(status=HTTPStatus.SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
     if response:
         return json_response(data=response.body, status=response.status)
     return Response(status=HTTPStatus.OK)
 
+# Load and queueing figures, for dashboards and load tests.
+async def metrics(req: Request) -> Response:
+    return json_response({
+        "admission": ADMISSION.stats,
+        "turn_lock": TURN_LOCK.stats,
+        "bot": BOT.stats,
+        "recognizer": RECOGNIZER.stats,
+        "storage": getattr(MEMORY, "stats", None),
+        "auth": {
+            "token_cache": TOKEN_CACHE.stats if TOKEN_CACHE else None,
+            "signing_keys": SIGNING_KEYS.stats,
+        },
+        "outbound": CONNECTOR_POOL.stats if CONNECTOR_POOL else None,
+    })
+
+async def start_parsing_service(app: web.Application):
+    # Before serving: a turn never waits for the pool to start and warm up.
+    PARSING_SERVICE.start()
+
+WARMUP_UTTERANCE = "Book a flight from Paris to London on May 5th, back a week later, for 500 euros"
+
+async def warm_up(app: web.Application):
+    # The first parse with a fresh model runs about twice as slow: pay it before serving.
+    for model_type in (ModelType.DATETIME, ModelType.NUMBER, ModelType.CURRENCY):
+        await PARSING_SERVICE.parse(model_type, WARMUP_UTTERANCE)
+
+async def start_storage_sweeper(app: web.Application):
+    if isinstance(MEMORY, BoundedMemoryStorage):
+        MEMORY.start()
+
+async def close_luis_session(app: web.Application):
+    # Release the pooled LUIS connections on shutdown.
+    await LuisPredictionClient.close()
+
+async def close_connector_pool(app: web.Application):
+    # Release the reply connections on shutdown.
+    if CONNECTOR_POOL:
+        await CONNECTOR_POOL.close()
+
+async def stop_parsing_service(app: web.Application):
+    PARSING_SERVICE.shutdown()
+
+async def close_storage(app: web.Application):
+    # Flush the writes still queued for the state database.
+    if isinstance(MEMORY, SqliteStorage):
+        await MEMORY.close()
+    elif isinstance(MEMORY, BoundedMemoryStorage):
+        await MEMORY.stop()
+
+async def start_admission(app: web.Application):
+    ADMISSION.start()
+
+async def start_signing_keys(app: web.Application):
+    # Without an app id, inbound requests are not authenticated.
+    if CONFIG.APP_ID:
+        SIGNING_KEYS.start()
+
+async def stop_signing_keys(app: web.Application):
+    await SIGNING_KEYS.stop()
+
+async def stop_admission(app: web.Application):
+    await ADMISSION.stop()
+
 # Implement function for bot deployment
 def init_func(argv):
-    APP = web.Application(middlewares=[bot_telemetry_middleware, aiohttp_error_middleware])
+    create_bot()
+    APP = web.Application(middlewares=[
+        admission_middleware(ADMISSION, ["/api/messages"], CONFIG.ADMISSION_RETRY_AFTER),
+        bot_telemetry_middleware,
+        aiohttp_error_middleware,
+    ])
     APP.router.add_post("/api/messages", messages)
+    APP.router.add_get("/api/metrics", metrics)
+    APP.on_startup.append(start_parsing_service)
+    APP.on_startup.append(warm_up)
+    APP.on_startup.append(start_admission)
+    APP.on_startup.append(start_signing_keys)
+    APP.on_startup.append(start_storage_sweeper)
+    APP.on_cleanup.append(close_luis_session)
+    APP.on_cleanup.append(close_connector_pool)
+    APP.on_cleanup.append(stop_parsing_service)
+    APP.on_cleanup.append(stop_admission)
+    APP.on_cleanup.append(stop_signing_keys)
+    APP.on_cleanup.append(close_storage)
     return APP
 
 if __name__ == "__main__":
-    APP = init_func(None)
-    
-    try:
-        web.run_app(APP, host="localhost", port=CONFIG.PORT)
-    except Exception as error:
-        raise error
+    logging.basicConfig(level=logging.INFO)
+    # Keep request lines out of the console, as before logging was set up.
+    logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
+    if CONFIG.WORKERS > 1 and CONFIG.WORKER_DISPATCH == "affinity":
+        SERVER = AffinityServer(
+            init_func,
+            "localhost",
+            CONFIG.PORT,
+            CONFIG.WORKERS,
+            use_uvloop=CONFIG.UVLOOP,
+            shutdown_timeout=CONFIG.SHUTDOWN_TIMEOUT,
+            retry_after=CONFIG.ADMISSION_RETRY_AFTER,
+        )
+        LOOP = new_event_loop(CONFIG.UVLOOP)
+        LOOP.run_until_complete(SERVER.serve())
+    elif CONFIG.WORKERS > 1:
+        PreforkServer(
+            init_func,
+            "localhost",
+            CONFIG.PORT,
+            CONFIG.WORKERS,
+            use_uvloop=CONFIG.UVLOOP,
+            shutdown_timeout=CONFIG.SHUTDOWN_TIMEOUT,
+        ).run()
+    else:
+        APP = init_func(None)
+
+        try:
+            web.run_app(
+                APP,
+                host="localhost",
+                port=CONFIG.PORT,
+                shutdown_timeout=CONFIG.SHUTDOWN_TIMEOUT,
+                loop=new_event_loop(CONFIG.UVLOOP),
+            )
+        except Exception as error:
+            raise error
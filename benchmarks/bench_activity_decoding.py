@@ -0,0 +1,64 @@
+"""Decoding cost of incoming activities, msrest against the fast path.
+
+Decodes the channel payloads of tests/activity_payloads.py (Emulator, Web
+Chat, Teams, Direct Line) from the raw request body, then reads the fields
+a turn reads: type, text, locale, conversation and sender.
+
+    python -m benchmarks.bench_activity_decoding --number 20000
+"""
+
+import argparse
+import json
+import time
+
+from botbuilder.schema import Activity
+
+from helpers import activity_decoder
+from helpers.activity_decoder import decode_activity
+from tests.activity_payloads import PAYLOADS
+
+
+def read_turn_fields(activity: Activity):
+    return (
+        activity.type,
+        activity.text,
+        activity.locale,
+        activity.conversation.id,
+        activity.from_property.id,
+    )
+
+
+def msrest_decode(body: bytes) -> Activity:
+    # What app.py did: req.json() then Activity().deserialize().
+    return Activity().deserialize(json.loads(body))
+
+
+def timed(decode, body: bytes, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        read_turn_fields(decode(body))
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def main(number: int):
+    fast_loads = activity_decoder.loads
+    print(f"JSON parser: {fast_loads.__module__}")
+    print(f"{'payload':<28} {'bytes':>6} {'msrest':>10} {'fast, json':>11} {'fast':>10} {'speedup':>8}")
+    for name, payload in PAYLOADS.items():
+        body = json.dumps(payload).encode("utf-8")
+        before = timed(msrest_decode, body, number // 10)
+        activity_decoder.loads = json.loads
+        stdlib = timed(decode_activity, body, number)
+        activity_decoder.loads = fast_loads
+        after = timed(decode_activity, body, number)
+        print(
+            f"{name:<28} {len(body):6} {before:8.1f}us {stdlib:9.1f}us {after:8.1f}us"
+            f" {before / after:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--number", type=int, default=20000)
+    ARGS = PARSER.parse_args()
+    main(ARGS.number)
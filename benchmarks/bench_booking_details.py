@@ -0,0 +1,116 @@
+"""Size and serialization time of BookingDetails, slotted/compact vs the plain class.
+
+The plain class is the previous BookingDetails (a __dict__ with the timex
+strings and their ordinals). The conversation state is what the
+test_1 BookingDialog transcript leaves in storage at the budget prompt, with
+the same details object referenced from every dialog frame.
+
+    python -m benchmarks.bench_booking_details --number 20000
+"""
+
+import argparse
+import asyncio
+import copy
+import pickle
+import timeit
+
+import jsonpickle
+from botbuilder.core import TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import DialogSet, DialogTurnStatus
+
+from booking_details import BookingDetails
+from dialogs import BookingDialog
+from helpers.snapshot_storage import SnapshotConversationState, SnapshotMemoryStorage
+
+TRANSCRIPT = ["Hello", "Paris", "Lille", "01-01-2023", "31-01-2023"]
+
+
+class PlainBookingDetails:
+    """The previous BookingDetails layout."""
+
+    def __init__(self, details: BookingDetails):
+        self.destination = details.destination
+        self.origin = details.origin
+        self._start_date = details.start_date
+        self.start_ordinal = details.start_ordinal
+        self._end_date = details.end_date
+        self.end_ordinal = details.end_ordinal
+        self.budget = details.budget
+        self.unsupported_airports = details.unsupported_airports
+        self.geo_list = details.geo_list
+        self.number_list = details.number_list
+
+
+async def conversation_state() -> dict:
+    async def exec_test(turn_context: TurnContext):
+        dialog_context = await dialogs.create_context(turn_context)
+        results = await dialog_context.continue_dialog()
+        if results.status == DialogTurnStatus.Empty:
+            await dialog_context.begin_dialog(BookingDialog.__name__, BookingDetails())
+        await conv_state.save_changes(turn_context)
+
+    storage = SnapshotMemoryStorage()
+    conv_state = SnapshotConversationState(storage)
+    dialogs = DialogSet(conv_state.create_property("dialog_state"))
+    dialogs.add(BookingDialog())
+    adapter = TestAdapter(exec_test)
+    for utterance in TRANSCRIPT:
+        await adapter.send(utterance)
+    return await storage.read(list(storage.memory))
+
+
+def with_plain_details(state):
+    """The same state with every BookingDetails swapped for the plain class."""
+    swapped, visited = {}, set()
+
+    def swap(value):
+        if isinstance(value, BookingDetails):
+            return swapped.setdefault(id(value), PlainBookingDetails(value))
+        if id(value) in visited:
+            return value
+        visited.add(id(value))
+        if isinstance(value, dict):
+            for key, item in value.items():
+                value[key] = swap(item)
+        elif isinstance(value, list):
+            value[:] = [swap(item) for item in value]
+        elif hasattr(value, "__dict__") and not isinstance(value, type):
+            for name, item in vars(value).items():
+                setattr(value, name, swap(item))
+        return value
+
+    return swap(copy.deepcopy(state))
+
+
+def report(name: str, plain, compact, number: int):
+    def per_call(statement):
+        return timeit.timeit(statement, number=number) / number * 1e6
+
+    print(f"{name}")
+    for label, value in (("plain", plain), ("compact", compact)):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        print(
+            f"  {label:<8} {len(data):6} B pickled"
+            f"  dumps {per_call(lambda: pickle.dumps(value, pickle.HIGHEST_PROTOCOL)):7.2f} us"
+            f"  loads {per_call(lambda: pickle.loads(data)):7.2f} us"
+            f"  deepcopy {per_call(lambda: copy.deepcopy(value)):7.2f} us"
+            f"  jsonpickle {per_call(lambda: jsonpickle.Pickler().flatten(value)):7.2f} us"
+        )
+
+
+def main(number: int):
+    details = BookingDetails(
+        "Paris", "Lille", "2023-01-01", "2023-01-31", "1000 Euro", geo_list=["Paris", "Lille"]
+    )
+    report("BookingDetails", PlainBookingDetails(details), details, number)
+
+    state = asyncio.run(conversation_state())
+    report("conversation state", with_plain_details(state), state, max(number // 20, 1))
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--number", type=int, default=20000)
+    ARGS = PARSER.parse_args()
+    main(ARGS.number)
@@ -0,0 +1,65 @@
+"""Compare the budget fast path with the full currency recognizer.
+
+Runs over the budget strings of data/extract_frames.json, the way
+BudgetResolverDialog parses them: the validator and currency_step each parsed
+the answer before, the fast path parses it once and falls back when needed.
+
+    python -m benchmarks.bench_budget_parser --rounds 5
+"""
+
+import argparse
+import json
+import time
+
+from gazetteer_recognizer import FRAMES_FILE
+from helpers.budget_parser import fast_parse
+from helpers.parsing_service import parse_text
+from helpers.recognizer_models import RECOGNIZER_MODELS, ModelType
+
+
+def load_budgets():
+    with open(FRAMES_FILE, encoding="utf-8") as frames_file:
+        frames = json.load(frames_file)
+    return [
+        frame["text"][entity["startPos"]:entity["endPos"] + 1]
+        for frame in frames
+        for entity in frame["entities"]
+        if entity["entity"] == "budget"
+    ]
+
+
+def recognizer_twice(text):
+    parse_text(ModelType.CURRENCY, "en-us", text)
+    return parse_text(ModelType.CURRENCY, "en-us", text)
+
+
+def fast_once(text):
+    results = fast_parse(text)
+    return results if results is not None else parse_text(ModelType.CURRENCY, "en-us", text)
+
+
+def timed(parse, budgets, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in budgets:
+            parse(text)
+    return (time.perf_counter() - start) / (rounds * len(budgets))
+
+
+def main(rounds: int):
+    RECOGNIZER_MODELS.warm()
+    budgets = load_budgets()
+    handled = sum(fast_parse(text) is not None for text in budgets)
+    print(f"{len(budgets)} budgets, {handled} ({handled / len(budgets):.0%}) handled by the fast path")
+
+    before = timed(recognizer_twice, budgets, rounds)
+    after = timed(fast_once, budgets, rounds)
+    print(f"recognizer twice  {before * 1000:8.3f} ms per answer")
+    print(f"fast path once    {after * 1000:8.3f} ms per answer  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--rounds", type=int, default=5)
+    ARGS = PARSER.parse_args()
+    main(ARGS.rounds)
@@ -0,0 +1,79 @@
+"""CPU time per date turn with and without the date fast path.
+
+Prompt answers are the kind of dates DateResolverDialog asks for; the frame
+dates are the str_date/end_date strings of data/extract_frames.json, which
+LuisHelper parses and which mostly lack a year.
+
+    python -m benchmarks.bench_date_parser --rounds 3
+"""
+
+import argparse
+import json
+import time
+
+from gazetteer_recognizer import FRAMES_FILE
+from helpers.date_parser import fast_parse
+from helpers.parsing_service import parse_text
+from helpers.recognizer_models import RECOGNIZER_MODELS, ModelType
+
+PROMPT_ANSWERS = [
+    "2023-01-01",
+    "31-01-2023",
+    "13/02/2023",
+    "february 2, 2017",
+    "22nd of september 2016",
+    "tomorrow",
+    "01-02-2023",
+    "next friday",
+]
+
+
+def frame_dates():
+    with open(FRAMES_FILE, encoding="utf-8") as frames_file:
+        frames = json.load(frames_file)
+    return [
+        frame["text"][entity["startPos"]:entity["endPos"] + 1]
+        for frame in frames
+        for entity in frame["entities"]
+        if entity["entity"] in ("str_date", "end_date")
+    ]
+
+
+def recognizer(text):
+    return parse_text(ModelType.DATETIME, "en-us", text)
+
+
+def fast_then_recognizer(text):
+    results = fast_parse(text)
+    return results if results is not None else recognizer(text)
+
+
+def cpu_per_turn(parse, texts, rounds: int) -> float:
+    start = time.process_time()
+    for _ in range(rounds):
+        for text in texts:
+            parse(text)
+    return (time.process_time() - start) / (rounds * len(texts))
+
+
+def report(name, texts, rounds: int):
+    handled = sum(fast_parse(text) is not None for text in texts)
+    before = cpu_per_turn(recognizer, texts, rounds)
+    after = cpu_per_turn(fast_then_recognizer, texts, rounds)
+    print(
+        f"{name:<15} {len(texts):5} dates  fast path {handled / len(texts):4.0%}"
+        f"  {before * 1000:7.3f} -> {after * 1000:7.3f} ms CPU per turn"
+    )
+
+
+def main(rounds: int):
+    RECOGNIZER_MODELS.warm()
+    report("prompt answers", PROMPT_ANSWERS * 10, rounds)
+    report("frame dates", frame_dates(), rounds)
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--rounds", type=int, default=3)
+    ARGS = PARSER.parse_args()
+    main(ARGS.rounds)
@@ -0,0 +1,90 @@
+"""Compare the stock LuisRecognizer (v3) with the pooled LuisPredictionClient.
+
+Both run against the local LUIS stub, so the numbers reflect client overhead
+(connection setup, parsing) rather than LUIS itself.
+
+    python -m benchmarks.bench_luis_client --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from botbuilder.ai.luis import LuisApplication, LuisRecognizer, LuisRecognizerOptionsV3
+from botbuilder.core import TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import Activity, ActivityTypes, ChannelAccount, ConversationAccount
+
+from config import DefaultConfig
+from helpers.metrics import LatencyHistogram
+from luis_prediction_client import LuisPredictionClient
+from tests.luis_stub import LuisStub
+
+UTTERANCE = "book a flight from lille to paris on 2023-01-01 for 1000 euros"
+
+
+def make_turn(adapter: TestAdapter) -> TurnContext:
+    return TurnContext(
+        adapter,
+        Activity(
+            type=ActivityTypes.message,
+            channel_id="test",
+            text=UTTERANCE,
+            from_property=ChannelAccount(id="user"),
+            recipient=ChannelAccount(id="bot"),
+            conversation=ConversationAccount(id="conversation"),
+        ),
+    )
+
+
+async def run(name, call, requests: int, concurrency: int) -> None:
+    histogram = LatencyHistogram()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            histogram.observe(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(requests)])
+    elapsed = time.perf_counter() - start
+    snapshot = histogram.snapshot
+    print(
+        f"{name:<10} {requests / elapsed:8.0f} req/s"
+        f"  mean {snapshot['mean_ms']:6.2f} ms  p99 <= {snapshot['p99_ms']:6.2f} ms"
+    )
+
+
+async def main(requests: int, concurrency: int) -> None:
+    stub = await LuisStub().start()
+    config = DefaultConfig()
+    config.LUIS_APP_ID = str(uuid.uuid4())
+    config.LUIS_API_KEY = str(uuid.uuid4())
+    config.LUIS_API_HOST_NAME = stub.endpoint
+    config.LUIS_POOL_SIZE = concurrency
+
+    stock = LuisRecognizer(
+        LuisApplication(config.LUIS_APP_ID, config.LUIS_API_KEY, stub.endpoint),
+        prediction_options=LuisRecognizerOptionsV3(),
+    )
+    native = LuisPredictionClient(config)
+    adapter = TestAdapter()
+
+    try:
+        await run("stock", lambda: stock.recognize(make_turn(adapter)), requests, concurrency)
+        await run("native", lambda: native.predict(UTTERANCE), requests, concurrency)
+    finally:
+        await LuisPredictionClient.close()
+        await stub.stop()
+    print(f"stub saw {len(stub.connections)} distinct client connections")
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--requests", type=int, default=2000)
+    PARSER.add_argument("--concurrency", type=int, default=50)
+    ARGS = PARSER.parse_args()
+    asyncio.run(main(ARGS.requests, ARGS.concurrency))
@@ -0,0 +1,72 @@
+"""Turn latency and event loop lag as concurrent conversations grow, per parsing mode.
+
+Each simulated turn waits on a little I/O and then parses a date and a budget,
+like a booking turn does. The heartbeat measures how late the event loop wakes
+up, which is the delay every other conversation on the worker suffers.
+
+    python -m benchmarks.bench_parsing_service --turns 20 --workers 4
+"""
+
+import argparse
+import asyncio
+import time
+
+from helpers.metrics import LatencyHistogram
+from helpers.parsing_service import ParsingService
+from helpers.recognizer_models import RECOGNIZER_MODELS, ModelType
+
+DATES = ["august 13, 2016", "01-01-2023", "sept 6th", "the 22nd of september"]
+BUDGETS = ["1000 euros", "$2500", "3000 usd", "1900"]
+
+
+async def conversation(service: ParsingService, turns: int, histogram: LatencyHistogram):
+    for turn in range(turns):
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        await service.parse(ModelType.DATETIME, DATES[turn % len(DATES)])
+        await service.parse(ModelType.CURRENCY, BUDGETS[turn % len(BUDGETS)])
+        histogram.observe(time.perf_counter() - start)
+
+
+async def heartbeat(lag: LatencyHistogram, stop: asyncio.Event):
+    while not stop.is_set():
+        expected = time.perf_counter() + 0.001
+        await asyncio.sleep(0.001)
+        lag.observe(max(time.perf_counter() - expected, 0))
+
+
+async def run(service: ParsingService, conversations: int, turns: int):
+    turn_latency, loop_lag = LatencyHistogram(), LatencyHistogram()
+    stop = asyncio.Event()
+    beat = asyncio.ensure_future(heartbeat(loop_lag, stop))
+    await asyncio.gather(
+        *[conversation(service, turns, turn_latency) for _ in range(conversations)]
+    )
+    stop.set()
+    await beat
+    return turn_latency.snapshot, loop_lag.snapshot
+
+
+def main(turns: int, workers: int):
+    RECOGNIZER_MODELS.warm()
+    print(f"{'mode':<8} {'convs':>5} {'turn p50':>9} {'turn p99':>9} {'loop lag p99':>13}")
+    for mode in (ParsingService.INLINE, ParsingService.THREAD, ParsingService.PROCESS):
+        service = ParsingService(mode, workers)
+        service.start()
+        try:
+            for conversations in (1, 10, 50, 100):
+                turn, lag = asyncio.run(run(service, conversations, turns))
+                print(
+                    f"{mode:<8} {conversations:>5} {turn['p50_ms']:>7.1f}ms"
+                    f" {turn['p99_ms']:>7.1f}ms {lag['p99_ms']:>11.1f}ms"
+                )
+        finally:
+            service.shutdown()
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--turns", type=int, default=20)
+    PARSER.add_argument("--workers", type=int, default=None)
+    ARGS = PARSER.parse_args()
+    main(ARGS.turns, ARGS.workers)
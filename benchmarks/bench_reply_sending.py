@@ -0,0 +1,103 @@
+"""Outbound cost of the replies a turn sends, stock connector clients against the pool.
+
+Runs turns that send two replies, as the error handler does, to the
+stand-in channel of tests/channel_stub.py, and counts per turn the
+requests, new connections and token requests the channel saw. --delay adds
+channel latency to every reply; --concurrency runs that many turns at once.
+
+The stock clients take their app token from MSAL, which only talks to an
+HTTPS authority, so they run unauthenticated here; the pool runs both ways.
+
+    python -m benchmarks.bench_reply_sending --turns 200 --concurrency 20 --delay 0.02
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from botbuilder.core import BotFrameworkAdapterSettings, ConversationState, MemoryStorage
+from botbuilder.schema import Activity, ActivityTypes, ChannelAccount, ConversationAccount
+from botframework.connector.auth import ClaimsIdentity, MicrosoftAppCredentials
+
+from adapter_with_error_handler import AdapterWithErrorHandler
+from helpers.connector_pool import ConnectorPool
+from helpers.metrics import LatencyHistogram
+from tests.channel_stub import ChannelStub
+
+APP_ID = str(uuid.uuid4())
+
+
+async def two_replies(turn_context):
+    await turn_context.send_activity("The bot encountered an error or bug.")
+    await turn_context.send_activity("To continue to run this bot, please fix the bot source code.")
+
+
+async def run(name: str, pooled: bool, signed: bool, turns: int, concurrency: int, delay: float):
+    channel = await ChannelStub(delay=delay).start()
+    app_id = APP_ID if signed else ""
+    credentials = MicrosoftAppCredentials(app_id, "secret" if signed else "")
+    credentials.oauth_endpoint = channel.login_endpoint
+    pool = ConnectorPool() if pooled else None
+    adapter = AdapterWithErrorHandler(
+        BotFrameworkAdapterSettings(app_id, "", app_credentials=credentials),
+        ConversationState(MemoryStorage()),
+        connector_pool=pool,
+    )
+    identity = ClaimsIdentity({"aud": app_id} if app_id else {}, True)
+    latency = LatencyHistogram()
+
+    async def turn(index: int):
+        activity = Activity(
+            type=ActivityTypes.message,
+            id=str(index),
+            text="hi",
+            channel_id="msteams",
+            service_url=channel.endpoint,
+            conversation=ConversationAccount(id=f"conversation-{index}"),
+            from_property=ChannelAccount(id="user"),
+            recipient=ChannelAccount(id="bot"),
+        )
+        started = time.perf_counter()
+        await adapter.process_activity_with_identity(activity, identity, two_replies)
+        latency.observe(time.perf_counter() - started)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(index: int):
+        async with semaphore:
+            await turn(index)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[limited(index) for index in range(turns)])
+    elapsed = time.perf_counter() - started
+    if pool:
+        await pool.close()
+    await channel.stop()
+
+    snapshot = latency.snapshot
+    print(
+        f"{name:<26} {turns / elapsed:8.0f} {snapshot['mean_ms']:8.1f}ms {snapshot['p99_ms']:8.1f}ms"
+        f" {len(channel.activities) / turns:9.2f} {len(channel.connections) / turns:12.3f}"
+        f" {channel.token_requests / turns:12.3f}"
+    )
+
+
+async def main(turns: int, concurrency: int, delay: float):
+    print(f"{turns} turns, {concurrency} at once, {delay * 1000:.0f}ms channel latency")
+    print(
+        f"{'client':<26} {'turns/s':>8} {'mean':>10} {'p99':>10} {'replies':>9}"
+        f" {'connections':>12} {'tokens':>12}"
+    )
+    await run("stock, unsigned", False, False, turns, concurrency, delay)
+    await run("pooled, unsigned", True, False, turns, concurrency, delay)
+    await run("pooled, signed", True, True, turns, concurrency, delay)
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--turns", type=int, default=200)
+    PARSER.add_argument("--concurrency", type=int, default=20)
+    PARSER.add_argument("--delay", type=float, default=0.02)
+    ARGS = PARSER.parse_args()
+    asyncio.run(main(ARGS.turns, ARGS.concurrency, ARGS.delay))
@@ -0,0 +1,116 @@
+"""Turns per completed booking, with and without slot filling.
+
+Replays every utterance of data/extract_frames.json as the first answer of
+a booking (at the destination prompt, as when LUIS is unavailable). A scripted
+user then answers whatever the bot still asks for with fixed values, until
+the booking is confirmed. Each turn is one round trip and one state save.
+
+    python -m benchmarks.bench_slot_filling --limit 1000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+from botbuilder.core import ConversationState, MemoryStorage, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import DialogSet, DialogTurnStatus
+
+from booking_details import BookingDetails
+from dialogs import BookingDialog
+from gazetteer_recognizer import FRAMES_FILE, GazetteerRecognizer
+
+# Prompt prefix -> scripted answer.
+ANSWERS = (
+    ("To what city", "Paris"),
+    ("From what city", "Lille"),
+    ("I have understood you want to travel", "yes"),
+    ("On what date would you like to start", "2023-01-01"),
+    ("On what date would you like to return", "2023-01-31"),
+    ("You have indicated wanting", "yes"),
+    ("Please provide me with your budget", "1000 euros"),
+    ("Please select a currency", "Euro"),
+    ("Please confirm, I have you", "yes"),
+)
+MAX_TURNS = 30
+
+
+def load_utterances(limit: int):
+    with open(FRAMES_FILE, encoding="utf-8") as frames_file:
+        frames = json.load(frames_file)
+    utterances = [frame["text"] for frame in frames]
+    return utterances[:limit] if limit else utterances
+
+
+def scripted_answer(prompt: str, last_answer: str) -> str:
+    for prefix, answer in ANSWERS:
+        if prompt.startswith(prefix):
+            return answer
+    # A reprompt ("I'm sorry, for best results ..."): the previous answer was not understood.
+    return last_answer
+
+
+async def turns_to_book(utterance: str, booking_dialog: BookingDialog) -> int:
+    async def exec_test(turn_context: TurnContext):
+        dialog_context = await dialogs.create_context(turn_context)
+        results = await dialog_context.continue_dialog()
+        if results.status == DialogTurnStatus.Empty:
+            await dialog_context.begin_dialog(BookingDialog.__name__, BookingDetails())
+        elif results.status == DialogTurnStatus.Complete:
+            completed.append(results.result)
+        await conv_state.save_changes(turn_context)
+
+    completed = []
+    conv_state = ConversationState(MemoryStorage())
+    dialogs = DialogSet(conv_state.create_property("dialog_state"))
+    dialogs.add(booking_dialog)
+    adapter = TestAdapter(exec_test)
+
+    await adapter.receive_activity("Hello")
+    answer = utterance
+    for turn in range(1, MAX_TURNS + 1):
+        adapter.activity_buffer.clear()
+        await adapter.receive_activity(answer)
+        if completed:
+            return turn
+        answer = scripted_answer(adapter.activity_buffer[-1].text, answer)
+    return MAX_TURNS
+
+
+async def replay(utterances, booking_dialog: BookingDialog):
+    turns = Counter()
+    start = time.perf_counter()
+    for utterance in utterances:
+        turns[await turns_to_book(utterance, booking_dialog)] += 1
+    return turns, time.perf_counter() - start
+
+
+def report(name: str, turns: Counter, elapsed: float):
+    bookings = sum(turns.values())
+    total = sum(count * turn for turn, count in turns.items())
+    histogram = ", ".join(f"{turn}: {turns[turn]}" for turn in sorted(turns))
+    print(
+        f"{name:<14} {total / bookings:5.2f} turns per booking"
+        f"  {elapsed / total * 1000:6.2f} ms per turn  ({histogram})"
+    )
+    return total / bookings
+
+
+def main(limit: int):
+    utterances = load_utterances(limit)
+    print(f"{len(utterances)} opening utterances")
+    before = report("prompt by slot", *asyncio.run(replay(utterances, BookingDialog())))
+    after = report(
+        "slot filling",
+        *asyncio.run(replay(utterances, BookingDialog(slot_recognizer=GazetteerRecognizer()))),
+    )
+    print(f"{1 - after / before:.1%} fewer turns")
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--limit", type=int, default=0, help="utterances to replay, 0 for all")
+    ARGS = PARSER.parse_args()
+    main(ARGS.limit)
@@ -0,0 +1,87 @@
+"""Per-turn state cost of the BookingDialog transcript from tests/test_1.py.
+
+Runs the transcript repeatedly against MemoryStorage + ConversationState and
+against SnapshotMemoryStorage + SnapshotConversationState, measuring the time
+spent in state load/save (untraced pass) and the memory allocated during it
+(traced pass, tracemalloc peak over the turn's start).
+
+    python -m benchmarks.bench_state_storage --runs 20
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from botbuilder.core import ConversationState, MemoryStorage, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import DialogSet, DialogTurnStatus
+
+from booking_details import BookingDetails
+from dialogs import BookingDialog
+from helpers.recognizer_models import RECOGNIZER_MODELS
+from helpers.snapshot_storage import SnapshotConversationState, SnapshotMemoryStorage
+
+TRANSCRIPT = ["Hello", "Paris", "Lille", "01-01-2023", "31-01-2023", "1000 euros", "yes"]
+
+
+class StateMeter:
+    """Time and peak allocation of the state layer across turns."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.allocated = 0
+
+    async def measure(self, call):
+        if not tracemalloc.is_tracing():
+            start = time.perf_counter()
+            await call
+            self.seconds += time.perf_counter() - start
+            return
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        await call
+        self.allocated += tracemalloc.get_traced_memory()[1] - before
+
+
+async def run_transcripts(conv_state, runs: int, meter: StateMeter):
+    async def exec_test(turn_context: TurnContext):
+        await meter.measure(conv_state.load(turn_context))
+        dialog_context = await dialogs.create_context(turn_context)
+        results = await dialog_context.continue_dialog()
+        if results.status == DialogTurnStatus.Empty:
+            await dialog_context.begin_dialog(BookingDialog.__name__, BookingDetails())
+        await meter.measure(conv_state.save_changes(turn_context))
+
+    dialogs = DialogSet(conv_state.create_property("dialog_state"))
+    dialogs.add(BookingDialog())
+    for _ in range(runs):
+        # A fresh adapter is a fresh conversation.
+        adapter = TestAdapter(exec_test)
+        for utterance in TRANSCRIPT:
+            await adapter.send(utterance)
+
+
+def main(runs: int):
+    RECOGNIZER_MODELS.warm()
+    for name, make_state in (
+        ("memory", lambda: ConversationState(MemoryStorage())),
+        ("snapshot", lambda: SnapshotConversationState(SnapshotMemoryStorage())),
+    ):
+        meter = StateMeter()
+        asyncio.run(run_transcripts(make_state(), runs, meter))
+        tracemalloc.start()
+        asyncio.run(run_transcripts(make_state(), runs, meter))
+        tracemalloc.stop()
+        turns = runs * len(TRANSCRIPT)
+        print(
+            f"{name:<9} state load+save {meter.seconds / turns * 1000:6.3f} ms"
+            f"  peak alloc {meter.allocated / turns / 1024:7.1f} KiB per turn"
+        )
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--runs", type=int, default=20)
+    ARGS = PARSER.parse_args()
+    main(ARGS.runs)
@@ -0,0 +1,81 @@
+"""Bot state storage throughput: MemoryStorage against SqliteStorage.
+
+Each conversation runs turns the way BotState does them: read its state,
+change the booking, write it back. "sqlite unbatched" commits every write on
+its own, which is what the storage would do without write coalescing.
+
+    python -m benchmarks.bench_storage --conversations 200 --turns 20
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from botbuilder.core import MemoryStorage
+
+from booking_details import BookingDetails
+from helpers.metrics import LatencyHistogram
+from helpers.sqlite_storage import SqliteStorage
+
+
+async def conversation(storage, index: int, turns: int, histogram: LatencyHistogram):
+    key = f"emulator/conversations/{index}/"
+    for turn in range(turns):
+        start = time.perf_counter()
+        state = (await storage.read([key])).get(key) or {
+            "DialogState": {"booking": BookingDetails(destination="Paris", origin="Lille")}
+        }
+        state["DialogState"]["turn"] = turn
+        state["DialogState"]["booking"].budget = f"{1000 + turn} Euro"
+        await storage.write({key: state})
+        histogram.observe(time.perf_counter() - start)
+
+
+async def run(name: str, storage, conversations: int, turns: int):
+    histogram = LatencyHistogram()
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[conversation(storage, index, turns, histogram) for index in range(conversations)]
+    )
+    elapsed = time.perf_counter() - start
+    snapshot = histogram.snapshot
+    extra = ""
+    if isinstance(storage, SqliteStorage):
+        stats = storage.stats
+        extra = f"  {stats['writes'] / max(stats['commits'], 1):6.1f} writes/commit"
+        await storage.close()
+    print(
+        f"{name:<18} {conversations * turns / elapsed:8.0f} turns/s"
+        f"  mean {snapshot['mean_ms']:6.2f} ms  p99 <= {snapshot['p99_ms']:7.2f} ms{extra}"
+    )
+
+
+def main(conversations: int, turns: int):
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run("memory", MemoryStorage(), conversations, turns))
+        asyncio.run(
+            run(
+                "sqlite",
+                SqliteStorage(os.path.join(directory, "batched.db")),
+                conversations,
+                turns,
+            )
+        )
+        asyncio.run(
+            run(
+                "sqlite unbatched",
+                SqliteStorage(os.path.join(directory, "unbatched.db"), max_batch=1),
+                conversations,
+                turns,
+            )
+        )
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--conversations", type=int, default=200)
+    PARSER.add_argument("--turns", type=int, default=20)
+    ARGS = PARSER.parse_args()
+    main(ARGS.conversations, ARGS.turns)
@@ -0,0 +1,66 @@
+"""Cost of authenticating an inbound request, stock validation against the cache.
+
+Mints a channel token with a local signing authority (the stand-in of
+tests/test_token_validation.py) and authenticates the same request over and
+over, as every turn of a conversation does with the token its channel reuses
+for up to an hour.
+
+    python -m benchmarks.bench_token_validation --number 2000
+"""
+
+import argparse
+import asyncio
+import time
+
+from botbuilder.core import BotFrameworkAdapterSettings, ConversationState, MemoryStorage
+from botframework.connector.auth import ChannelValidation, JwtTokenExtractor
+
+from adapter_with_error_handler import AdapterWithErrorHandler
+from helpers.token_validation import SigningKeyRefresher, VerifiedTokenCache
+from tests.test_token_validation import APP_ID, SigningAuthority, message
+
+
+async def timed(authenticate, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        await authenticate()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+async def main(number: int):
+    authority = await SigningAuthority().start()
+    ChannelValidation.open_id_metadata_endpoint = authority.metadata_url
+    refresher = SigningKeyRefresher([authority.metadata_url])
+    refresher.start()
+    await refresher.refresh()
+    try:
+        settings = BotFrameworkAdapterSettings(APP_ID, "secret")
+        storage = ConversationState(MemoryStorage())
+        uncached = AdapterWithErrorHandler(settings, storage, token_cache=VerifiedTokenCache())
+        cached = AdapterWithErrorHandler(settings, storage, token_cache=VerifiedTokenCache())
+        activity = message()
+        header = f"Bearer {authority.mint()}"
+
+        async def validate():
+            uncached.token_cache.clear()
+            await uncached._authenticate_request(activity, header)
+
+        async def validate_once():
+            await cached._authenticate_request(activity, header)
+
+        before = await timed(validate, number)
+        after = await timed(validate_once, number * 10)
+        print(f"{'validated every request':<28} {before:8.1f}us")
+        print(f"{'validated once, cached':<28} {after:8.1f}us {before / after:7.1f}x")
+    finally:
+        await refresher.stop()
+        JwtTokenExtractor.metadataCache.pop(authority.metadata_url, None)
+        ChannelValidation.open_id_metadata_endpoint = None
+        await authority.server.close()
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--number", type=int, default=2000)
+    ARGS = PARSER.parse_args()
+    asyncio.run(main(ARGS.number))
@@ -0,0 +1,176 @@
+"""Throughput of /api/messages against the number of prefork workers.
+
+Every worker runs MainDialog without LUIS, so each answer is parsed by the
+booking dialog's Recognizers-Text prompts: CPU-bound work that one event
+loop cannot spread over several cores. Closed-loop users each play whole
+bookings, one turn after the other.
+
+With --dispatch reuseport the kernel spreads connections over the workers,
+so state lives in one shared SQLite file and a conversation can move between
+workers from turn to turn. With --dispatch affinity a dispatcher sends every
+turn of a conversation to the same worker, which keeps state in memory.
+
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --dispatch reuseport affinity
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from functools import partial
+from http import HTTPStatus
+
+import aiohttp
+from aiohttp import web
+from botbuilder.core import (
+    BotFrameworkAdapterSettings,
+    ConversationState,
+    MemoryStorage,
+    UserState,
+)
+
+from adapter_with_error_handler import AdapterWithErrorHandler
+from bots import DialogAndWelcomeBot
+from config import DefaultConfig
+from dialogs import BookingDialog, MainDialog
+from flight_booking_recognizer import FlightBookingRecognizer
+from helpers.activity_decoder import decode_activity
+from helpers.affinity import AffinityServer
+from helpers.keyed_lock import KeyedLock
+from helpers.metrics import LatencyHistogram
+from helpers.prefork import PreforkServer
+from helpers.sqlite_storage import SqliteStorage
+
+SCRIPT = ["hi", "Paris", "Lille", "yes", "2023-01-01", "2023-01-31", "1000 euros", "yes"]
+
+
+class OfflineConfig(DefaultConfig):
+    LUIS_APP_ID = ""
+    LUIS_API_KEY = ""
+    LUIS_API_HOST_NAME = ""
+
+
+def bench_app(storage_path: str, argv) -> web.Application:
+    storage = SqliteStorage(storage_path, shared=True) if storage_path else MemoryStorage()
+    conversation_state = ConversationState(storage)
+    adapter = AdapterWithErrorHandler(
+        BotFrameworkAdapterSettings("", ""), conversation_state, KeyedLock(15, 16)
+    )
+    dialog = MainDialog(FlightBookingRecognizer(OfflineConfig()), BookingDialog())
+    bot = DialogAndWelcomeBot(conversation_state, UserState(MemoryStorage()), dialog, None)
+
+    async def messages(req: web.Request) -> web.Response:
+        activity = decode_activity(await req.read())
+        response = await adapter.process_activity(activity, "", bot.on_turn)
+        if response:
+            return web.json_response(data=response.body, status=response.status)
+        return web.Response(status=HTTPStatus.OK)
+
+    async def close_storage(app: web.Application):
+        if isinstance(storage, SqliteStorage):
+            await storage.close()
+
+    app = web.Application()
+    app.router.add_post("/api/messages", messages)
+    app.on_cleanup.append(close_storage)
+    return app
+
+
+def message(conversation: str, index: int, text: str) -> dict:
+    return {
+        "type": "message",
+        "id": f"{conversation}-{index}",
+        "text": text,
+        "channelId": "bench",
+        "serviceUrl": "http://127.0.0.1:1",
+        "deliveryMode": "expectReplies",
+        "conversation": {"id": conversation},
+        "from": {"id": f"user-{conversation}"},
+        "recipient": {"id": "bot"},
+    }
+
+
+async def load(port: int, users: int, duration: float):
+    latency = LatencyHistogram()
+    failures = [0]
+    url = f"http://127.0.0.1:{port}/api/messages"
+    deadline = time.perf_counter() + duration
+
+    async def user(session: aiohttp.ClientSession):
+        while time.perf_counter() < deadline:
+            conversation = str(uuid.uuid4())
+            for index, text in enumerate(SCRIPT):
+                start = time.perf_counter()
+                async with session.post(url, json=message(conversation, index, text)) as response:
+                    await response.read()
+                    if response.status != HTTPStatus.OK:
+                        failures[0] += 1
+                latency.observe(time.perf_counter() - start)
+
+    # One connection per user, so the kernel spreads users over the workers.
+    connector = aiohttp.TCPConnector(limit=0, force_close=False)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*[user(session) for _ in range(users)])
+        elapsed = time.perf_counter() - started
+    return latency, failures[0], elapsed
+
+
+async def run_affinity(workers: int, args):
+    server = AffinityServer(
+        partial(bench_app, None), "127.0.0.1", args.port, workers, use_uvloop=args.uvloop
+    )
+    await server.start()
+    try:
+        return await load(args.port, args.users, args.duration)
+    finally:
+        await server.stop()
+
+
+def run(dispatch: str, workers: int, args, directory: str) -> float:
+    if dispatch == "affinity":
+        latency, failures, elapsed = asyncio.run(run_affinity(workers, args))
+    else:
+        storage_path = os.path.join(directory, f"state-{workers}.db")
+        server = PreforkServer(
+            partial(bench_app, storage_path), "127.0.0.1", args.port, workers, use_uvloop=args.uvloop
+        )
+        server.start()
+        try:
+            latency, failures, elapsed = asyncio.run(load(args.port, args.users, args.duration))
+        finally:
+            server.stop()
+
+    snapshot = latency.snapshot
+    throughput = snapshot["count"] / elapsed
+    print(
+        f"{dispatch:<9} {workers:2} workers  {throughput:7.1f} turns/s"
+        f"  p50 {snapshot['p50_ms']:6.0f} ms  p99 {snapshot['p99_ms']:6.0f} ms  failures {failures}"
+    )
+    return throughput
+
+
+def main(args) -> None:
+    print(f"{os.cpu_count()} CPUs, {args.users} users for {args.duration:.0f}s per run")
+    with tempfile.TemporaryDirectory() as directory:
+        for dispatch in args.dispatch:
+            baseline = None
+            for workers in args.workers:
+                throughput = run(dispatch, workers, args, directory)
+                baseline = baseline or throughput
+                print(f"{'':22}x{throughput / baseline:.2f} over {args.workers[0]} worker(s)")
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    PARSER.add_argument("--users", type=int, default=32)
+    PARSER.add_argument("--duration", type=float, default=10)
+    PARSER.add_argument(
+        "--dispatch", nargs="+", choices=["reuseport", "affinity"], default=["reuseport"]
+    )
+    PARSER.add_argument("--uvloop", action="store_true")
+    PARSER.add_argument("--port", type=int, default=8070)
+    main(PARSER.parse_args())
@@ -0,0 +1,185 @@
+"""Open-loop load test of /api/messages, with and without admission control.
+
+The bot server runs in a child process: MainDialog with the native LUIS
+client pointed at the local LUIS stub, and replies returned in the HTTP
+response (expectReplies) so no channel is needed. The client sends new
+conversations at a fixed rate, whether or not earlier requests have
+answered. Each conversation is a greeting then a booking request, which
+goes to LUIS. The client reports latencies of the accepted requests and of
+the 503s.
+
+    python -m benchmarks.load_messages --rate 400 --duration 10
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+import uuid
+from collections import Counter
+from http import HTTPStatus
+
+import aiohttp
+from aiohttp import web
+from botbuilder.core import (
+    BotFrameworkAdapterSettings,
+    ConversationState,
+    MemoryStorage,
+    UserState,
+)
+
+from adapter_with_error_handler import AdapterWithErrorHandler
+from bots import DialogAndWelcomeBot
+from config import DefaultConfig
+from dialogs import BookingDialog, MainDialog
+from flight_booking_recognizer import FlightBookingRecognizer
+from helpers.activity_decoder import decode_activity
+from helpers.admission import AdmissionController, admission_middleware
+from helpers.keyed_lock import KeyedLock
+from helpers.metrics import LatencyHistogram
+from tests.luis_stub import LuisStub
+
+UTTERANCE = "book a flight from lille to paris on 2023-01-01 for 1000 euros"
+
+
+async def serve(port: int, admission: bool, args) -> None:
+    stub = await LuisStub(delay=args.luis_delay).start()
+    config = DefaultConfig()
+    config.LUIS_APP_ID = str(uuid.uuid4())
+    config.LUIS_API_KEY = str(uuid.uuid4())
+    config.LUIS_API_HOST_NAME = stub.endpoint
+    config.LUIS_CLIENT = "native"
+    config.LUIS_CACHE_SIZE = 0
+
+    conversation_state = ConversationState(MemoryStorage())
+    adapter = AdapterWithErrorHandler(
+        BotFrameworkAdapterSettings("", ""), conversation_state, KeyedLock(15, 16)
+    )
+    dialog = MainDialog(FlightBookingRecognizer(config), BookingDialog())
+    bot = DialogAndWelcomeBot(conversation_state, UserState(MemoryStorage()), dialog, None)
+
+    async def messages(req: web.Request) -> web.Response:
+        activity = decode_activity(await req.read())
+        response = await adapter.process_activity(activity, "", bot.on_turn)
+        if response:
+            return web.json_response(data=response.body, status=response.status)
+        return web.Response(status=HTTPStatus.OK)
+
+    middlewares = []
+    if admission:
+        controller = AdmissionController(
+            args.max_concurrent, args.max_queue, args.max_wait, args.max_loop_lag
+        )
+        controller.start()
+        middlewares.append(admission_middleware(controller, ["/api/messages"]))
+    app = web.Application(middlewares=middlewares)
+    app.router.add_post("/api/messages", messages)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    while True:
+        await asyncio.sleep(3600)
+
+
+def serve_process(port: int, admission: bool, args) -> None:
+    asyncio.run(serve(port, admission, args))
+
+
+def message(index: int, turn: int, text: str) -> dict:
+    return {
+        "type": "message",
+        "id": f"{index}-{turn}",
+        "text": text,
+        "channelId": "load",
+        "serviceUrl": "http://127.0.0.1:1",
+        "deliveryMode": "expectReplies",
+        "conversation": {"id": f"conversation-{index}"},
+        "from": {"id": f"user-{index}"},
+        "recipient": {"id": "bot"},
+    }
+
+
+async def load(port: int, rate: float, duration: float):
+    accepted, shed = LatencyHistogram(), LatencyHistogram()
+    statuses = Counter()
+    url = f"http://127.0.0.1:{port}/api/messages"
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=60)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def turn(index: int, number: int, text: str):
+            start = time.perf_counter()
+            try:
+                async with session.post(url, json=message(index, number, text)) as response:
+                    await response.read()
+                    status = response.status
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                status = "error"
+            elapsed = time.perf_counter() - start
+            statuses[status] += 1
+            (accepted if status == HTTPStatus.OK else shed).observe(elapsed)
+            return status
+
+        async def one(index: int):
+            # The greeting gets the intro prompt, the request then goes to LUIS.
+            if await turn(index, 0, "hi") == HTTPStatus.OK:
+                await turn(index, 1, UTTERANCE)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        requests = []
+        for index in range(int(rate * duration)):
+            delay = started + index / rate - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            requests.append(asyncio.ensure_future(one(index)))
+        await asyncio.gather(*requests)
+    return accepted, shed, statuses
+
+
+async def wait_for_server(port: int) -> None:
+    for _ in range(200):
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise RuntimeError("server did not start")
+
+
+def run(name: str, port: int, admission: bool, args) -> None:
+    server = multiprocessing.Process(target=serve_process, args=(port, admission, args), daemon=True)
+    server.start()
+    try:
+        asyncio.run(wait_for_server(port))
+        accepted, shed, statuses = asyncio.run(load(port, args.rate, args.duration))
+    finally:
+        server.terminate()
+        server.join()
+
+    ok, rejected = accepted.snapshot, shed.snapshot
+    print(
+        f"{name:<13} ok {ok['count']:6}  p50 {ok['p50_ms']:7.0f} ms  p99 {ok['p99_ms']:7.0f} ms"
+        f"  max {ok['max_ms']:7.0f} ms | shed {rejected['count']:6}"
+        f"  p99 {rejected['p99_ms']:5.0f} ms  {dict(statuses)}"
+    )
+
+
+def main(args) -> None:
+    print(f"{args.rate:.0f} req/s for {args.duration:.0f}s, LUIS stub delay {args.luis_delay * 1000:.0f} ms")
+    run("no admission", args.port, False, args)
+    run("admission", args.port + 1, True, args)
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--rate", type=float, default=400)
+    PARSER.add_argument("--duration", type=float, default=10)
+    PARSER.add_argument("--luis-delay", type=float, default=0.02)
+    PARSER.add_argument("--max-concurrent", type=int, default=32)
+    PARSER.add_argument("--max-queue", type=int, default=64)
+    PARSER.add_argument("--max-wait", type=float, default=0.5)
+    PARSER.add_argument("--max-loop-lag", type=float, default=0.1)
+    PARSER.add_argument("--port", type=int, default=8060)
+    main(PARSER.parse_args())
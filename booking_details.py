@@ -2,7 +2,73 @@
 # Licensed under the MIT License.
 from __future__ import annotations
 
+import datetime
+import re
+import sys
+from functools import lru_cache
+
+from timex_values import date_ordinal
+
+# Version of the tuple BookingDetails pickles to. Bump it when the layout
+# changes and keep reading the older ones in __setstate__.
+COMPACT_VERSION = 1
+
+# Budget units as the dialogs write them ("1000 Euro", "1900 Dollars"), with
+# their ISO 4217 code. The tuple index is what the compact encoding stores.
+BUDGET_UNITS = (
+    "Euro", "Euros",
+    "Dollar", "Dollars", "United States dollar",
+    "Pound", "Pounds", "British pound",
+    "Yen", "Yens", "Japanese yen",
+)
+CURRENCY_CODES = {
+    "Euro": "EUR", "Euros": "EUR",
+    "Dollar": "USD", "Dollars": "USD", "United States dollar": "USD",
+    "Pound": "GBP", "Pounds": "GBP", "British pound": "GBP",
+    "Yen": "JPY", "Yens": "JPY", "Japanese yen": "JPY",
+}
+_UNIT_INDEX = {unit: index for index, unit in enumerate(BUDGET_UNITS)}
+_BUDGET = re.compile(r"([1-9]\d*) (.+)")
+
+
+def _intern(text: str):
+    return sys.intern(text) if isinstance(text, str) else text
+
+
+@lru_cache(maxsize=4096)
+def _iso_date(ordinal: int) -> str:
+    return datetime.date.fromordinal(ordinal).isoformat()
+
+
+def _encode_date(timex: str, ordinal: int):
+    """The ordinal alone when it gives back the timex, else the timex."""
+    if ordinal is not None and _iso_date(ordinal) == timex:
+        return ordinal
+    return timex
+
+
+@lru_cache(maxsize=4096)
+def _encode_budget(budget: str):
+    match = _BUDGET.fullmatch(budget) if isinstance(budget, str) else None
+    if match and match.group(2) in _UNIT_INDEX:
+        return int(match.group(1)), _UNIT_INDEX[match.group(2)]
+    return budget
+
+
 class BookingDetails:
+    __slots__ = (
+        "_destination",
+        "_origin",
+        "_start_date",
+        "start_ordinal",
+        "_end_date",
+        "end_ordinal",
+        "budget",
+        "unsupported_airports",
+        "geo_list",
+        "number_list",
+    )
+
     def __init__(
         self,
         destination: str = None,
@@ -11,8 +77,8 @@ class BookingDetails:
         end_date: str = None,
         budget: str = None,
         unsupported_airports: str = None,
-        geo_list: list[str] = [],
-        number_list : list[str] = []
+        geo_list: list[str] = None,
+        number_list : list[str] = None
     ):
         self.destination = destination
         self.origin = origin
@@ -20,5 +86,114 @@ class BookingDetails:
         self.end_date = end_date
         self.budget = budget
         self.unsupported_airports = unsupported_airports
-        self.geo_list = geo_list
+        self.geo_list = [_intern(city) for city in geo_list] if geo_list else []
+        self.number_list = list(number_list) if number_list else []
+
+    # City names repeat across conversations, so every copy shares one string.
+    @property
+    def destination(self) -> str:
+        return self._destination
+
+    @destination.setter
+    def destination(self, city: str):
+        self._destination = _intern(city)
+
+    @property
+    def origin(self) -> str:
+        return self._origin
+
+    @origin.setter
+    def origin(self, city: str):
+        self._origin = _intern(city)
+
+    # The dates are timex strings; their ordinals (None unless the timex is a
+    # definite day) are kept alongside so range checks are integer compares.
+    @property
+    def start_date(self) -> str:
+        return self._start_date
+
+    @start_date.setter
+    def start_date(self, timex: str):
+        self._start_date = timex
+        self.start_ordinal = date_ordinal(timex)
+
+    @property
+    def end_date(self) -> str:
+        return self._end_date
+
+    @end_date.setter
+    def end_date(self, timex: str):
+        self._end_date = timex
+        self.end_ordinal = date_ordinal(timex)
+
+    @property
+    def budget_amount(self) -> int:
+        encoded = _encode_budget(self.budget)
+        return encoded[0] if isinstance(encoded, tuple) else None
+
+    @property
+    def budget_currency(self) -> str:
+        """ISO 4217 code of the budget's currency, when it has a known one."""
+        encoded = _encode_budget(self.budget)
+        return CURRENCY_CODES[BUDGET_UNITS[encoded[1]]] if isinstance(encoded, tuple) else None
+
+    def __deepcopy__(self, memo):
+        # Everything but the two lists is immutable.
+        clone = memo[id(self)] = BookingDetails.__new__(BookingDetails)
+        for name in BookingDetails.__slots__:
+            setattr(clone, name, getattr(self, name))
+        clone.geo_list = list(self.geo_list)
+        clone.number_list = list(self.number_list)
+        return clone
+
+    def __getstate__(self):
+        return (
+            COMPACT_VERSION,
+            self._destination,
+            self._origin,
+            _encode_date(self._start_date, self.start_ordinal),
+            _encode_date(self._end_date, self.end_ordinal),
+            _encode_budget(self.budget),
+            self.unsupported_airports,
+            self.geo_list,
+            self.number_list,
+        )
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            # Pickled before BookingDetails had slots: a plain __dict__, with
+            # "_start_date"/"_end_date" once the ordinals were added.
+            self.__init__(
+                state.get("destination"),
+                state.get("origin"),
+                state.get("_start_date", state.get("start_date")),
+                state.get("_end_date", state.get("end_date")),
+                state.get("budget"),
+                state.get("unsupported_airports"),
+                state.get("geo_list"),
+                state.get("number_list"),
+            )
+            return
+
+        version = state[0]
+        if version != COMPACT_VERSION:
+            raise ValueError(f"Unknown BookingDetails encoding version: {version}")
+        _, destination, origin, start, end, budget, unsupported, geo_list, number_list = state
+        self._destination = _intern(destination)
+        self._origin = _intern(origin)
+        self._set_encoded_date("_start_date", "start_ordinal", start)
+        self._set_encoded_date("_end_date", "end_ordinal", end)
+        if isinstance(budget, tuple):
+            budget = f"{budget[0]} {BUDGET_UNITS[budget[1]]}"
+        self.budget = budget
+        self.unsupported_airports = unsupported
+        self.geo_list = [_intern(city) for city in geo_list]
         self.number_list = number_list
+
+    def _set_encoded_date(self, timex_slot: str, ordinal_slot: str, value) -> None:
+        if isinstance(value, int):
+            setattr(self, timex_slot, _iso_date(value))
+            setattr(self, ordinal_slot, value)
+        else:
+            setattr(self, timex_slot, value)
+            setattr(self, ordinal_slot, date_ordinal(value))
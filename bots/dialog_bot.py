@@ -12,6 +12,7 @@ from botbuilder.core import (
 )
 from botbuilder.dialogs import Dialog, DialogExtensions
 from helpers.dialog_helper import DialogHelper
+from helpers.metrics import ValueGauge
 
 
 class DialogBot(ActivityHandler):
@@ -37,18 +38,24 @@ class DialogBot(ActivityHandler):
         self.user_state = user_state
         self.dialog = dialog
         self.telemetry_client = telemetry_client
+        # Dialogs on the stack after each turn, nested ones included.
+        self.stack_depth = ValueGauge()
 
     async def on_message_activity(self, turn_context: TurnContext):
-        await DialogExtensions.run_dialog(
-            self.dialog,
-            turn_context,
-            self.conversation_state.create_property("DialogState"),
+        dialog_state = self.conversation_state.create_property("DialogState")
+        await DialogExtensions.run_dialog(self.dialog, turn_context, dialog_state)
+        self.stack_depth.observe(
+            DialogHelper.stack_depth(await dialog_state.get(turn_context))
         )
 
         # Save any state changes that might have occured during the turn.
         await self.conversation_state.save_changes(turn_context, False)
         await self.user_state.save_changes(turn_context, False)
 
+    @property
+    def stats(self) -> dict:
+        return {"stack_depth": self.stack_depth.snapshot}
+
     @property
     def telemetry_client(self) -> BotTelemetryClient:
         """
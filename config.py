@@ -21,7 +21,95 @@ class DefaultConfig:
     LUIS_APP_ID = os.environ.get("LuisAppId", "")
     LUIS_API_KEY = os.environ.get("LuisAPIKey", "")
     # LUIS endpoint host name, ie "westus.api.cognitive.microsoft.com"
+    # (a full "http://host:port" URL is used as is, e.g. for a local stub)
     LUIS_API_HOST_NAME = os.environ.get("LuisAPIHostName", "")
+    # LUIS prediction endpoint version, "v2" or "v3"
+    LUIS_PREDICTION_VERSION = os.environ.get("LuisPredictionVersion", "v2").lower()
+    # "botbuilder" uses the stock LuisRecognizer, "native" the pooled v3 LuisPredictionClient
+    LUIS_CLIENT = os.environ.get("LuisClient", "botbuilder").lower()
+    # Native client deadline per query (all retries included), in seconds
+    LUIS_TIMEOUT = float(os.environ.get("LuisTimeout", "3"))
+    LUIS_MAX_RETRIES = int(os.environ.get("LuisMaxRetries", "2"))
+    LUIS_RETRY_BACKOFF = float(os.environ.get("LuisRetryBackoff", "0.1"))
+    LUIS_POOL_SIZE = int(os.environ.get("LuisPoolSize", "100"))
+    # Published LUIS version, only used to namespace cached recognition results
+    LUIS_APP_VERSION = os.environ.get("LuisAppVersion", "")
+    # Recognition result cache, set the size to 0 to disable it
+    LUIS_CACHE_SIZE = int(os.environ.get("LuisCacheSize", "1024"))
+    LUIS_CACHE_TTL = float(os.environ.get("LuisCacheTtl", "300"))
+    LUIS_CACHE_NONE_TTL = float(os.environ.get("LuisCacheNoneTtl", "3600"))
+    # Use the offline gazetteer recognizer when LUIS is missing or failing
+    LUIS_OFFLINE_FALLBACK = os.environ.get("LuisOfflineFallback", "false").lower() == "true"
+    # "luis" sends every turn to LUIS, "hybrid" answers confident turns locally
+    RECOGNITION_MODE = os.environ.get("RecognitionMode", "luis").lower()
+    HYBRID_CONFIDENCE_THRESHOLD = float(os.environ.get("HybridConfidenceThreshold", "0.7"))
+    # Recognize every booking answer for all the missing slots with the
+    # gazetteer, skipping the prompts of the slots it fills
+    SLOT_FILLING = os.environ.get("SlotFilling", "false").lower() == "true"
+    # Where Recognizers-Text parsing runs: "inline", "thread" or "process"
+    PARSING_MODE = os.environ.get("ParsingMode", "thread").lower()
+    # Parsing pool size, 0 lets the executor pick
+    PARSING_WORKERS = int(os.environ.get("ParsingWorkers", "0"))
+    # Per-turn recognition budget in seconds, past it the booking dialog prompts slot by slot
+    RECOGNITION_TIMEOUT = float(os.environ.get("RecognitionTimeout", "5"))
+    # Send a typing indicator when recognition takes longer than this, in seconds
+    TYPING_DELAY = float(os.environ.get("TypingDelay", "0.5"))
+    # Skip LUIS for the cool-down (seconds) after this many consecutive timeouts
+    RECOGNITION_BREAKER_THRESHOLD = int(os.environ.get("RecognitionBreakerThreshold", "3"))
+    RECOGNITION_BREAKER_COOLDOWN = float(os.environ.get("RecognitionBreakerCooldown", "30"))
+    # Admission control on /api/messages: requests running at once, requests
+    # allowed to wait for a slot and for how long (seconds), and optionally
+    # how late the event loop may run (seconds, 0 for no limit) on
+    # AdmissionLagSamples samples in a row before every request is refused.
+    # The rest get a 503 with Retry-After (seconds)
+    ADMISSION_MAX_CONCURRENT = int(os.environ.get("AdmissionMaxConcurrent", "32"))
+    ADMISSION_MAX_QUEUE = int(os.environ.get("AdmissionMaxQueue", "64"))
+    ADMISSION_MAX_WAIT = float(os.environ.get("AdmissionMaxWait", "0.5"))
+    ADMISSION_MAX_LOOP_LAG = float(os.environ.get("AdmissionMaxLoopLag", "0")) or None
+    ADMISSION_LAG_SAMPLES = int(os.environ.get("AdmissionLagSamples", "3"))
+    ADMISSION_RETRY_AFTER = int(os.environ.get("AdmissionRetryAfter", "1"))
+    # Turns of one conversation run one at a time; a turn waiting longer than
+    # TurnQueueTimeout seconds, or behind TurnQueueMaxWaiters others, gets a 503
+    TURN_QUEUE_TIMEOUT = float(os.environ.get("TurnQueueTimeout", "15"))
+    TURN_QUEUE_MAX_WAITERS = int(os.environ.get("TurnQueueMaxWaiters", "16"))
+    # Bot state storage: "memory", "bounded" to forget idle conversations,
+    # "snapshot" for copy-on-write pickled state, or "sqlite" to keep state
+    # in StoragePath across restarts
+    STORAGE = os.environ.get("Storage", "memory").lower()
+    # Bounded storage: capacity, idle time-to-live and sweep period in seconds
+    STORAGE_MAX_ENTRIES = int(os.environ.get("StorageMaxEntries", "100000"))
+    STORAGE_TTL = float(os.environ.get("StorageTtl", "3600"))
+    STORAGE_SWEEP_INTERVAL = float(os.environ.get("StorageSweepInterval", "60"))
+    STORAGE_PATH = os.environ.get("StoragePath", "bot_state.db")
+    STORAGE_CACHE_SIZE = int(os.environ.get("StorageCacheSize", "10000"))
+    # Set when several processes open the same StoragePath
+    STORAGE_SHARED = os.environ.get("StorageShared", "false").lower() == "true"
+    # Inbound token validation: tokens that passed are remembered until they
+    # expire (AuthTokenCacheSize entries, 0 to validate every request), and
+    # the OpenID signing keys are refreshed in the background every
+    # AuthKeyRefreshInterval seconds
+    AUTH_TOKEN_CACHE_SIZE = int(os.environ.get("AuthTokenCacheSize", "10000"))
+    AUTH_KEY_REFRESH_INTERVAL = float(os.environ.get("AuthKeyRefreshInterval", "43200"))
+    # Replies: "pooled" posts them over keep-alive aiohttp connections per
+    # service URL host (OutboundPoolSize each, idle ones closed after
+    # OutboundKeepaliveTimeout seconds) with one app token shared by all
+    # clients and refreshed OutboundTokenRefreshMargin seconds before it
+    # expires; "botbuilder" keeps the stock connector clients
+    CONNECTOR_CLIENT = os.environ.get("ConnectorClient", "pooled").lower()
+    OUTBOUND_POOL_SIZE = int(os.environ.get("OutboundPoolSize", "100"))
+    OUTBOUND_KEEPALIVE_TIMEOUT = float(os.environ.get("OutboundKeepaliveTimeout", "60"))
+    OUTBOUND_TOKEN_REFRESH_MARGIN = float(os.environ.get("OutboundTokenRefreshMargin", "300"))
+    # Worker processes, 1 serves in-process
+    WORKERS = int(os.environ.get("Workers", "1"))
+    # How turns reach the workers: "affinity" hashes the conversation id to a
+    # worker behind a dispatcher on PORT, so in-memory state stays put;
+    # "reuseport" lets the kernel spread connections, and then needs
+    # Storage=sqlite with StorageShared
+    WORKER_DISPATCH = os.environ.get("WorkerDispatch", "affinity").lower()
+    # Run the event loop on uvloop, when it is installed
+    UVLOOP = os.environ.get("Uvloop", "false").lower() == "true"
+    # Seconds a stopping worker lets in-flight requests finish
+    SHUTDOWN_TIMEOUT = float(os.environ.get("ShutdownTimeout", "60"))
     APPINSIGHTS_INSTRUMENTATION_KEY = os.environ.get(
         "AppInsightsInstrumentationKey", ""
     )
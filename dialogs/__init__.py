@@ -6,5 +6,6 @@ from .cancel_and_help_dialog import CancelAndHelpDialog
 from .date_resolver_dialog import DateResolverDialog
 from .main_dialog import MainDialog
 from .budget_resolver_dialog import BudgetResolverDialog
+from .offloaded_datetime_prompt import OffloadedDateTimePrompt
 
-__all__ = ["BookingDialog", "BudgetResolverDialog", "CancelAndHelpDialog", "DateResolverDialog", "MainDialog"]
+__all__ = ["BookingDialog", "BudgetResolverDialog", "CancelAndHelpDialog", "DateResolverDialog", "MainDialog", "OffloadedDateTimePrompt"]
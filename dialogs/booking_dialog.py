@@ -2,11 +2,11 @@
 # Licensed under the MIT License.
 """Flight booking dialog."""
 
-from datatypes_date_time.timex import Timex
 
 from botbuilder.dialogs import (
     WaterfallDialog, 
     WaterfallStepContext, 
+    DialogContext,
     DialogTurnResult
 )
 from botbuilder.dialogs.prompts import (
@@ -19,7 +19,8 @@ from botbuilder.dialogs.prompts import (
 from botbuilder.core import (
     MessageFactory, 
     BotTelemetryClient, 
-    NullTelemetryClient
+    NullTelemetryClient,
+    Recognizer
 )
 
 from botbuilder.dialogs.choices import Choice
@@ -27,8 +28,10 @@ from botbuilder.dialogs.choices import Choice
 from .cancel_and_help_dialog import CancelAndHelpDialog
 from .date_resolver_dialog import DateResolverDialog
 from booking_details import BookingDetails
+from timex_values import date_range, is_definite
 from .budget_resolver_dialog import BudgetResolverDialog
-from botbuilder.schema import InputHints
+from botbuilder.schema import ActivityTypes, InputHints
+from helpers.date_parser import DATE_PARSER, date_range_timex
 
 
 import logging
@@ -47,15 +50,24 @@ logger.addHandler(AzureLogHandler(
 class BookingDialog(CancelAndHelpDialog):
     """Flight booking implementation."""
 
+    # Turn state slot listing the BookingDetails fields the slot filler set
+    # from this turn's answer, so the prompt steps do not overwrite them with
+    # the raw text.
+    FILLED_SLOTS = "BookingDialog.filled_slots"
+
     def __init__(
         self,
         dialog_id: str = None,
         telemetry_client: BotTelemetryClient = NullTelemetryClient(),
+        slot_recognizer: Recognizer = None,
     ):
         super(BookingDialog, self).__init__(
             dialog_id or BookingDialog.__name__, telemetry_client
         )
         self.telemetry_client = telemetry_client
+        # When set, every answer is recognized for all the missing slots,
+        # whatever was asked, and the steps of the slots it fills are skipped.
+        self._slot_recognizer = slot_recognizer
         text_prompt = TextPrompt(TextPrompt.__name__)
         text_prompt.telemetry_client = telemetry_client
 
@@ -139,7 +151,8 @@ class BookingDialog(CancelAndHelpDialog):
         # Capture the response to the previous step's prompt
         # if already captured in luis or manually then it is in string
         if type(step_context.result) == str:
-            booking_details.destination = step_context.result
+            if not self.filled_this_turn(step_context, "destination"):
+                booking_details.destination = step_context.result
 
         else:
             # if not, it is coming from choice
@@ -158,7 +171,8 @@ class BookingDialog(CancelAndHelpDialog):
     async def origin_step(self, step_context: WaterfallStepContext) -> DialogTurnResult:
         """Prompt for origin city."""
         booking_details = step_context.options
-        booking_details.destination = step_context.result
+        if not self.filled_this_turn(step_context, "destination"):
+            booking_details.destination = step_context.result
         if booking_details.origin is None:
             if len(booking_details.geo_list) > 0:
                 listofchoice = []
@@ -188,7 +202,8 @@ class BookingDialog(CancelAndHelpDialog):
         # Capture the response to the previous step's prompt
         # if already captured in luis or manually then it is in string
         if type(step_context.result) == str:
-            booking_details.origin = step_context.result
+            if not self.filled_this_turn(step_context, "origin"):
+                booking_details.origin = step_context.result
 
         else:
             # if not, it is coming from choice
@@ -205,7 +220,8 @@ class BookingDialog(CancelAndHelpDialog):
 
     async def dest_ori_identical(self, step_context: WaterfallStepContext) -> DialogTurnResult:
         booking_details = step_context.options
-        booking_details.origin = step_context.result
+        if not self.filled_this_turn(step_context, "origin"):
+            booking_details.origin = step_context.result
         if booking_details.destination == booking_details.origin:
             msg = (
                 f"I have understood you want to travel to : {booking_details.destination} "
@@ -247,7 +263,9 @@ class BookingDialog(CancelAndHelpDialog):
             booking_details.destination = None
             booking_details.origin = None
 
-            return await step_context.begin_dialog(BookingDialog.__name__, booking_details)
+            # Start over in place: beginning BookingDialog again would nest a
+            # new copy on the stack for every rejection.
+            return await step_context.replace_dialog(self.initial_dialog_id, booking_details)
 
     
     # ADd end_date_step
@@ -349,5 +367,69 @@ class BookingDialog(CancelAndHelpDialog):
 
     def is_ambiguous(self, timex: str) -> bool:
         """Ensure time is correct."""
-        timex_property = Timex(timex)
-        return "definite" not in timex_property.types
+        return not is_definite(timex)
+
+    async def on_continue_dialog(self, inner_dc: DialogContext) -> DialogTurnResult:
+        if self._slot_recognizer is not None:
+            await self.fill_slots(inner_dc)
+        return await super(BookingDialog, self).on_continue_dialog(inner_dc)
+
+    async def fill_slots(self, inner_dc: DialogContext) -> None:
+        """Fill every missing slot the user's answer mentions, whichever prompt it answers."""
+        context = inner_dc.context
+        if context.activity.type != ActivityTypes.message or not context.activity.text:
+            return
+        waterfall = next(
+            (instance for instance in inner_dc.stack if instance.id == self.initial_dialog_id),
+            None,
+        )
+        if waterfall is None:
+            return
+        booking_details = waterfall.state["options"]
+
+        entities = (await self._slot_recognizer.recognize(context)).entities
+        filled = []
+
+        for slot, entity in (("destination", "dst_city"), ("origin", "or_city")):
+            values = entities.get(entity)
+            if getattr(booking_details, slot) is None and values and values[0]:
+                setattr(booking_details, slot, values[0].capitalize())
+                filled.append(slot)
+
+        for slot, entity in (("start_date", "str_date"), ("end_date", "end_date")):
+            values = entities.get(entity)
+            if is_definite(getattr(booking_details, slot)) or not values or not values[0]:
+                continue
+            for date_slot, timex in (await self.resolve_dates(values[0], slot)).items():
+                if not is_definite(getattr(booking_details, date_slot)):
+                    setattr(booking_details, date_slot, timex)
+                    filled.append(date_slot)
+
+        # Kept as typed: BudgetResolverDialog reads the currency out of it.
+        values = entities.get("budget")
+        if booking_details.budget is None and values and values[0]:
+            booking_details.budget = values[0]
+            filled.append("budget")
+
+        context.turn_state[BookingDialog.FILLED_SLOTS] = filled
+
+    @staticmethod
+    async def resolve_dates(text: str, slot: str) -> dict:
+        """{slot: timex} of the definite date in the text; a range gives both trip dates."""
+        recog_date = await DATE_PARSER.parse(text)
+        range_timex = date_range_timex(recog_date)
+        if range_timex:
+            return dict(zip(("start_date", "end_date"), date_range(range_timex)))
+        timex = next(
+            (
+                resolution["timex"]
+                for resolution in (recog_date[0].resolution["values"] if recog_date else ())
+                if "timex" in resolution
+            ),
+            None,
+        )
+        return {slot: timex} if is_definite(timex) else {}
+
+    @staticmethod
+    def filled_this_turn(step_context: WaterfallStepContext, slot: str) -> bool:
+        return slot in step_context.context.turn_state.get(BookingDialog.FILLED_SLOTS, ())
@@ -1,6 +1,8 @@
 """Handle budget resolution for booking dialog."""
 
-from botbuilder.core import MessageFactory, BotTelemetryClient, NullTelemetryClient
+from typing import List
+
+from botbuilder.core import MessageFactory, BotTelemetryClient, NullTelemetryClient, TurnContext
 from botbuilder.dialogs import WaterfallDialog, DialogTurnResult, WaterfallStepContext
 from botbuilder.dialogs.prompts import (
     TextPrompt,
@@ -13,16 +15,20 @@ from botbuilder.dialogs.prompts import (
 )
 
 from botbuilder.dialogs.choices import Choice
+from recognizers_text import Culture
 
 from .cancel_and_help_dialog import CancelAndHelpDialog
 
-from recognizers_number_with_unit import NumberWithUnitRecognizer
-from recognizers_text import Culture
-from recognizers_number import NumberRecognizer
+from helpers.budget_parser import BUDGET_PARSER
+from helpers.parsing_service import ParseResult
 
 class BudgetResolverDialog(CancelAndHelpDialog):
     """Resolve the budget"""
 
+    # Turn state slot holding the last (text, results) parse, so the
+    # validator and currency_step do not parse the same answer twice.
+    PARSED_BUDGET = "BudgetResolverDialog.parsed_budget"
+
     def __init__(
         self,
         dialog_id: str = None,
@@ -118,9 +124,9 @@ class BudgetResolverDialog(CancelAndHelpDialog):
     ) -> DialogTurnResult:
         booking_details = step_context.options
         booking_details.budget = step_context.result
-        cur_obj = NumberWithUnitRecognizer(Culture.English)
-        cur_model = cur_obj.get_currency_model()
-        recog_currency = cur_model.parse(booking_details.budget)
+        recog_currency = await BudgetResolverDialog.parse_budget(
+            step_context.context, booking_details.budget
+        )
         if len(recog_currency) > 0:
             if recog_currency[0].resolution is not None:
                 booking_details.budget = f"{recog_currency[0].resolution['value']} {recog_currency[0].resolution['unit']}"
@@ -149,12 +155,18 @@ class BudgetResolverDialog(CancelAndHelpDialog):
             booking_details.budget = booking_details.budget + " " + step_context.result.value + "s"
         return await step_context.end_dialog(booking_details.budget)   
 
-
-
-
-    
-
-
+    @staticmethod
+    async def parse_budget(turn_context: TurnContext, text: str) -> List[ParseResult]:
+        """ Parse the budget once per turn and text. """
+        parsed = turn_context.turn_state.get(BudgetResolverDialog.PARSED_BUDGET)
+        if parsed is not None and parsed[0] == text:
+            return parsed[1]
+
+        results = await BUDGET_PARSER.parse(
+            text, turn_context.activity.locale or Culture.English
+        )
+        turn_context.turn_state[BudgetResolverDialog.PARSED_BUDGET] = (text, results)
+        return results
 
     @staticmethod
     async def budget_prompt_validator(prompt_context: PromptValidatorContext) -> bool:
@@ -164,11 +176,11 @@ class BudgetResolverDialog(CancelAndHelpDialog):
             return False
         else:
             value = prompt_context.recognized.value
-            bud_obj = NumberWithUnitRecognizer(Culture.English)
-            bud_model = bud_obj.get_currency_model()
-            recog_budget = bud_model.parse(value)
+            recog_budget = await BudgetResolverDialog.parse_budget(
+                prompt_context.context, value
+            )
             if len(recog_budget) > 0:
-                if int(recog_budget[0].resolution["value"]) > 0:
+                if float(recog_budget[0].resolution["value"]) > 0:
                     return True
         await prompt_context.context.send_activity("Please enter a valid budget including currency")
         return False
@@ -2,8 +2,6 @@
 # Licensed under the MIT License.
 """Handle date/time resolution for booking dialog."""
 
-from datatypes_date_time.timex import Timex
-
 from botbuilder.core import MessageFactory, BotTelemetryClient, NullTelemetryClient
 from botbuilder.dialogs import WaterfallDialog, DialogTurnResult, WaterfallStepContext
 from botbuilder.dialogs.prompts import (
@@ -14,6 +12,8 @@ from botbuilder.dialogs.prompts import (
     ConfirmPrompt
 )
 from .cancel_and_help_dialog import CancelAndHelpDialog
+from .offloaded_datetime_prompt import OffloadedDateTimePrompt
+from timex_values import date_range, is_definite
 
 
 class DateResolverDialog(CancelAndHelpDialog):
@@ -29,7 +29,7 @@ class DateResolverDialog(CancelAndHelpDialog):
         )
         self.telemetry_client = telemetry_client
 
-        date_time_prompt = DateTimePrompt(
+        date_time_prompt = OffloadedDateTimePrompt(
             DateTimePrompt.__name__, DateResolverDialog.datetime_prompt_validator
         )
         date_time_prompt.telemetry_client = telemetry_client
@@ -78,21 +78,15 @@ class DateResolverDialog(CancelAndHelpDialog):
                 ),
             )
 
-        # We have a Date we just need to check it is unambiguous.
-        if "definite" in Timex(booking_details.start_date).types:
-            # This is essentially a "reprompt" of the data we were given up front.
-            return await step_context.prompt(
-                DateTimePrompt.__name__, PromptOptions(prompt=reprompt_msg)
-            )
-
-        return await step_context.next(DateTimeResolution(timex=booking_details.start_date))
+        # Already definite: pass it on in the shape the prompt would return.
+        return await step_context.next([DateTimeResolution(timex=booking_details.start_date)])
 
     async def end_date_step(
         self, step_context: WaterfallStepContext
     ) -> DialogTurnResult:
         """Prompt for the date."""
         booking_details = step_context.options
-        booking_details.start_date = step_context.result[0].timex
+        self.store_answer(booking_details, step_context.result[0].timex, "start_date")
         
         reprompt_msg = (
                 "I'm sorry, for best results, please enter your travel "
@@ -114,21 +108,14 @@ class DateResolverDialog(CancelAndHelpDialog):
                 ),
             )
 
-        # We have a Date we just need to check it is unambiguous.
-        if "definite" in Timex(booking_details.end_date).types:
-            # This is essentially a "reprompt" of the data we were given up front.
-            return await step_context.prompt(
-                DateTimePrompt.__name__, PromptOptions(MessageFactory.text(reprompt_msg))
-            )
-
-        return await step_context.next(DateTimeResolution(timex=booking_details.end_date))
+        return await step_context.next([DateTimeResolution(timex=booking_details.end_date)])
 
     async def verification_step(self, step_context: WaterfallStepContext):
         """Cleanup - set final return value and end dialog."""
         booking_details = step_context.options
-        booking_details.end_date = step_context.result[0].timex
+        self.store_answer(booking_details, step_context.result[0].timex, "end_date")
 
-        if booking_details.start_date > booking_details.end_date:
+        if self.is_reversed(booking_details):
             msg = (
                 f"You have indicated wanting to start your on travel on : {booking_details.start_date} "
                 f"which is after your return date requested on : {booking_details.start_date} "
@@ -153,20 +140,39 @@ class DateResolverDialog(CancelAndHelpDialog):
             booking_details = step_context.options
             booking_details.start_date = None
             booking_details.end_date = None
-            return await step_context.begin_dialog(DateResolverDialog.__name__, booking_details)
+            # Restart the waterfall rather than nesting another DateResolverDialog.
+            return await step_context.replace_dialog(self.initial_dialog_id, booking_details)
 
     def is_ambiguous(self, timex: str) -> bool:
         """Ensure time is correct."""
-        timex_property = Timex(timex)
-        return "definite" not in timex_property.types
+        return not is_definite(timex)
+
+    @staticmethod
+    def store_answer(booking_details, timex: str, slot: str) -> None:
+        """Store a date answer; a range answer gives both dates at once."""
+        dates = date_range(timex)
+        if dates:
+            booking_details.start_date, booking_details.end_date = dates
+        else:
+            setattr(booking_details, slot, timex)
+
+    @staticmethod
+    def is_reversed(booking_details) -> bool:
+        """Whether the return date comes before the start date."""
+        if booking_details.start_ordinal is not None and booking_details.end_ordinal is not None:
+            return booking_details.start_ordinal > booking_details.end_ordinal
+        # Timex strings of anything but definite dates only compare as text.
+        return booking_details.start_date > booking_details.end_date
 
     @staticmethod
     async def datetime_prompt_validator(prompt_context: PromptValidatorContext) -> bool:
         """ Validate the date provided is in proper form. """
         if prompt_context.recognized.succeeded:
             timex = prompt_context.recognized.value[0].timex.split("T")[0]
+            if timex.startswith("("):
+                # A range is only usable when both its ends are definite days.
+                return date_range(timex) is not None
 
-            # TODO: Needs TimexProperty
-            return "definite" in Timex(timex).types
+            return is_definite(timex)
 
         return False
@@ -1,6 +1,9 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
 
+import asyncio
+import logging
+
 from botbuilder.dialogs import (
     ComponentDialog,
     WaterfallDialog,
@@ -14,13 +17,16 @@ from botbuilder.core import (
     BotTelemetryClient,
     NullTelemetryClient,
 )
-from botbuilder.schema import InputHints
+from botbuilder.schema import Activity, ActivityTypes, InputHints
 
 from booking_details import BookingDetails
 from flight_booking_recognizer import FlightBookingRecognizer
+from helpers.circuit_breaker import CircuitBreaker
 from helpers.luis_helper import LuisHelper, Intent
 from .booking_dialog import BookingDialog
 
+logger = logging.getLogger(__name__)
+
 
 class MainDialog(ComponentDialog):
     def __init__(
@@ -28,10 +34,19 @@ class MainDialog(ComponentDialog):
         luis_recognizer: FlightBookingRecognizer,
         booking_dialog: BookingDialog,
         telemetry_client: BotTelemetryClient = None,
+        recognition_timeout: float = None,
+        typing_delay: float = None,
+        circuit_breaker: CircuitBreaker = None,
     ):
         super(MainDialog, self).__init__(MainDialog.__name__)
         self.telemetry_client = telemetry_client or NullTelemetryClient()
 
+        # Per-turn recognition budget in seconds, None waits for LUIS however long it takes
+        self._recognition_timeout = recognition_timeout
+        # Delay before a typing indicator is sent while recognition is pending, None disables it
+        self._typing_delay = typing_delay
+        self._circuit_breaker = circuit_breaker
+
         text_prompt = TextPrompt(TextPrompt.__name__)
         text_prompt.telemetry_client = self.telemetry_client
 
@@ -82,10 +97,30 @@ class MainDialog(ComponentDialog):
                 self._booking_dialog_id, BookingDetails()
             )
 
+        if self._circuit_breaker and not self._circuit_breaker.allow():
+            # LUIS kept timing out recently, prompt for every slot instead of waiting on it again.
+            return await step_context.begin_dialog(
+                self._booking_dialog_id, BookingDetails()
+            )
+
         # Call LUIS and gather any potential booking details. (Note the TurnContext has the response to the prompt.)
-        intent, luis_result = await LuisHelper.execute_luis_query(
-            self._luis_recognizer, step_context.context
-        )
+        try:
+            intent, luis_result = await self._recognize_within_budget(
+                step_context.context
+            )
+        except Exception as exception:
+            if self._circuit_breaker:
+                self._circuit_breaker.record_failure()
+            # Recognition is too slow or failed, fall back to prompting slot by slot.
+            logger.warning(
+                "Recognition failed, prompting for every slot: %r", exception
+            )
+            return await step_context.begin_dialog(
+                self._booking_dialog_id, BookingDetails()
+            )
+
+        if self._circuit_breaker:
+            self._circuit_breaker.record_success()
 
         if intent == Intent.BOOK_FLIGHT.value and luis_result:
             # Show a warning for Origin and Destination if we can't resolve them.
@@ -135,6 +170,31 @@ class MainDialog(ComponentDialog):
         prompt_message = "What else can I do for you?"
         return await step_context.replace_dialog(self.id, prompt_message)
 
+    async def _recognize_within_budget(self, context: TurnContext):
+        """
+        Run the LUIS query within the per-turn budget, sending a typing indicator if it is slow.
+        Raises asyncio.TimeoutError once the budget is exhausted, and the recognizer's own errors.
+        """
+        recognition = asyncio.ensure_future(
+            LuisHelper.execute_luis_query(self._luis_recognizer, context)
+        )
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        if self._typing_delay is not None:
+            first_wait = self._typing_delay
+            if self._recognition_timeout is not None:
+                first_wait = min(first_wait, self._recognition_timeout)
+            done, _ = await asyncio.wait({recognition}, timeout=first_wait)
+            if not done:
+                await context.send_activity(Activity(type=ActivityTypes.typing))
+
+        if self._recognition_timeout is None:
+            return await recognition
+
+        remaining = self._recognition_timeout - (loop.time() - started)
+        return await asyncio.wait_for(recognition, max(remaining, 0))
+
     @staticmethod
     async def _show_warning_for_unsupported_cities(
         context: TurnContext, luis_result: BookingDetails
@@ -0,0 +1,60 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""DateTimePrompt recognizing through the date fast path and the shared parsing service."""
+
+from typing import Dict
+
+from botbuilder.core import TurnContext
+from botbuilder.dialogs.prompts import (
+    DateTimePrompt,
+    DateTimeResolution,
+    PromptOptions,
+    PromptRecognizerResult,
+)
+from botbuilder.schema import ActivityTypes
+from recognizers_text import Culture
+
+from helpers.date_parser import DATE_PARSER, date_range_timex
+from timex_values import date_range
+
+
+class OffloadedDateTimePrompt(DateTimePrompt):
+    """
+    Same recognition as DateTimePrompt, but plain dates are resolved by the
+    DATE_PARSER fast path and everything else runs on the shared datetime
+    model through PARSING_SERVICE instead of blocking the event loop.
+    """
+
+    async def on_recognize(
+        self,
+        turn_context: TurnContext,
+        state: Dict[str, object],
+        options: PromptOptions,
+    ) -> PromptRecognizerResult:
+        if not turn_context:
+            raise TypeError(
+                "OffloadedDateTimePrompt.on_recognize(): turn_context cannot be None."
+            )
+
+        result = PromptRecognizerResult()
+        if turn_context.activity.type == ActivityTypes.message:
+            utterance = turn_context.activity.text
+            if not utterance:
+                return result
+            culture = turn_context.activity.locale or self.default_locale or Culture.English
+
+            results = await DATE_PARSER.parse(utterance, culture)
+            range_timex = date_range_timex(results)
+            if range_timex:
+                # Both trip dates in one answer, possibly split over two results.
+                start, end = date_range(range_timex)
+                result.succeeded = True
+                result.value = [DateTimeResolution(timex=range_timex, start=start, end=end)]
+            elif results:
+                result.succeeded = True
+                result.value = [
+                    self.read_resolution(value)
+                    for value in results[0].resolution["values"]
+                ]
+
+        return result
@@ -1,7 +1,17 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
 
-from botbuilder.ai.luis import LuisApplication, LuisRecognizer, LuisPredictionOptions
+import copy
+import logging
+import time
+from collections import Counter
+
+from botbuilder.ai.luis import (
+    LuisApplication,
+    LuisRecognizer,
+    LuisPredictionOptions,
+    LuisRecognizerOptionsV3,
+)
 from botbuilder.core import (
     Recognizer,
     RecognizerResult,
@@ -11,39 +21,189 @@ from botbuilder.core import (
 )
 
 from config import DefaultConfig
+from gazetteer_recognizer import GazetteerRecognizer
+from luis_prediction_client import LuisPredictionClient
+from helpers.metrics import LatencyHistogram
+from helpers.recognition_cache import RecognitionCache
+from helpers.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class RecognitionMode:
+    # Every turn goes to LUIS (through the cache).
+    LUIS = "luis"
+    # The local recognizer answers when it is confident enough, LUIS otherwise.
+    HYBRID = "hybrid"
+
+
+class RecognitionPath:
+    LOCAL = "local"
+    CACHE = "cache"
+    COALESCED = "coalesced"
+    LUIS = "luis"
+    FALLBACK = "fallback"
 
 
 class FlightBookingRecognizer(Recognizer):
     def __init__(
-        self, configuration: DefaultConfig, telemetry_client: BotTelemetryClient = None
+        self,
+        configuration: DefaultConfig,
+        telemetry_client: BotTelemetryClient = None,
+        fallback_recognizer: Recognizer = None,
+        local_recognizer: GazetteerRecognizer = None,
     ):
         self._recognizer = None
+        self._fallback_recognizer = fallback_recognizer
+        self._cache = None
+        self._single_flight = SingleFlight()
+        self._app_id = configuration.LUIS_APP_ID
+        self._app_version = configuration.LUIS_APP_VERSION
+
+        self._mode = configuration.RECOGNITION_MODE
+        self._confidence_threshold = configuration.HYBRID_CONFIDENCE_THRESHOLD
+        self._local_recognizer = None
+        if self._mode == RecognitionMode.HYBRID:
+            self._local_recognizer = local_recognizer or GazetteerRecognizer()
+
+        self.path_counts = Counter()
+        self.path_latency = {}
 
         luis_is_configured = (
             configuration.LUIS_APP_ID
             and configuration.LUIS_API_KEY
             and configuration.LUIS_API_HOST_NAME
         )
-        if luis_is_configured:
+        if luis_is_configured and configuration.LUIS_CLIENT == "native":
+            self._recognizer = LuisPredictionClient(configuration)
+        elif luis_is_configured:
             # Set the recognizer options depending on which endpoint version you want to use e.g v2 or v3.
             # More details can be found in https://docs.microsoft.com/azure/cognitive-services/luis/luis-migration-api-v3
+            endpoint = configuration.LUIS_API_HOST_NAME
+            if "://" not in endpoint:
+                endpoint = "https://" + endpoint
             luis_application = LuisApplication(
                 configuration.LUIS_APP_ID,
                 configuration.LUIS_API_KEY,
-                "https://" + configuration.LUIS_API_HOST_NAME,
+                endpoint,
             )
 
-            options = LuisPredictionOptions()
+            if configuration.LUIS_PREDICTION_VERSION == "v3":
+                options = LuisRecognizerOptionsV3()
+            else:
+                options = LuisPredictionOptions()
             options.telemetry_client = telemetry_client or NullTelemetryClient()
 
             self._recognizer = LuisRecognizer(
                 luis_application, prediction_options=options
             )
 
+        if luis_is_configured and configuration.LUIS_CACHE_SIZE > 0:
+            self._cache = RecognitionCache(
+                configuration.LUIS_CACHE_SIZE,
+                configuration.LUIS_CACHE_TTL,
+                configuration.LUIS_CACHE_NONE_TTL,
+            )
+
     @property
     def is_configured(self) -> bool:
-        # Returns true if luis is configured in the config.py and initialized.
-        return self._recognizer is not None
+        # Returns true if luis is configured in the config.py and initialized,
+        # or if an offline recognizer can answer in its place.
+        return (
+            self._recognizer is not None
+            or self._fallback_recognizer is not None
+            or self._local_recognizer is not None
+        )
+
+    @property
+    def cache(self) -> RecognitionCache:
+        # Recognition result cache, None when disabled.
+        return self._cache
+
+    @property
+    def single_flight(self) -> SingleFlight:
+        # Coalesces identical LUIS queries that are in flight at the same time.
+        return self._single_flight
+
+    @property
+    def stats(self) -> dict:
+        """Turns per recognition path, the share the local fast path took and latencies."""
+        total = sum(self.path_counts.values())
+        return {
+            "mode": self._mode,
+            "paths": dict(self.path_counts),
+            "fast_path_ratio": (
+                self.path_counts[RecognitionPath.LOCAL] / total if total else 0.0
+            ),
+            "latency": {
+                path: histogram.snapshot for path, histogram in self.path_latency.items()
+            },
+            "cache": self._cache.stats if self._cache else None,
+            "single_flight": self._single_flight.stats,
+            "client": (
+                self._recognizer.stats
+                if isinstance(self._recognizer, LuisPredictionClient)
+                else None
+            ),
+        }
 
     async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
-        return await self._recognizer.recognize(turn_context)
+        start = time.perf_counter()
+        path, result = await self._recognize(turn_context)
+
+        self.path_counts[path] += 1
+        if path not in self.path_latency:
+            self.path_latency[path] = LatencyHistogram()
+        self.path_latency[path].observe(time.perf_counter() - start)
+        return result
+
+    async def _recognize(self, turn_context: TurnContext):
+        if self._local_recognizer is not None:
+            result = self._local_recognizer.recognize_text(turn_context.activity.text)
+            if self._is_confident(result):
+                return RecognitionPath.LOCAL, result
+
+        if self._recognizer is None:
+            fallback_recognizer = self._fallback_recognizer or self._local_recognizer
+            return RecognitionPath.FALLBACK, await fallback_recognizer.recognize(
+                turn_context
+            )
+
+        try:
+            return await self._recognize_with_luis(turn_context)
+        except Exception as exception:
+            if self._fallback_recognizer is None:
+                raise
+            logger.warning(
+                "LUIS recognition failed, using the offline recognizer: %s", exception
+            )
+            return RecognitionPath.FALLBACK, await self._fallback_recognizer.recognize(
+                turn_context
+            )
+
+    async def _recognize_with_luis(self, turn_context: TurnContext):
+        key = RecognitionCache.make_key(
+            self._app_id, self._app_version, turn_context.activity.text
+        )
+        if self._cache is not None:
+            result = self._cache.get(key)
+            if result is not None:
+                return RecognitionPath.CACHE, result
+
+        # Identical utterances already being sent to LUIS share that request.
+        result, shared = await self._single_flight.do(
+            key, lambda: self._recognizer.recognize(turn_context)
+        )
+        if shared:
+            # Callers may mutate the result, give each waiter its own copy.
+            return RecognitionPath.COALESCED, copy.deepcopy(result)
+
+        if self._cache is not None:
+            self._cache.put(key, result)
+        return RecognitionPath.LUIS, result
+
+    def _is_confident(self, result: RecognizerResult) -> bool:
+        if not result.intents:
+            return False
+        top_score = max(intent.score for intent in result.intents.values())
+        return top_score >= self._confidence_threshold
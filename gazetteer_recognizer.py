@@ -0,0 +1,278 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Offline flight booking recognizer built from data/extract_frames.json."""
+
+import json
+import re
+from collections import Counter, defaultdict, deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from botbuilder.core import IntentScore, Recognizer, RecognizerResult, TurnContext
+
+BASE_DIR = Path(__file__).resolve(strict=True).parent
+FRAMES_FILE = BASE_DIR / "data" / "extract_frames.json"
+
+BOOK_FLIGHT = "BookFlight"
+NONE_INTENT = "None"
+
+# A city has to be labelled this often to make it into the gazetteer,
+# which keeps one-off typos and free text ("nearby city") out of it.
+MIN_CITY_COUNT = 2
+MIN_CITY_LENGTH = 3
+NOT_CITIES = {"europe", "asian", "disneyland", "nearby city", "further south"}
+
+# A word preceding a labelled city becomes a cue for that role when it is
+# seen often enough and points at the same role most of the time.
+MIN_CUE_COUNT = 20
+MIN_CUE_RATIO = 0.7
+
+# Explicit cue rules, always applied on top of the learned ones.
+ORIGIN_CUES = {"from", "leaving", "leave", "departing"}
+DESTINATION_CUES = {"to", "visit", "into"}
+
+# How much each clue adds to the BookFlight confidence. A booking keyword or a
+# city with a role cue is enough on its own to call the intent BookFlight.
+WEIGHT_KEYWORD = 0.4
+WEIGHT_CUED_CITY = 0.3
+WEIGHT_CITY = 0.1
+WEIGHT_DATE = 0.15
+WEIGHT_BUDGET = 0.15
+MIN_BOOKING_EVIDENCE = 0.3
+
+BOOKING_KEYWORDS = re.compile(
+    r"\b(book|booking|flight|flights|fly|flying|trip|travel|travelling|traveling"
+    r"|ticket|tickets|vacation|holiday|getaway|go to|going to|leave|leaving)\b"
+)
+
+_MONTHS = (
+    r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?"
+    r"|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+)
+_WEEKDAYS = r"(?:mon|tues|wednes|thurs|fri|satur|sun)day"
+DATE_PATTERN = re.compile(
+    rf"\b(?:(?:{_WEEKDAYS}),?\s+)?"
+    rf"(?:(?:{_MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,?\s+\d{{4}})?"
+    rf"|\d{{1,2}}(?:st|nd|rd|th)?\s+(?:of\s+)?(?:{_MONTHS})(?:,?\s+\d{{4}})?"
+    rf"|\d{{4}}-\d{{1,2}}-\d{{1,2}}"
+    rf"|\d{{1,2}}[-/]\d{{1,2}}[-/]\d{{4}})\b"
+)
+END_DATE_CUE = re.compile(r"\b(?:to|until|till|and|returning(?: on)?|back on|return on)\s*$")
+
+CURRENCY_AMOUNT_PATTERN = re.compile(
+    r"\$\s?\d[\d,]*(?:\.\d+)?"
+    r"|\b\d[\d,]*(?:\.\d+)?\s?(?:\$|usd\b|dollars?\b|bucks\b|euros?\b|eur\b|pounds?\b|gbp\b|yen\b)"
+)
+BUDGET_CUE_PATTERN = re.compile(
+    r"\bbudget (?:of |is |would be |will be |to |: )?(\$?\d[\d,]*(?:\.\d+)?)"
+)
+NUMBER_PATTERN = re.compile(r"\b\d[\d,]*(?:\.\d+)?\b")
+
+
+class AhoCorasick:
+    """Character automaton matching every gazetteer entry in one pass over the text."""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+
+    def add(self, word: str) -> None:
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(word)
+
+    def build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for word in self._output[state]:
+                yield index + 1 - len(word), index + 1, word
+
+
+class Gazetteer:
+    """City automaton plus the role cues learned from the labelled frames."""
+
+    def __init__(self, cities: List[str], cues: Dict[str, str]):
+        self.cities = set(cities)
+        self.cues = cues
+        self._automaton = AhoCorasick()
+        for city in self.cities:
+            self._automaton.add(city)
+        self._automaton.build()
+
+    @classmethod
+    def from_frames(cls, frames: List[dict]) -> "Gazetteer":
+        city_counts = Counter()
+        cue_counts = defaultdict(Counter)
+        for frame in frames:
+            text = frame["text"]
+            for entity in frame["entities"]:
+                role = entity["entity"]
+                if role not in ("or_city", "dst_city"):
+                    continue
+                city = text[entity["startPos"]:entity["endPos"]].strip(" ,.")
+                city_counts[city] += 1
+                previous = text[:entity["startPos"]].split()[-1:]
+                if previous:
+                    cue_counts[previous[0]][role] += 1
+
+        cities = [
+            city
+            for city, count in city_counts.items()
+            if count >= MIN_CITY_COUNT
+            and len(city) >= MIN_CITY_LENGTH
+            and city not in NOT_CITIES
+            and re.fullmatch(r"[a-z][a-z .'-]*", city)
+        ]
+
+        cues = {}
+        for word, roles in cue_counts.items():
+            role, count = roles.most_common(1)[0]
+            total = sum(roles.values())
+            if total >= MIN_CUE_COUNT and count / total >= MIN_CUE_RATIO:
+                cues[word] = role
+        cues.update({word: "or_city" for word in ORIGIN_CUES})
+        cues.update({word: "dst_city" for word in DESTINATION_CUES})
+
+        return cls(cities, cues)
+
+    def find_cities(self, text: str) -> List[Tuple[int, int, str]]:
+        """Leftmost-longest, whole-word city matches."""
+        candidates = sorted(
+            (
+                match
+                for match in self._automaton.iter_matches(text)
+                if _is_word_boundary(text, match[0], match[1])
+            ),
+            key=lambda match: (match[0], -match[1]),
+        )
+        matches = []
+        last_end = -1
+        for start, end, city in candidates:
+            if start >= last_end:
+                matches.append((start, end, city))
+                last_end = end
+        return matches
+
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+@lru_cache(maxsize=None)
+def load_gazetteer(path: str = str(FRAMES_FILE)) -> Gazetteer:
+    """Build the gazetteer once per process for a given frames file."""
+    with open(path, encoding="utf-8") as frames_file:
+        return Gazetteer.from_frames(json.load(frames_file))
+
+
+class GazetteerRecognizer(Recognizer):
+    """
+    In-process recognizer returning the same entity shape LuisHelper reads from LUIS:
+    dst_city, or_city, str_date, end_date and budget surface strings, plus the
+    geographyV2_city and number lists. It needs no network and runs in well under
+    a millisecond per utterance, so it can stand in for LUIS as a fallback.
+    """
+
+    def __init__(self, gazetteer: Gazetteer = None):
+        self._gazetteer = gazetteer or load_gazetteer()
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        return self.recognize_text(turn_context.activity.text)
+
+    def recognize_text(self, utterance: str) -> RecognizerResult:
+        text = (utterance or "").lower()
+        entities: Dict[str, list] = {}
+        evidence = 0.0
+
+        if BOOKING_KEYWORDS.search(text):
+            evidence += WEIGHT_KEYWORD
+
+        # Cities, with their role taken from the word just before them
+        cities = self._gazetteer.find_cities(text)
+        for start, _, city in cities:
+            previous = text[:start].split()[-1:]
+            role = self._gazetteer.cues.get(previous[0]) if previous else None
+            if role and role not in entities:
+                entities[role] = [city]
+                evidence += WEIGHT_CUED_CITY
+            else:
+                evidence += WEIGHT_CITY
+        if cities:
+            entities["geographyV2_city"] = [city for _, _, city in cities]
+
+        # Dates, a second date or a return cue marks the end date
+        date_spans = []
+        for match in DATE_PATTERN.finditer(text):
+            date_spans.append(match.span())
+            role = "str_date"
+            if "str_date" in entities or END_DATE_CUE.search(text[:match.start()]):
+                role = "end_date"
+            if role not in entities:
+                entities[role] = [match.group()]
+                evidence += WEIGHT_DATE
+
+        # Budget and the free-standing numbers outside of dates
+        budget = CURRENCY_AMOUNT_PATTERN.search(text)
+        budget_text = budget.group() if budget else None
+        if budget_text is None:
+            budget = BUDGET_CUE_PATTERN.search(text)
+            budget_text = budget.group(1) if budget else None
+        if budget_text:
+            entities["budget"] = [budget_text]
+            evidence += WEIGHT_BUDGET
+
+        numbers = [
+            _to_number(match.group())
+            for match in NUMBER_PATTERN.finditer(text)
+            if not any(start <= match.start() < end for start, end in date_spans)
+        ]
+        if numbers:
+            entities["number"] = numbers
+
+        return RecognizerResult(
+            text=utterance,
+            altered_text=None,
+            intents=self._intents(evidence),
+            entities=entities,
+        )
+
+    @staticmethod
+    def _intents(evidence: float) -> Dict[str, IntentScore]:
+        # Only the top intent is returned, as LUIS does by default.
+        # Off-topic text is never claimed with high confidence: the gazetteer
+        # only knows what bookings look like, not everything else.
+        if evidence >= MIN_BOOKING_EVIDENCE:
+            return {BOOK_FLIGHT: IntentScore(round(min(evidence, 0.99), 2))}
+        return {NONE_INTENT: IntentScore(round(0.5 - evidence, 2))}
+
+
+def _to_number(text: str) -> float:
+    value = float(text.replace(",", ""))
+    return int(value) if value.is_integer() else value
@@ -0,0 +1,170 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Decode incoming activities without msrest's reflective deserializer."""
+
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Tuple
+
+from botbuilder.schema import Activity, ChannelAccount, ConversationAccount
+from msrest.serialization import Deserializer
+
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:  # Optional: the standard library parser is slower but equivalent.
+    loads = json.loads
+
+# Knows every Bot Framework schema model, for the fields left to msrest.
+_DESERIALIZER = Deserializer(Activity._infer_class_models())
+
+_PLAIN_TYPES = {"str": str, "bool": bool}
+
+
+def _msrest(data_type: str) -> Callable[[Any], Any]:
+    return lambda value: _DESERIALIZER.deserialize_data(value, data_type)
+
+
+def _plain(data_type: str) -> Callable[[Any], Any]:
+    expected, slow = _PLAIN_TYPES[data_type], _msrest(data_type)
+    return lambda value: value if value is None or isinstance(value, expected) else slow(value)
+
+
+def _iso_8601(value: Any) -> datetime:
+    # Like msrest, 7 fractional digits (.NET) are cut to microseconds.
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value)
+            if parsed.tzinfo is not None:
+                return parsed
+        except ValueError:
+            pass
+    return _DESERIALIZER.deserialize_data(value, "iso-8601")
+
+
+def _model(model_class) -> Callable[[Any], Any]:
+    """Builds ``model_class`` straight from the JSON keys, for flat models."""
+    fields = _compile(model_class)
+    slow = _msrest(model_class.__name__)
+
+    def decode(value):
+        if not isinstance(value, dict):
+            return slow(value)
+        model = model_class()
+        for key, item in value.items():
+            field = fields.get(key)
+            if field is not None:
+                setattr(model, field[0], field[1](item))
+            else:
+                model.additional_properties[key] = item
+        return model
+
+    return decode
+
+
+def _model_list(decode_item: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    return lambda value: None if value is None else [decode_item(item) for item in value]
+
+
+def _compile(model_class) -> Dict[str, Tuple[str, Callable[[Any], Any]]]:
+    """JSON key -> (attribute, decoder) for the plain fields of ``model_class``."""
+    fields = {}
+    for attribute, spec in model_class._attribute_map.items():
+        data_type = spec["type"]
+        if data_type in _PLAIN_TYPES:
+            fields[spec["key"]] = (attribute, _plain(data_type))
+        elif data_type == "object":
+            fields[spec["key"]] = (attribute, lambda value: value)
+    return fields
+
+
+_CHANNEL_ACCOUNT = _model(ChannelAccount)
+
+# The Activity fields the bot, the adapter and the telemetry read on every
+# turn, decoded on the spot. Everything else is kept raw until first read.
+_EAGER_FIELDS: Dict[str, Tuple[str, Callable[[Any], Any]]] = {
+    **_compile(Activity),
+    "timestamp": ("timestamp", _iso_8601),
+    "localTimestamp": ("local_timestamp", _iso_8601),
+    "from": ("from_property", _CHANNEL_ACCOUNT),
+    "recipient": ("recipient", _CHANNEL_ACCOUNT),
+    "conversation": ("conversation", _model(ConversationAccount)),
+    "membersAdded": ("members_added", _model_list(_CHANNEL_ACCOUNT)),
+    "membersRemoved": ("members_removed", _model_list(_CHANNEL_ACCOUNT)),
+}
+_LAZY_FIELDS: Dict[str, Tuple[str, str]] = {
+    spec["key"]: (attribute, spec["type"])
+    for attribute, spec in Activity._attribute_map.items()
+    if spec["key"] not in _EAGER_FIELDS
+}
+
+
+def _without(raw: Dict[str, Any], attribute: str) -> Dict[str, Any]:
+    # A new dict rather than a pop: copies of the activity share the old one.
+    return {key: value for key, value in raw.items() if key != attribute}
+
+
+def _lazy_property(attribute: str, data_type: str) -> property:
+    def get(self):
+        state = self.__dict__
+        raw = state.get("_raw_fields")
+        if raw and attribute in raw:
+            state[attribute] = _DESERIALIZER.deserialize_data(raw[attribute], data_type)
+            state["_raw_fields"] = _without(raw, attribute)
+        return state.get(attribute)
+
+    def set(self, value):
+        state = self.__dict__
+        raw = state.get("_raw_fields")
+        if raw and attribute in raw:
+            state["_raw_fields"] = _without(raw, attribute)
+        state[attribute] = value
+
+    return property(get, set)
+
+
+class LazyActivity(Activity):
+    """
+    An Activity whose rarely used fields (attachments, entities, suggested
+    actions, ...) stay raw JSON until first read, then go through msrest once.
+    Serializing it reads every field, so it serializes like any Activity.
+    """
+
+    def __init__(self, **kwargs):
+        self._raw_fields: Dict[str, Any] = {}
+        super().__init__(**kwargs)
+
+    @classmethod
+    def _infer_class_models(cls):
+        # msrest looks models up by name in the defining package.
+        return {**Activity._infer_class_models(), cls.__name__: cls}
+
+
+for _attribute, _data_type in _LAZY_FIELDS.values():
+    setattr(LazyActivity, _attribute, _lazy_property(_attribute, _data_type))
+
+
+def decode_activity(body: bytes) -> Activity:
+    """
+    Decode a JSON activity like ``Activity().deserialize(json.loads(body))``,
+    several times faster. Unknown keys go to ``additional_properties``, as
+    msrest puts them.
+    """
+    data = loads(body)
+    if not isinstance(data, dict):
+        return Activity().deserialize(data)
+
+    activity = LazyActivity()
+    raw = activity._raw_fields
+    for key, value in data.items():
+        field = _EAGER_FIELDS.get(key)
+        if field is not None:
+            setattr(activity, field[0], field[1](value))
+            continue
+        lazy = _LAZY_FIELDS.get(key)
+        if lazy is not None:
+            raw[lazy[0]] = value
+        else:
+            activity.additional_properties[key] = value
+    return activity
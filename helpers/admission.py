@@ -0,0 +1,180 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Admission control: a concurrency limit with a short, bounded wait queue."""
+
+import asyncio
+from collections import deque
+from http import HTTPStatus
+from typing import Deque, Iterable
+
+from aiohttp import web
+
+from helpers.metrics import LatencyHistogram
+
+
+class AdmissionController:
+    """
+    Lets at most ``max_concurrent`` requests run at once. Up to ``max_queue``
+    more wait, in arrival order, for at most ``max_wait`` seconds; anything
+    beyond is refused at once. Shedding the excess early keeps the latency of
+    admitted requests bounded instead of slowing every request down together.
+
+    Requests can also pile up before they reach the controller, in the socket
+    backlog and the event loop's ready queue, when the loop itself is busy.
+    With ``max_loop_lag`` set and the monitor started, every request is
+    refused once the loop ran more than that many seconds late on
+    ``lag_samples`` consecutive samples, ``lag_interval`` seconds apart. A
+    single slow call on the loop is one sample, not an overload.
+
+    ``acquire`` raises asyncio.QueueFull when the queue is full or the loop is
+    lagging and asyncio.TimeoutError when the wait runs out; the request was
+    not admitted in either case.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int = 0,
+        max_wait: float = None,
+        max_loop_lag: float = None,
+        lag_interval: float = 0.05,
+        lag_samples: int = 3,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_loop_lag = max_loop_lag
+        self.lag_interval = lag_interval
+        self.lag_samples = lag_samples
+        self.active = 0
+        self.loop_lag = 0.0
+        self.lagging_samples = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._monitor: asyncio.Task = None
+
+        self.wait_time = LatencyHistogram()
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.shed = 0
+        self.max_queued = 0
+
+    async def acquire(self) -> None:
+        if self.max_loop_lag is not None and self.lagging_samples >= self.lag_samples:
+            self.shed += 1
+            raise asyncio.QueueFull(f"Event loop {self.loop_lag:.3f}s behind")
+
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            self.wait_time.observe(0)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise asyncio.QueueFull("Too many requests waiting for admission")
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        self.max_queued = max(self.max_queued, len(self._waiters))
+        started = loop.time()
+        try:
+            await asyncio.wait({waiter}, timeout=self.max_wait)
+        except asyncio.CancelledError:
+            self._give_up(waiter)
+            raise
+        if not waiter.done():
+            self._give_up(waiter)
+            self.timeouts += 1
+            raise asyncio.TimeoutError(f"Not admitted within {self.max_wait}s")
+
+        self.admitted += 1
+        self.wait_time.observe(loop.time() - started)
+
+    def release(self) -> None:
+        # The slot goes straight to the oldest waiter, so `active` is unchanged.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _give_up(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # Admitted just as we stopped waiting: hand the slot on.
+            self.release()
+            return
+        waiter.cancel()
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+
+    def start(self) -> None:
+        """Start measuring the event loop lag on the running loop."""
+        if self.max_loop_lag is not None and (self._monitor is None or self._monitor.done()):
+            self._monitor = asyncio.ensure_future(self._watch_loop_lag())
+
+    async def stop(self) -> None:
+        if self._monitor is not None:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+            self._monitor = None
+
+    async def _watch_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            self.loop_lag = max(loop.time() - started - self.lag_interval, 0.0)
+            if self.loop_lag > self.max_loop_lag:
+                self.lagging_samples += 1
+            else:
+                self.lagging_samples = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "shed": self.shed,
+            "loop_lag_ms": self.loop_lag * 1000,
+            "lagging_samples": self.lagging_samples,
+            "wait": self.wait_time.snapshot,
+        }
+
+
+def admission_middleware(
+    controller: AdmissionController, paths: Iterable[str], retry_after: int = 1
+):
+    """aiohttp middleware answering 503 with Retry-After when ``paths`` are overloaded."""
+    paths = frozenset(paths)
+
+    @web.middleware
+    async def middleware(request: web.Request, handler):
+        if request.path not in paths:
+            return await handler(request)
+        try:
+            await controller.acquire()
+        except (asyncio.QueueFull, asyncio.TimeoutError):
+            return web.Response(
+                status=HTTPStatus.SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(retry_after)},
+            )
+        try:
+            return await handler(request)
+        finally:
+            controller.release()
+
+    return middleware
@@ -0,0 +1,306 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Route every turn of a conversation to the same worker process."""
+
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import signal
+import tempfile
+from collections import Counter
+from http import HTTPStatus
+from typing import Dict, Iterable, List
+
+import aiohttp
+from aiohttp import web
+
+from helpers.metrics import LatencyHistogram
+from helpers.prefork import AppFactory, PreforkServer
+
+logger = logging.getLogger(__name__)
+
+# Request and response headers relayed between the channel and a worker.
+FORWARDED_REQUEST_HEADERS = ("Authorization", "Content-Type")
+FORWARDED_RESPONSE_HEADERS = ("Content-Type", "Retry-After")
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hashing: each node owns ``replicas`` points on a ring of 64-bit
+    hashes, and a key goes to the node owning the first point at or after the
+    key's hash. Adding or removing a node only moves the keys of that node's
+    points, about 1/N of them, and never moves a key between two other nodes.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 64):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self._nodes = set()
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for replica in range(self.replicas):
+            point = _hash(f"{node}#{replica}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str) -> None:
+        if node not in self._nodes:
+            return
+        self._nodes.remove(node)
+        kept = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != node]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def get(self, key: str) -> str:
+        if not self._points:
+            raise LookupError("The hash ring has no nodes")
+        index = bisect.bisect_left(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+
+def conversation_key(body: bytes) -> str:
+    """The conversation id of a serialized activity, "" when it has none."""
+    try:
+        conversation = json.loads(body).get("conversation") or {}
+        return str(conversation.get("id") or "")
+    except (ValueError, AttributeError):
+        return ""
+
+
+class AffinityDispatcher:
+    """
+    Forwards each /api/messages request to the worker owning its conversation
+    id on a HashRing, over the worker's unix socket, and relays the answer.
+    A worker that cannot be reached gets one retry (its socket path may be
+    changing hands in a restart); after that the channel gets a 503. So does
+    a turn whose connection fails once it was sent, without a retry: the
+    worker may have run it, and running it twice would send every reply twice.
+    """
+
+    def __init__(self, replicas: int = 64, retry_after: int = 1):
+        self.ring = HashRing(replicas=replicas)
+        self.retry_after = retry_after
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+
+        self.latency = LatencyHistogram()
+        self.forwarded = Counter()
+        self.errors = 0
+        self.rebalances = 0
+
+    def add_worker(self, name: str, path: str) -> None:
+        self._sessions[name] = aiohttp.ClientSession(connector=aiohttp.UnixConnector(path))
+        self.ring.add(name)
+        self.rebalances += 1
+
+    async def remove_worker(self, name: str) -> None:
+        # Off the ring first, so no new turn is sent to the worker.
+        self.ring.remove(name)
+        self.rebalances += 1
+        session = self._sessions.pop(name, None)
+        if session is not None:
+            await session.close()
+
+    def worker_for(self, conversation_id: str) -> str:
+        return self.ring.get(conversation_id)
+
+    async def messages(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        headers = {
+            name: request.headers[name]
+            for name in FORWARDED_REQUEST_HEADERS
+            if name in request.headers
+        }
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for attempt in range(2):
+            try:
+                name = self.worker_for(conversation_key(body))
+                async with self._sessions[name].post(
+                    f"http://{name}{request.path_qs}", data=body, headers=headers
+                ) as response:
+                    payload = await response.read()
+                    relayed = {
+                        header: response.headers[header]
+                        for header in FORWARDED_RESPONSE_HEADERS
+                        if header in response.headers
+                    }
+                self.forwarded[name] += 1
+                self.latency.observe(loop.time() - started)
+                return web.Response(body=payload, status=response.status, headers=relayed)
+            except (aiohttp.ClientConnectorError, LookupError):
+                # Never reached a worker: nothing ran yet.
+                if attempt == 0:
+                    await asyncio.sleep(0.05)
+            except aiohttp.ClientError:
+                break
+        self.errors += 1
+        return web.Response(
+            status=HTTPStatus.SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        return web.json_response({"dispatcher": self.stats})
+
+    async def close(self) -> None:
+        for name in list(self._sessions):
+            await self.remove_worker(name)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "workers": self.ring.nodes,
+            "forwarded": dict(self.forwarded),
+            "errors": self.errors,
+            "rebalances": self.rebalances,
+            "latency": self.latency.snapshot,
+        }
+
+
+class AffinityServer:
+    """
+    Runs the PreforkServer workers on unix sockets behind an AffinityDispatcher
+    listening on host and port, in this process. Workers keep conversation state
+    in their own memory; the ring follows the workers as they come and go.
+
+    Signals are the PreforkServer ones: SIGHUP for a rolling restart, SIGTTIN
+    and SIGTTOU to add or remove a worker, SIGTERM or SIGINT to stop. Added and
+    removed workers rebalance about 1/N of the conversations; a dead worker
+    leaves the ring until its replacement is ready. Conversations that move,
+    or whose worker restarts, start over, since their state was in its memory.
+    """
+
+    def __init__(
+        self,
+        app_factory: AppFactory,
+        host: str,
+        port: int,
+        workers: int,
+        use_uvloop: bool = False,
+        shutdown_timeout: float = 60,
+        start_timeout: float = 120,
+        retry_after: int = 1,
+    ):
+        self.host = host
+        self.port = port
+        self._socket_dir = tempfile.TemporaryDirectory(prefix="bot-workers-")
+        self.workers = PreforkServer(
+            app_factory,
+            host,
+            port,
+            workers,
+            use_uvloop=use_uvloop,
+            shutdown_timeout=shutdown_timeout,
+            start_timeout=start_timeout,
+            socket_dir=self._socket_dir.name,
+        )
+        self.dispatcher = AffinityDispatcher(retry_after=retry_after)
+        self._runner: web.AppRunner = None
+        # Worker changes run one at a time, off the event loop. Created by
+        # start, in the loop serving, since a lock binds to a loop.
+        self._supervising: asyncio.Lock = None
+
+    @staticmethod
+    def worker_name(slot: int) -> str:
+        return f"worker-{slot}"
+
+    async def _blocking(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def start(self) -> None:
+        self._supervising = asyncio.Lock()
+        await self._blocking(self.workers.start)
+        for slot in self.workers.slots:
+            self.dispatcher.add_worker(self.worker_name(slot), self.workers.worker_path(slot))
+
+        app = web.Application()
+        app.router.add_post("/api/messages", self.dispatcher.messages)
+        app.router.add_get("/api/metrics", self.dispatcher.metrics)
+        self._runner = web.AppRunner(app, shutdown_timeout=self.workers.shutdown_timeout)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        await self.dispatcher.close()
+        await self._blocking(self.workers.stop)
+        self._socket_dir.cleanup()
+
+    async def restart_worker(self, slot: int) -> None:
+        # The worker keeps its place on the ring: the replacement takes over
+        # its socket path, and a turn caught in the hand-off is retried.
+        async with self._supervising:
+            await self._blocking(self.workers.restart_worker, slot)
+
+    async def rolling_restart(self) -> None:
+        for slot in self.workers.slots:
+            await self.restart_worker(slot)
+
+    async def add_worker(self) -> None:
+        async with self._supervising:
+            slot = await self._blocking(self.workers.add_worker)
+            self.dispatcher.add_worker(self.worker_name(slot), self.workers.worker_path(slot))
+
+    async def remove_worker(self) -> None:
+        async with self._supervising:
+            if len(self.workers.slots) <= 1:
+                return
+            slot = self.workers.slots[-1]
+            await self.dispatcher.remove_worker(self.worker_name(slot))
+            await self._blocking(self.workers.remove_worker)
+
+    async def replace_dead_workers(self) -> None:
+        async with self._supervising:
+            for slot in self.workers.dead_workers():
+                name = self.worker_name(slot)
+                await self.dispatcher.remove_worker(name)
+                await self._blocking(self.workers.replace_dead_worker, slot)
+                self.dispatcher.add_worker(name, self.workers.worker_path(slot))
+
+    async def serve(self) -> None:
+        """Start, then supervise the workers until SIGTERM or SIGINT."""
+        loop = asyncio.get_running_loop()
+        stopping = asyncio.Event()
+        loop.add_signal_handler(signal.SIGTERM, stopping.set)
+        loop.add_signal_handler(signal.SIGINT, stopping.set)
+        loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(self.rolling_restart()))
+        loop.add_signal_handler(signal.SIGTTIN, lambda: asyncio.ensure_future(self.add_worker()))
+        loop.add_signal_handler(signal.SIGTTOU, lambda: asyncio.ensure_future(self.remove_worker()))
+
+        await self.start()
+        logger.info(
+            "Dispatcher serving http://%s:%s with %d workers",
+            self.host,
+            self.port,
+            len(self.workers.slots),
+        )
+        try:
+            while not stopping.is_set():
+                try:
+                    await asyncio.wait_for(stopping.wait(), 1)
+                except asyncio.TimeoutError:
+                    await self.replace_dead_workers()
+        finally:
+            await self.stop()
@@ -0,0 +1,134 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""MemoryStorage that forgets idle conversations."""
+
+import asyncio
+import pickle
+import sys
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+from botbuilder.core import MemoryStorage, StoreItem
+
+
+def approximate_size(value) -> int:
+    """Pickled size of a stored item, a fair proxy for what it holds in RAM."""
+    try:
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return sys.getsizeof(value)
+
+
+class BoundedMemoryStorage(MemoryStorage):
+    """
+    MemoryStorage holding at most ``max_entries`` items, dropping the least
+    recently used one when full and any item not read or written for ``ttl``
+    seconds. Expired items are dropped when read and by a background sweeper
+    started with ``start()``.
+
+    Items are kept in access order, so both evictions only ever look at the
+    oldest entries.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 100000,
+        ttl: float = 3600.0,
+        sweep_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super(BoundedMemoryStorage, self).__init__(OrderedDict())
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._touched: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        self._sweeper: asyncio.Task = None
+
+        self.bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def read(self, keys: List[str]):
+        if keys:
+            now = self._clock()
+            for key in keys:
+                if key in self.memory and now - self._touched[key] >= self.ttl:
+                    self._forget(key)
+                    self.expirations += 1
+        data = await super(BoundedMemoryStorage, self).read(keys)
+        for key in data:
+            self._touch(key)
+        return data
+
+    async def write(self, changes: Dict[str, StoreItem]):
+        try:
+            await super(BoundedMemoryStorage, self).write(changes)
+        finally:
+            # An ETag conflict stops MemoryStorage midway: account for what it wrote.
+            for key in changes or ():
+                if key in self.memory:
+                    self._touch(key)
+                    size = approximate_size(self.memory[key])
+                    self.bytes += size - self._sizes.get(key, 0)
+                    self._sizes[key] = size
+
+        while len(self.memory) > self.max_entries:
+            self._forget(next(iter(self.memory)))
+            self.evictions += 1
+
+    async def delete(self, keys: List[str]):
+        for key in keys:
+            self._forget(key)
+
+    def sweep(self) -> int:
+        """Drop every item idle for ``ttl`` seconds or more, returning how many."""
+        expired = 0
+        deadline = self._clock() - self.ttl
+        while self.memory:
+            key = next(iter(self.memory))
+            if self._touched[key] > deadline:
+                break
+            self._forget(key)
+            expired += 1
+        self.expirations += expired
+        return expired
+
+    def start(self) -> None:
+        """Start the background sweeper on the running loop."""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.ensure_future(self._sweep_forever())
+
+    async def stop(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.sweep()
+
+    def _touch(self, key: str) -> None:
+        self._touched[key] = self._clock()
+        self.memory.move_to_end(key)
+
+    def _forget(self, key: str) -> None:
+        self.memory.pop(key, None)
+        self._touched.pop(key, None)
+        self.bytes -= self._sizes.pop(key, 0)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.memory),
+            "bytes": self.bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
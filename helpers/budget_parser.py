@@ -0,0 +1,100 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Compiled fast path for the budget answers users type most often."""
+
+import re
+from typing import List, Optional
+
+from recognizers_text import Culture
+
+from helpers.parsing_service import PARSING_SERVICE, ParseResult
+from helpers.recognizer_models import ModelType, normalize_culture
+
+# Units and resolutions exactly as the English NumberWithUnit currency model reports them.
+_DOLLAR = {"unit": "Dollar"}
+_USD = {"unit": "United States dollar", "isoCurrency": "USD"}
+_EURO = {"unit": "Euro", "isoCurrency": "EUR"}
+_POUND = {"unit": "Pound"}
+_GBP = {"unit": "British pound", "isoCurrency": "GBP"}
+_YEN = {"unit": "Japanese yen", "isoCurrency": "JPY"}
+
+UNITS = {
+    "$": _DOLLAR,
+    "dollar": _DOLLAR,
+    "dollars": _DOLLAR,
+    "usd": _USD,
+    "€": _EURO,
+    "euro": _EURO,
+    "euros": _EURO,
+    "eur": _EURO,
+    "£": _POUND,
+    "pound": _POUND,
+    "pounds": _POUND,
+    "gbp": _GBP,
+    "yen": _YEN,
+    "yens": _YEN,
+    "jpy": _YEN,
+}
+
+# Whole integers only, with or without thousands separators: decimals, words
+# ("2 grand") and anything else go to the full recognizer.
+_AMOUNT = r"[1-9]\d*|[1-9]\d{0,2}(?:,\d{3})+"
+_SYMBOL = r"[$€£]"
+_WORD = r"dollars?|usd|euros?|eur|pounds?|gbp|yens?|jpy"
+_END = r"\s*[.!?,]?\s*"
+
+AMOUNT_WITH_UNIT = re.compile(
+    rf"\s*(?P<span>(?P<prefix>{_SYMBOL}) ?(?P<amount>{_AMOUNT})"
+    rf"|(?P<amount2>{_AMOUNT}) ?(?P<suffix>{_SYMBOL}|(?:{_WORD})\b)){_END}",
+    re.IGNORECASE,
+)
+BARE_AMOUNT = re.compile(rf"\s*(?:{_AMOUNT}){_END}")
+
+
+def fast_parse(text: str) -> Optional[List[ParseResult]]:
+    """
+    Parse "1000 euros", "$2,500", "300£" and bare numbers the way the currency
+    model would, or return None when the text needs the full recognizer.
+    """
+    match = AMOUNT_WITH_UNIT.fullmatch(text)
+    if match is None:
+        # A bare number has no currency, so the model finds nothing in it.
+        return [] if BARE_AMOUNT.fullmatch(text) else None
+
+    amount = match.group("amount") or match.group("amount2")
+    unit = match.group("prefix") or match.group("suffix")
+    return [
+        ParseResult(
+            match.group("span").lower(),
+            match.start("span"),
+            match.end("span") - 1,
+            "currency",
+            {"value": amount.replace(",", ""), **UNITS[unit.lower()]},
+        )
+    ]
+
+
+class BudgetParser:
+    """Currency parsing that only calls the recognizer when the fast path cannot decide."""
+
+    def __init__(self):
+        self.fast_hits = 0
+        self.fallbacks = 0
+
+    async def parse(self, text: str, culture: str = Culture.English) -> List[ParseResult]:
+        results = fast_parse(text) if normalize_culture(culture) == Culture.English else None
+        if results is not None:
+            self.fast_hits += 1
+            return results
+
+        self.fallbacks += 1
+        # The budget prompts are English, and so are the amounts the dialog
+        # reads back: "1,500" is fifteen hundred whatever the channel locale.
+        return await PARSING_SERVICE.parse(ModelType.CURRENCY, text, Culture.English)
+
+    @property
+    def stats(self) -> dict:
+        return {"fast_hits": self.fast_hits, "fallbacks": self.fallbacks}
+
+
+BUDGET_PARSER = BudgetParser()
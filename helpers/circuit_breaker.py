@@ -0,0 +1,76 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Circuit breaker for calls to remote services."""
+
+import time
+from typing import Callable
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures and rejects calls for
+    ``cooldown`` seconds. Once the cool-down is over a single trial call is let
+    through: success closes the breaker, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._state = CircuitBreaker.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if (
+            self._state == CircuitBreaker.OPEN
+            and self._clock() - self._opened_at >= self.cooldown
+        ):
+            self._state = CircuitBreaker.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now."""
+        state = self.state
+        if state == CircuitBreaker.OPEN:
+            self.rejected += 1
+            return False
+        if state == CircuitBreaker.HALF_OPEN:
+            # Let this trial through and hold everyone else until it reports back.
+            self._state = CircuitBreaker.OPEN
+            self._opened_at = self._clock()
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._state = CircuitBreaker.CLOSED
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state != CircuitBreaker.CLOSED or self._failures >= self.failure_threshold:
+            if self._state == CircuitBreaker.CLOSED:
+                self.trips += 1
+            self._state = CircuitBreaker.OPEN
+            self._opened_at = self._clock()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
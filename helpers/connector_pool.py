@@ -0,0 +1,384 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Keep-alive connections and shared app tokens for the replies turns send."""
+
+import asyncio
+import functools
+import logging
+import time
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, NamedTuple, Optional, Set, Tuple
+
+import aiohttp
+from botframework.connector.aio import ConnectorClient
+from botframework.connector.auth import (
+    AppCredentials,
+    AuthenticationConstants,
+    MicrosoftAppCredentials,
+)
+from msrest.exceptions import ClientRequestError, raise_with_traceback
+from msrest.pipeline import AsyncHTTPPolicy, AsyncHTTPSender, AsyncPipeline, Request, Response
+from msrest.pipeline.universal import RawDeserializer
+from msrest.universal_http.aiohttp import AioHttpClientResponse
+from yarl import URL
+
+from helpers.metrics import LatencyHistogram
+from helpers.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class HttpSessionPool:
+    """
+    One keep-alive aiohttp session per origin (scheme, host and port) of the
+    service URLs replies go to, created on first use in the running loop.
+    Past ``max_sessions`` origins, the least recently used session is retired:
+    it is closed once the requests it is serving are done. Sessions of a
+    previous loop are closed when another loop takes the pool over.
+    """
+
+    def __init__(
+        self,
+        limit_per_host: int = 100,
+        keepalive_timeout: float = 60,
+        max_sessions: int = 64,
+    ):
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, aiohttp.ClientSession]" = OrderedDict()
+        self._in_use: Counter = Counter()
+        self._retired: Set[aiohttp.ClientSession] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.requests = 0
+        self.connections = 0
+        self.evictions = 0
+
+        self._trace = aiohttp.TraceConfig()
+        self._trace.on_request_start.append(self._on_request_start)
+        self._trace.on_connection_create_end.append(self._on_connection_create_end)
+
+    def session(self, url: str) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Sessions are bound to the loop that created them.
+            self._close_loop_sessions()
+            self._loop = loop
+
+        origin = str(URL(url).origin())
+        session = self._sessions.get(origin)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            session = aiohttp.ClientSession(connector=connector, trace_configs=[self._trace])
+            self._sessions[origin] = session
+            while len(self._sessions) > self.max_sessions:
+                _, evicted = self._sessions.popitem(last=False)
+                if self._in_use[evicted]:
+                    self._retired.add(evicted)
+                else:
+                    asyncio.ensure_future(evicted.close())
+                self.evictions += 1
+        self._sessions.move_to_end(origin)
+        return session
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+        """``session(url).request(...)``, keeping a retired session open until it returns."""
+        session = self.session(url)
+        self._in_use[session] += 1
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                yield response
+        finally:
+            self._in_use[session] -= 1
+            if not self._in_use[session]:
+                del self._in_use[session]
+                if session in self._retired:
+                    self._retired.discard(session)
+                    await session.close()
+
+    async def close(self) -> None:
+        sessions = list(self._sessions.values()) + list(self._retired)
+        self._sessions.clear()
+        self._retired.clear()
+        for session in sessions:
+            await session.close()
+
+    def _close_loop_sessions(self) -> None:
+        sessions = list(self._sessions.values()) + list(self._retired)
+        self._sessions.clear()
+        self._retired.clear()
+        self._in_use.clear()
+        for session in sessions:
+            if self._loop.is_closed():
+                # Its connections went with the loop; this releases the rest.
+                asyncio.ensure_future(session.close())
+            else:
+                asyncio.run_coroutine_threadsafe(session.close(), self._loop)
+
+    async def _on_request_start(self, session, context, params) -> None:
+        self.requests += 1
+
+    async def _on_connection_create_end(self, session, context, params) -> None:
+        self.connections += 1
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "retired": len(self._retired),
+            "requests": self.requests,
+            "connections": self.connections,
+            "evictions": self.evictions,
+        }
+
+
+class _AppToken(NamedTuple):
+    value: str
+    expires_at: float
+    refresh_at: float
+
+
+class AppTokenCache:
+    """
+    App tokens for the bot's outbound calls, shared by every connector client
+    and fetched from the credentials' token endpoint with the pooled sessions.
+
+    A token is served until it expires. From ``refresh_margin`` seconds before
+    that (or half its lifetime, if shorter), the first caller starts a refresh
+    in the background and keeps using the current token; a failed refresh is
+    retried by the first caller after ``retry_interval`` seconds. Concurrent
+    callers without a usable token share one request.
+
+    Credentials other than an app id and password (certificates, managed
+    identities) keep their own token logic, run off the event loop.
+    """
+
+    def __init__(
+        self,
+        sessions: HttpSessionPool,
+        refresh_margin: float = 300,
+        retry_interval: float = 30,
+        clock=time.monotonic,
+    ):
+        self.sessions = sessions
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self._clock = clock
+        self._tokens: Dict[Tuple[str, str, str], _AppToken] = {}
+        self._fetches = SingleFlight()
+
+        self.fetch_time = LatencyHistogram()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    @staticmethod
+    def make_key(credentials: AppCredentials) -> Tuple[str, str, str]:
+        return (credentials.microsoft_app_id, credentials.oauth_endpoint, credentials.oauth_scope)
+
+    async def get_token(self, credentials: AppCredentials) -> str:
+        if not _has_password(credentials):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, credentials.get_access_token)
+
+        key = self.make_key(credentials)
+        token = self._tokens.get(key)
+        now = self._clock()
+        if token is not None and now < token.expires_at:
+            self.hits += 1
+            if now >= token.refresh_at:
+                self._refresh_in_background(key, credentials, token)
+            return token.value
+
+        self.misses += 1
+        token, _ = await self._fetches.do(key, lambda: self._fetch(key, credentials))
+        return token.value
+
+    def invalidate(self, credentials: AppCredentials) -> None:
+        """Forget the token, once the service turned it down."""
+        self._tokens.pop(self.make_key(credentials), None)
+
+    def _refresh_in_background(self, key, credentials: AppCredentials, token: _AppToken) -> None:
+        # Until this refresh ends, the next callers use the current token.
+        self._tokens[key] = token._replace(refresh_at=self._clock() + self.retry_interval)
+        self.refreshes += 1
+        refresh = asyncio.ensure_future(
+            self._fetches.do(key, lambda: self._fetch(key, credentials))
+        )
+        refresh.add_done_callback(functools.partial(_log_refresh_failure, key[0]))
+
+    async def _fetch(self, key, credentials: AppCredentials) -> _AppToken:
+        url = f"{credentials.oauth_endpoint}/oauth2/v2.0/token"
+        scope = credentials.oauth_scope
+        if not scope.endswith("/.default"):
+            scope += "/.default"
+        form = {
+            "grant_type": "client_credentials",
+            "client_id": credentials.microsoft_app_id,
+            "client_secret": credentials.microsoft_app_password,
+            "scope": scope,
+        }
+
+        started = time.perf_counter()
+        try:
+            async with self.sessions.request("POST", url, data=form) as response:
+                payload = await response.json(content_type=None)
+            if "access_token" not in payload:
+                raise PermissionError(
+                    "Failed to get access token with error: "
+                    f"{payload.get('error', 'Unknown error')}, error_description: "
+                    f"{payload.get('error_description', 'Unknown error description')}"
+                )
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.fetch_time.observe(time.perf_counter() - started)
+
+        now = self._clock()
+        lifetime = float(payload.get("expires_in", 3600))
+        token = _AppToken(
+            payload["access_token"],
+            now + lifetime,
+            now + max(lifetime - self.refresh_margin, lifetime / 2),
+        )
+        self._tokens[key] = token
+        return token
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "tokens": len(self._tokens),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "fetch": self.fetch_time.snapshot,
+        }
+
+
+def _has_password(credentials: AppCredentials) -> bool:
+    return isinstance(credentials, MicrosoftAppCredentials) and bool(
+        credentials.microsoft_app_password
+    )
+
+
+def _log_refresh_failure(app_id: str, refresh: asyncio.Future) -> None:
+    if not refresh.cancelled() and refresh.exception() is not None:
+        logger.warning("Could not refresh the app token of %s: %s", app_id, refresh.exception())
+
+
+class AppTokenPolicy(AsyncHTTPPolicy):
+    """Signs requests with the shared app token; a 401 gets one retry with a new token."""
+
+    def __init__(self, credentials: AppCredentials, tokens: AppTokenCache):
+        super().__init__()
+        self._credentials = credentials
+        self._tokens = tokens
+
+    async def send(self, request: Request, **kwargs) -> Response:
+        app_id = self._credentials.microsoft_app_id
+        # Same rule as AppCredentials: no app id means unauthenticated.
+        if not app_id or app_id == AuthenticationConstants.ANONYMOUS_SKILL_APP_ID:
+            request.http_request.headers.pop("Authorization", None)
+            return await self.next.send(request, **kwargs)
+
+        await self._sign(request)
+        response = await self.next.send(request, **kwargs)
+        if response.http_response.status_code == 401:
+            self._tokens.invalidate(self._credentials)
+            await self._sign(request)
+            response = await self.next.send(request, **kwargs)
+        return response
+
+    async def _sign(self, request: Request) -> None:
+        token = await self._tokens.get_token(self._credentials)
+        request.http_request.headers["Authorization"] = f"Bearer {token}"
+
+
+class PooledHTTPSender(AsyncHTTPSender):
+    """Sends msrest requests with the pooled sessions and reads each body in full."""
+
+    def __init__(self, config, sessions: HttpSessionPool):
+        self._config = config
+        self._sessions = sessions
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_details):  # pylint: disable=arguments-differ
+        # The pool owns the sessions.
+        pass
+
+    async def send(self, request: Request, **config) -> Response:
+        http_request = request.http_request
+        timeout = aiohttp.ClientTimeout(total=self._config.connection.timeout)
+        try:
+            async with self._sessions.request(
+                http_request.method,
+                http_request.url,
+                headers=http_request.headers,
+                data=http_request.data,
+                timeout=timeout,
+            ) as aiohttp_response:
+                response = AioHttpClientResponse(http_request, aiohttp_response)
+                # Reading it all hands the connection back to the pool.
+                await response.load_body()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            raise_with_traceback(ClientRequestError, "Error occurred in request.", error)
+        return Response(request, response)
+
+
+class PooledPipeline(AsyncPipeline):
+    """The connector pipeline, on pooled sessions and the shared token cache."""
+
+    def __init__(self, config, sessions: HttpSessionPool, tokens: AppTokenCache):
+        policies = [
+            config.user_agent_policy,
+            AppTokenPolicy(config.credentials, tokens),
+            RawDeserializer(),
+            config.http_logger_policy,
+        ]
+        super().__init__(policies, PooledHTTPSender(config, sessions))
+
+
+class ConnectorPool:
+    """
+    Builds the connector clients replies are posted with, all sharing one
+    HttpSessionPool and one AppTokenCache, in place of the stock clients that
+    post with requests from executor threads and take their token with a
+    blocking MSAL call on the event loop.
+    """
+
+    def __init__(
+        self,
+        limit_per_host: int = 100,
+        keepalive_timeout: float = 60,
+        token_refresh_margin: float = 300,
+    ):
+        self.sessions = HttpSessionPool(limit_per_host, keepalive_timeout)
+        self.tokens = AppTokenCache(self.sessions, token_refresh_margin)
+
+    def create_client(self, service_url: str, credentials: AppCredentials) -> ConnectorClient:
+        return ConnectorClient(
+            credentials,
+            base_url=service_url,
+            pipeline_type=functools.partial(
+                PooledPipeline, sessions=self.sessions, tokens=self.tokens
+            ),
+        )
+
+    async def close(self) -> None:
+        await self.sessions.close()
+
+    @property
+    def stats(self) -> dict:
+        return {"http": self.sessions.stats, "tokens": self.tokens.stats}
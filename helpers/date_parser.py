@@ -0,0 +1,171 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Compiled fast path for the travel dates users type most often."""
+
+import datetime
+import re
+from typing import List, Optional
+
+from recognizers_text import Culture
+
+from helpers.parsing_service import PARSING_SERVICE, ParseResult
+from helpers.recognizer_models import ModelType, normalize_culture
+from timex_values import date_range
+
+MONTHS = {
+    "jan": 1, "january": 1,
+    "feb": 2, "february": 2,
+    "mar": 3, "march": 3,
+    "apr": 4, "april": 4,
+    "may": 5,
+    "jun": 6, "june": 6,
+    "jul": 7, "july": 7,
+    "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9,
+    "oct": 10, "october": 10,
+    "nov": 11, "november": 11,
+    "dec": 12, "december": 12,
+}
+
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+_DAY = r"(?P<day>\d{1,2})(?P<suffix>st|nd|rd|th)?"
+_YEAR = r"(?P<year>\d{4})"
+_END = r"\s*[.!?]?\s*"
+
+ISO_DATE = re.compile(
+    rf"\s*(?P<span>{_YEAR}(?P<sep>[-/])(?P<month>\d{{1,2}})(?P=sep)(?P<day>\d{{1,2}})){_END}"
+)
+# The model reads dotted dates day first only ("1.18.2024" is just the year),
+# so those are left to it.
+NUMERIC_DATE = re.compile(
+    rf"\s*(?P<span>(?P<first>\d{{1,2}})(?P<sep>[-/])(?P<second>\d{{1,2}})(?P=sep){_YEAR}){_END}"
+)
+MONTH_FIRST_DATE = re.compile(
+    rf"\s*(?P<span>(?P<month>{_MONTH}) {_DAY},? {_YEAR}){_END}", re.IGNORECASE
+)
+DAY_FIRST_DATE = re.compile(
+    rf"\s*(?P<span>{_DAY} (?:of )?(?P<month>{_MONTH}),? {_YEAR}){_END}", re.IGNORECASE
+)
+
+
+def _ordinal_suffix(day: int) -> str:
+    if day % 10 in (1, 2, 3) and day not in (11, 12, 13):
+        return ("st", "nd", "rd")[day % 10 - 1]
+    return "th"
+
+
+def _numeric_day_month(first: int, second: int) -> Optional[tuple]:
+    """
+    Day and month of "first-second-yyyy" when only one reading is possible.
+    The recognizer reads 01-02-2023 as January 2nd, which a user from most
+    of the world did not mean, so those answers are left to it.
+    """
+    if first > 12 >= second:
+        return first, second
+    if second > 12 >= first or first == second:
+        return second, first
+    return None
+
+
+def _date_result(match, year: int, month: int, day: int) -> Optional[List[ParseResult]]:
+    try:
+        value = datetime.date(year, month, day).isoformat()
+    except ValueError:
+        # Let the recognizer report impossible dates the way it always has.
+        return None
+    return [
+        ParseResult(
+            match.group("span").lower(),
+            match.start("span"),
+            match.end("span") - 1,
+            "datetimeV2.date",
+            {"values": [{"timex": value, "type": "date", "value": value}]},
+        )
+    ]
+
+
+def fast_parse(text: str) -> Optional[List[ParseResult]]:
+    """
+    Parse ISO, unambiguous dd-mm-yyyy and month-name dates with a year the way
+    the datetime model would, or return None when the text needs the model.
+    """
+    match = ISO_DATE.fullmatch(text)
+    if match:
+        return _date_result(
+            match, int(match.group("year")), int(match.group("month")), int(match.group("day"))
+        )
+
+    match = NUMERIC_DATE.fullmatch(text)
+    if match:
+        day_month = _numeric_day_month(int(match.group("first")), int(match.group("second")))
+        if day_month is None:
+            return None
+        return _date_result(match, int(match.group("year")), day_month[1], day_month[0])
+
+    match = MONTH_FIRST_DATE.fullmatch(text) or DAY_FIRST_DATE.fullmatch(text)
+    if match:
+        day, suffix = int(match.group("day")), match.group("suffix")
+        if suffix and suffix.lower() != _ordinal_suffix(day):
+            # "18nd" is left unresolved by the recognizer.
+            return None
+        return _date_result(
+            match, int(match.group("year")), MONTHS[match.group("month").lower()], day
+        )
+    return None
+
+
+def date_range_timex(results: List[ParseResult]) -> Optional[str]:
+    """
+    "(start,end,duration)" timex of the trip the results describe, when both
+    ends are definite days: a daterange ("from Aug 13 2016 to Aug 20 2016") or
+    a duration counted from a day ("for two weeks from Monday"). Else None.
+    """
+    days, starts = None, []
+    for result in results:
+        for value in (result.resolution or {}).get("values", ()):
+            kind = value.get("type")
+            if kind == "daterange" and date_range(value.get("timex")):
+                return value["timex"]
+            if kind == "daterange" and value.get("Mod") == "since" and value.get("start"):
+                starts.append(value["start"])
+            elif kind == "duration" and value.get("value"):
+                seconds = float(value["value"])
+                if seconds and seconds % 86400 == 0:
+                    days = int(seconds // 86400)
+
+    if days is None or not starts:
+        return None
+    # A weekday gets a past and an upcoming resolution; the trip is the upcoming one.
+    start = datetime.date.fromisoformat(starts[-1])
+    end = start + datetime.timedelta(days=days)
+    return f"({start.isoformat()},{end.isoformat()},P{days}D)"
+
+
+class DateParser:
+    """Datetime parsing that only calls the recognizer when the fast path cannot decide."""
+
+    def __init__(self):
+        self.fast_hits = 0
+        self.fallbacks = 0
+
+    async def parse(self, text: str, culture: str = Culture.English) -> List[ParseResult]:
+        # Channels send locales such as "en-US"; English ones take the fast path.
+        results = fast_parse(text) if normalize_culture(culture) == Culture.English else None
+        if results is not None:
+            self.fast_hits += 1
+            return results
+
+        self.fallbacks += 1
+        return await PARSING_SERVICE.parse(ModelType.DATETIME, text, culture)
+
+    @property
+    def stats(self) -> dict:
+        total = self.fast_hits + self.fallbacks
+        return {
+            "fast_hits": self.fast_hits,
+            "fallbacks": self.fallbacks,
+            "hit_rate": self.fast_hits / total if total else 0.0,
+        }
+
+
+DATE_PARSER = DateParser()
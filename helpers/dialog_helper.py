@@ -2,7 +2,7 @@
 # Licensed under the MIT License.
 """Utility to run dialogs."""
 from botbuilder.core import StatePropertyAccessor, TurnContext
-from botbuilder.dialogs import Dialog, DialogSet, DialogTurnStatus
+from botbuilder.dialogs import ComponentDialog, Dialog, DialogSet, DialogState, DialogTurnStatus
 
 
 class DialogHelper:
@@ -20,3 +20,16 @@ class DialogHelper:
         results = await dialog_context.continue_dialog()
         if results.status == DialogTurnStatus.Empty:
             await dialog_context.begin_dialog(dialog.id)
+
+    @staticmethod
+    def stack_depth(dialog_state: DialogState) -> int:
+        """Number of active dialogs, counting those inside component dialogs."""
+        if dialog_state is None:
+            return 0
+        depth = 0
+        for instance in dialog_state.dialog_stack:
+            depth += 1
+            inner = (instance.state or {}).get(ComponentDialog.persisted_dialog_state)
+            if isinstance(inner, DialogState):
+                depth += DialogHelper.stack_depth(inner)
+        return depth
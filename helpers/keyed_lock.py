@@ -0,0 +1,109 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""One-at-a-time execution per key, such as the turns of one conversation."""
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Hashable
+
+from helpers.metrics import LatencyHistogram
+
+
+class KeyedLock:
+    """
+    A FIFO lock per key. Callers for different keys never wait on each other;
+    callers for the same key get the lock in arrival order, handed from one
+    holder to the next so a newcomer can never jump the queue.
+
+    Waiting is bounded: ``acquire`` raises asyncio.TimeoutError after
+    ``max_wait`` seconds, and asyncio.QueueFull right away when ``max_waiters``
+    callers are already queued for the key. Either way the caller never got
+    the lock. Keys are forgotten as soon as nobody holds or waits for them.
+    """
+
+    def __init__(self, max_wait: float = None, max_waiters: int = None):
+        self.max_wait = max_wait
+        self.max_waiters = max_waiters
+        # Keys currently held, with the callers queued behind the holder.
+        self._queues: Dict[Hashable, Deque[asyncio.Future]] = {}
+
+        self.wait_time = LatencyHistogram()
+        self.acquired = 0
+        self.contended = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable):
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    async def acquire(self, key: Hashable) -> None:
+        queue = self._queues.get(key)
+        if queue is None:
+            self._queues[key] = deque()
+            self.acquired += 1
+            self.wait_time.observe(0)
+            return
+
+        if self.max_waiters is not None and len(queue) >= self.max_waiters:
+            self.rejected += 1
+            raise asyncio.QueueFull(f"{len(queue)} callers already waiting for {key!r}")
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        queue.append(waiter)
+        self.contended += 1
+        started = loop.time()
+        try:
+            # asyncio.wait leaves the waiter alone on timeout, so a hand-off
+            # racing with the deadline is still seen below.
+            await asyncio.wait({waiter}, timeout=self.max_wait)
+        except asyncio.CancelledError:
+            self._give_up(key, waiter)
+            raise
+        if not waiter.done():
+            self._give_up(key, waiter)
+            self.timeouts += 1
+            raise asyncio.TimeoutError(f"Waited over {self.max_wait}s for {key!r}")
+
+        self.acquired += 1
+        self.wait_time.observe(loop.time() - started)
+
+    def release(self, key: Hashable) -> None:
+        queue = self._queues[key]
+        while queue:
+            waiter = queue.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        del self._queues[key]
+
+    def _give_up(self, key: Hashable, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # The lock was handed over just as we stopped waiting: pass it on.
+            self.release(key)
+            return
+        waiter.cancel()
+        queue = self._queues.get(key)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+
+    def locked(self, key: Hashable) -> bool:
+        return key in self._queues
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "held": len(self._queues),
+            "waiting": sum(len(queue) for queue in self._queues.values()),
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "wait": self.wait_time.snapshot,
+        }
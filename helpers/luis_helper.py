@@ -1,15 +1,19 @@
 
+import logging
 from enum import Enum
 from typing import Dict
 from botbuilder.ai.luis import LuisRecognizer
 from botbuilder.core import IntentScore, TopIntent, TurnContext
 
 from booking_details import BookingDetails
+from timex_values import date_range
 
 # Package to help with Luis entities recognition
-from recognizers_date_time import DateTimeRecognizer
-from recognizers_text import Culture
-from recognizers_number import NumberRecognizer
+from helpers.date_parser import DATE_PARSER, date_range_timex
+from helpers.parsing_service import PARSING_SERVICE
+from helpers.recognizer_models import ModelType
+
+logger = logging.getLogger(__name__)
 
 
 class Intent(Enum):
@@ -36,13 +40,14 @@ class LuisHelper:
     ) -> (Intent, object):
         """
         Returns an object with preformatted LUIS results for the bot's dialogs to consume.
+        Errors and timeouts of the recognizer itself are raised to the caller.
         """
         result = None
         intent = None
 
-        try:
-            recognizer_result = await luis_recognizer.recognize(turn_context)
+        recognizer_result = await luis_recognizer.recognize(turn_context)
 
+        try:
             intent = (
                 sorted(
                     recognizer_result.intents,
@@ -67,6 +72,8 @@ class LuisHelper:
 
                 # Check and record datetime
                 potential_dates_list = []
+                # (start, end) of a range spoken in one go ("from Aug 13 to Aug 20")
+                potential_range = None
                 potential_city_list = []
                 potential_budget_list = []
                 datetime_entities = recognizer_result.entities.get("datetime", [])
@@ -78,9 +85,19 @@ class LuisHelper:
                         if datetime_entities[i]["type"] == 'date':
                             new_date = datetime_entities[i]["timex"][0]
                             potential_dates_list.append(new_date)
+                        elif datetime_entities[i]["type"] == 'daterange' and potential_range is None:
+                            potential_range = date_range(datetime_entities[i]["timex"][0])
 
                 # Check and record geographyV2_city
                 geographyV2_city_entities = recognizer_result.entities.get("geographyV2_city", [])
+                # The stock v3 recognizer reports them as geographyV2 {"location", "type"} entries.
+                geographyV2_city_entities = geographyV2_city_entities + [
+                    geography["location"]
+                    for geography in recognizer_result.entities.get("geographyV2", [])
+                    if isinstance(geography, dict)
+                    and geography.get("type") == "city"
+                    and geography.get("location")
+                ]
 
                 if len(geographyV2_city_entities) > 0:
                     
@@ -127,22 +144,28 @@ class LuisHelper:
                     result.origin = None
 
                 # Get the Start Date of the trip from Luis
-                date_obj = DateTimeRecognizer(Culture.English)
-                date_model = date_obj.get_datetime_model()
                 str_date_entities = recognizer_result.entities.get("str_date", [])
                 # As this might contains unformatted date/time, we will the recognozer to transform it
                 
                 if len(str_date_entities)>0:
                     if recognizer_result.entities.get("str_date", [])[0]:
                         str_date = recognizer_result.entities.get("str_date", [])[0]
-                        recog_date = date_model.parse(str_date)
-                        for resolution in recog_date[0].resolution["values"]:
-                            if "timex" in resolution:
-                                date = resolution["timex"]
-                                result.start_date = date
-                                break
+                        recog_date = await DATE_PARSER.parse(str_date)
+                        range_timex = date_range_timex(recog_date)
+                        if range_timex:
+                            # The start date entity spans the whole trip.
+                            potential_range = date_range(range_timex)
+                            result.start_date = potential_range[0]
+                        else:
+                            for resolution in recog_date[0].resolution["values"]:
+                                if "timex" in resolution:
+                                    date = resolution["timex"]
+                                    result.start_date = date
+                                    break
                     else:
                         result.start_date = None
+                elif potential_range is not None:
+                    result.start_date = potential_range[0]
                 elif len(potential_dates_list)>0 :
                     result.start_date = min(potential_dates_list)
                 else:
@@ -155,7 +178,7 @@ class LuisHelper:
                 if len(end_date_entities)>0:
                     if recognizer_result.entities.get("end_date", [])[0]:
                         end_date = recognizer_result.entities.get("end_date", [])[0]
-                        recog_date = date_model.parse(end_date)
+                        recog_date = await DATE_PARSER.parse(end_date)
                         for resolution in recog_date[0].resolution["values"]:
                             if "timex" in resolution:
                                 date = resolution["timex"]
@@ -163,6 +186,8 @@ class LuisHelper:
                                 break
                     else:
                         result.end_date = None
+                elif potential_range is not None:
+                    result.end_date = potential_range[1]
                 elif len(potential_dates_list)>0 :
                     result.end_date = max(potential_dates_list)
                 else:
@@ -170,12 +195,10 @@ class LuisHelper:
 
                 # Get the budget for the trip
                 budget_entities = recognizer_result.entities.get("budget", [])
-                bud_obj = NumberRecognizer(Culture.English)
-                bud_model = bud_obj.get_number_model()
                 if len(budget_entities) > 0:
                     if recognizer_result.entities.get("budget", [])[0]:
                         budget = recognizer_result.entities.get("budget", [])[0]
-                        recog_budget = bud_model.parse(budget)
+                        recog_budget = await PARSING_SERVICE.parse(ModelType.NUMBER, budget)
                         if recog_budget[0].resolution is not None:
                             budget = f"{recog_budget[0].resolution['value']}"
                             result.budget = budget
@@ -186,7 +209,7 @@ class LuisHelper:
                 else :
                     result.budget = None
 
-        except Exception as exception:
-            print(exception)
+        except Exception:
+            logger.exception("Could not read the booking details from the LUIS result")
 
         return intent, result
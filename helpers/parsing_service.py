@@ -0,0 +1,109 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Run CPU-bound Recognizers-Text parsing off the asyncio event loop."""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import List, NamedTuple
+
+from recognizers_text import Culture
+
+from helpers.recognizer_models import RECOGNIZER_MODELS
+
+
+class ParseResult(NamedTuple):
+    """Picklable subset of a Recognizers-Text ModelResult."""
+
+    text: str
+    start: int
+    end: int
+    type_name: str
+    resolution: dict
+
+
+def parse_text(model_type: str, culture: str, text: str) -> List[ParseResult]:
+    """Parse with the shared model, in whatever thread or process runs this."""
+    return [
+        ParseResult(result.text, result.start, result.end, result.type_name, result.resolution)
+        for result in RECOGNIZER_MODELS.get(model_type, culture).parse(text)
+    ]
+
+
+def _warm_worker(culture: str) -> None:
+    RECOGNIZER_MODELS.warm(culture)
+
+
+class ParsingService:
+    """
+    Parses text with the shared recognizer models in one of three modes:
+    "inline" on the event loop, "thread" in a thread pool, or "process" in a
+    process pool whose workers build their models once when they start.
+    The pools are started by ``start``, before serving, never by a turn.
+    """
+
+    INLINE = "inline"
+    THREAD = "thread"
+    PROCESS = "process"
+
+    def __init__(self, mode: str = INLINE, workers: int = None):
+        self.mode = mode
+        self.workers = workers
+        self._executor: Executor = None
+
+    def configure(self, mode: str, workers: int = None) -> None:
+        if mode not in (ParsingService.INLINE, ParsingService.THREAD, ParsingService.PROCESS):
+            raise ValueError(f"Unknown parsing mode: {mode}")
+        self.shutdown()
+        self.mode = mode
+        self.workers = workers or None
+
+    def start(self, culture: str = Culture.English) -> None:
+        """Create the executor and warm the models in every worker."""
+        if self.mode == ParsingService.INLINE or self._executor is not None:
+            return
+
+        if self.mode == ParsingService.THREAD:
+            # Threads share the process-wide models.
+            RECOGNIZER_MODELS.warm(culture)
+            self._executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="recognizers"
+            )
+            return
+
+        workers = self.workers or os.cpu_count() or 1
+        # Spawned workers do not inherit the event loop or telemetry threads.
+        self._executor = ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker,
+            initargs=(culture,),
+        )
+        # Start the workers now rather than on the first turns.
+        for future in [
+            self._executor.submit(_warm_worker, culture) for _ in range(workers)
+        ]:
+            future.result()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def parse(
+        self, model_type: str, text: str, culture: str = Culture.English
+    ) -> List[ParseResult]:
+        if self.mode == ParsingService.INLINE:
+            return parse_text(model_type, culture, text)
+
+        if self._executor is None:
+            raise RuntimeError(f"The {self.mode} parsing service is not started")
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, partial(parse_text, model_type, culture, text)
+        )
+
+
+# Shared by the LUIS helper, the dialogs and the prompts.
+PARSING_SERVICE = ParsingService()
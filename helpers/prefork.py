@@ -0,0 +1,272 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Serve one aiohttp app from several worker processes."""
+
+import asyncio
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import socket
+from typing import Callable, List, Optional
+
+from aiohttp import web
+
+try:
+    import uvloop
+except ImportError:  # Optional: workers run the default asyncio loop without it.
+    uvloop = None
+
+AppFactory = Callable[[Optional[list]], web.Application]
+
+logger = logging.getLogger(__name__)
+
+
+def new_event_loop(use_uvloop: bool = False) -> asyncio.AbstractEventLoop:
+    if use_uvloop:
+        if uvloop is not None:
+            return uvloop.new_event_loop()
+        logger.warning("uvloop is not installed, using the default asyncio event loop")
+    return asyncio.new_event_loop()
+
+
+async def _serve(
+    app: web.Application, host: str, port: int, path: str, ready, shutdown_timeout: float
+) -> None:
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signal_number, stopping.set)
+
+    runner = web.AppRunner(app, shutdown_timeout=shutdown_timeout)
+    # Startup hooks (model warmup, pools) run here, before the port is shared.
+    await runner.setup()
+    try:
+        if path:
+            site = web.UnixSite(runner, path)
+        else:
+            site = web.TCPSite(runner, host, port, reuse_port=True)
+        await site.start()
+        ready.set()
+        await stopping.wait()
+    finally:
+        # Stops accepting, then lets in-flight requests finish.
+        await runner.cleanup()
+
+
+def _run_worker(
+    app_factory: AppFactory,
+    host: str,
+    port: int,
+    path: str,
+    use_uvloop: bool,
+    ready,
+    shutdown_timeout: float,
+) -> None:
+    # The supervisor handles Ctrl+C; a worker only stops on SIGTERM.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    loop = new_event_loop(use_uvloop)
+    asyncio.set_event_loop(loop)
+    try:
+        app = app_factory(None)
+        loop.run_until_complete(_serve(app, host, port, path, ready, shutdown_timeout))
+    finally:
+        loop.close()
+
+
+class PreforkServer:
+    """
+    Runs ``workers`` processes that each build the app with ``app_factory``
+    and bind the same host and port with SO_REUSEPORT, so the kernel spreads
+    connections across them. Every worker has its own event loop and its own
+    copy of the bot, recognizers and state storage. With ``socket_dir`` set,
+    worker N listens on its own unix socket, ``worker_path(N)``, instead, for
+    a front dispatcher to pick the worker.
+
+    A worker counts as ready once its startup hooks have run and it listens.
+    Dead workers are replaced. SIGHUP restarts the workers one at a time, each
+    replacement ready before the worker it replaces drains and exits, so the
+    port is never left without a listener. SIGTTIN adds a worker, SIGTTOU
+    removes the last one, and SIGTERM or SIGINT stops them all.
+    """
+
+    def __init__(
+        self,
+        app_factory: AppFactory,
+        host: str,
+        port: int,
+        workers: int,
+        use_uvloop: bool = False,
+        shutdown_timeout: float = 60,
+        start_timeout: float = 120,
+        socket_dir: str = None,
+    ):
+        if socket_dir is None and not hasattr(socket, "SO_REUSEPORT"):
+            raise ValueError("Prefork serving needs SO_REUSEPORT, not available on this platform")
+        if workers < 1:
+            raise ValueError(f"Need at least one worker, got {workers}")
+        self.app_factory = app_factory
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.use_uvloop = use_uvloop
+        self.shutdown_timeout = shutdown_timeout
+        self.start_timeout = start_timeout
+        self.socket_dir = socket_dir
+        # Spawned workers do not inherit the event loop or telemetry threads.
+        self._context = multiprocessing.get_context("spawn")
+        # Worker processes by slot.
+        self._processes: List[multiprocessing.Process] = []
+        self._stopping = False
+        self._restart_requested = False
+        self._scale_requested = 0
+
+        self.started = 0
+        self.restarts = 0
+        self.crashes = 0
+
+    def worker_path(self, slot: int) -> Optional[str]:
+        if self.socket_dir is None:
+            return None
+        return os.path.join(self.socket_dir, f"worker-{slot}.sock")
+
+    def start_worker(self, slot: int) -> multiprocessing.Process:
+        """Start the worker for ``slot`` and wait until it listens."""
+        ready = self._context.Event()
+        process = self._context.Process(
+            target=_run_worker,
+            args=(
+                self.app_factory,
+                self.host,
+                self.port,
+                self.worker_path(slot),
+                self.use_uvloop,
+                ready,
+                self.shutdown_timeout,
+            ),
+            daemon=False,
+        )
+        process.start()
+        if not ready.wait(self.start_timeout):
+            self._stop_worker(process)
+            raise RuntimeError(f"Worker {process.pid} not ready after {self.start_timeout}s")
+        self.started += 1
+        return process
+
+    def start(self) -> None:
+        while len(self._processes) < self.workers:
+            self._processes.append(self.start_worker(len(self._processes)))
+
+    def restart_worker(self, slot: int) -> None:
+        # A unix socket path is taken over by the replacement; the old worker
+        # keeps its listening socket only to drain.
+        process = self._processes[slot]
+        self._processes[slot] = self.start_worker(slot)
+        self._stop_worker(process)
+        self.restarts += 1
+
+    def rolling_restart(self) -> None:
+        for slot in range(len(self._processes)):
+            self.restart_worker(slot)
+
+    def add_worker(self) -> int:
+        slot = len(self._processes)
+        self._processes.append(self.start_worker(slot))
+        self.workers += 1
+        return slot
+
+    def remove_worker(self) -> int:
+        if len(self._processes) <= 1:
+            raise ValueError("Cannot remove the last worker")
+        process = self._processes.pop()
+        self.workers -= 1
+        self._stop_worker(process)
+        return len(self._processes)
+
+    @property
+    def slots(self) -> List[int]:
+        return list(range(len(self._processes)))
+
+    def dead_workers(self) -> List[int]:
+        return [slot for slot, process in enumerate(self._processes) if not process.is_alive()]
+
+    def stop(self) -> None:
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes:
+            self._join(process)
+        self._processes = []
+
+    def _stop_worker(self, process: multiprocessing.Process) -> None:
+        if process.is_alive():
+            process.terminate()
+        self._join(process)
+
+    def _join(self, process: multiprocessing.Process) -> None:
+        # SIGTERM drains the worker; kill it if draining takes too long.
+        process.join(self.shutdown_timeout + 5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def replace_dead_worker(self, slot: int) -> None:
+        process = self._processes[slot]
+        logger.warning(
+            "Worker %s exited with code %s, restarting it", process.pid, process.exitcode
+        )
+        self.crashes += 1
+        self._processes[slot] = self.start_worker(slot)
+
+    def _replace_dead_workers(self) -> None:
+        for slot in self.dead_workers():
+            self.replace_dead_worker(slot)
+
+    def _on_stop_signal(self, *_) -> None:
+        self._stopping = True
+
+    def _on_restart_signal(self, *_) -> None:
+        self._restart_requested = True
+
+    def _on_scale_signal(self, signal_number, _) -> None:
+        self._scale_requested += 1 if signal_number == signal.SIGTTIN else -1
+
+    def _scale(self) -> None:
+        while self._scale_requested > 0:
+            self._scale_requested -= 1
+            self.add_worker()
+        while self._scale_requested < 0:
+            self._scale_requested += 1
+            if len(self._processes) > 1:
+                self.remove_worker()
+
+    def run(self) -> None:
+        """Start the workers and supervise them until SIGTERM or SIGINT."""
+        signal.signal(signal.SIGTERM, self._on_stop_signal)
+        signal.signal(signal.SIGINT, self._on_stop_signal)
+        signal.signal(signal.SIGHUP, self._on_restart_signal)
+        signal.signal(signal.SIGTTIN, self._on_scale_signal)
+        signal.signal(signal.SIGTTOU, self._on_scale_signal)
+        try:
+            self.start()
+            logger.info(
+                "Supervisor %s serving http://%s:%s with %d workers",
+                os.getpid(),
+                self.host,
+                self.port,
+                self.workers,
+            )
+            while not self._stopping:
+                multiprocessing.connection.wait(
+                    [process.sentinel for process in self._processes], timeout=1
+                )
+                if self._stopping:
+                    break
+                if self._restart_requested:
+                    self._restart_requested = False
+                    self.rolling_restart()
+                self._scale()
+                self._replace_dead_workers()
+        finally:
+            self.stop()
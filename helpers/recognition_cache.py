@@ -0,0 +1,112 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Bounded TTL/LRU cache for recognizer results."""
+
+import copy
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from botbuilder.core import RecognizerResult
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_utterance(text: str) -> str:
+    """Fold case and whitespace so trivially different utterances share an entry."""
+    return _WHITESPACE.sub(" ", text or "").strip().casefold()
+
+
+def _top_intent(result: RecognizerResult) -> Optional[str]:
+    if not result.intents:
+        return None
+    return max(result.intents, key=lambda name: result.intents[name].score)
+
+
+class RecognitionCache:
+    """
+    Caches RecognizerResult objects keyed by (app id, app version, normalized text).
+    Entries expire after ``ttl`` seconds; results whose top intent is None are
+    cached for ``none_ttl`` seconds so off-topic chatter stops reaching LUIS.
+    Least recently used entries are evicted once ``max_size`` is reached.
+    """
+
+    NONE_INTENT = "None"
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: float = 300.0,
+        none_ttl: float = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.none_ttl = ttl if none_ttl is None else none_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, RecognizerResult]]" = OrderedDict()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(app_id: str, app_version: str, text: str) -> Tuple[str, str, str]:
+        return app_id or "", app_version or "", normalize_utterance(text)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[RecognizerResult]:
+        """Return a copy of the cached result, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, result = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        if _top_intent(result) == self.NONE_INTENT:
+            self.negative_hits += 1
+
+        # Callers may mutate the result, so never hand out the cached instance.
+        return copy.deepcopy(result)
+
+    def put(self, key: Tuple[str, str, str], result: RecognizerResult) -> None:
+        ttl = self.none_ttl if _top_intent(result) == self.NONE_INTENT else self.ttl
+        if ttl <= 0:
+            return
+
+        self._entries[key] = (self._clock() + ttl, copy.deepcopy(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
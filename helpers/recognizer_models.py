@@ -0,0 +1,107 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Process-wide registry of Recognizers-Text models."""
+
+import logging
+import time
+from threading import Lock
+from typing import Dict, Tuple
+
+from recognizers_text import Culture, Model
+from recognizers_date_time import DateTimeRecognizer
+from recognizers_number import NumberRecognizer
+from recognizers_number_with_unit import NumberWithUnitRecognizer
+
+logger = logging.getLogger(__name__)
+
+
+class ModelType:
+    """Names of the models the bot relies on."""
+
+    DATETIME = "datetime"
+    NUMBER = "number"
+    CURRENCY = "currency"
+
+
+# The cultures Recognizers-Text has models for; it parses any other in English.
+SUPPORTED_CULTURES = tuple(
+    value for name, value in vars(Culture).items() if not name.startswith("_")
+)
+_CULTURES_BY_LANGUAGE = {culture.split("-")[0]: culture for culture in SUPPORTED_CULTURES}
+
+
+def normalize_culture(culture: str) -> str:
+    """
+    Map an activity locale ("en-US", "fr-CA", ...) to the supported culture
+    with its language, English when there is none, so clients cannot make
+    the registry build and keep a model per spelling.
+    """
+    culture = (culture or Culture.English).lower()
+    if culture in SUPPORTED_CULTURES:
+        return culture
+    return _CULTURES_BY_LANGUAGE.get(culture.split("-")[0], Culture.English)
+
+
+# How to build each model type for a given culture.
+_MODEL_FACTORIES = {
+    ModelType.DATETIME: lambda culture: DateTimeRecognizer(culture).get_datetime_model(),
+    ModelType.NUMBER: lambda culture: NumberRecognizer(culture).get_number_model(),
+    ModelType.CURRENCY: lambda culture: NumberWithUnitRecognizer(
+        culture
+    ).get_currency_model(),
+}
+
+
+class RecognizerModelRegistry:
+    """
+    Builds each (culture, model type) pair once and shares it across the process.
+    Building a model compiles hundreds of regexes, so this should be warmed at boot.
+    """
+
+    def __init__(self):
+        self._models: Dict[Tuple[str, str], Model] = {}
+        self._build_times: Dict[Tuple[str, str], float] = {}
+        self._lock = Lock()
+
+    def get(self, model_type: str, culture: str = Culture.English) -> Model:
+        """Return the shared model, building it on first use."""
+        key = (normalize_culture(culture), model_type)
+        model = self._models.get(key)
+        if model is None:
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    model = self._build(key)
+        return model
+
+    def warm(self, culture: str = Culture.English, model_types=None) -> Dict[str, float]:
+        """Build the requested models (all by default) and return their build times."""
+        for model_type in model_types or _MODEL_FACTORIES:
+            self.get(model_type, culture)
+        return self.build_times
+
+    @property
+    def build_times(self) -> Dict[str, float]:
+        """Seconds spent building each model, keyed by 'culture/model_type'."""
+        return {
+            f"{culture}/{model_type}": seconds
+            for (culture, model_type), seconds in self._build_times.items()
+        }
+
+    def _build(self, key: Tuple[str, str]) -> Model:
+        culture, model_type = key
+        if model_type not in _MODEL_FACTORIES:
+            raise ValueError(f"Unknown recognizer model type: {model_type}")
+
+        start = time.perf_counter()
+        model = _MODEL_FACTORIES[model_type](culture)
+        elapsed = time.perf_counter() - start
+
+        self._models[key] = model
+        self._build_times[key] = elapsed
+        logger.info("Built %s %s model in %.3fs", culture, model_type, elapsed)
+        return model
+
+
+# Shared by the LUIS helper and the dialogs.
+RECOGNIZER_MODELS = RecognizerModelRegistry()
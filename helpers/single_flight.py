@@ -0,0 +1,68 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Coalesce identical concurrent calls into a single in-flight awaitable."""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    The first caller for a key starts the call; callers arriving while it is
+    still running await the same task instead of starting their own.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(
+        self, key: Hashable, call: Callable[[], Awaitable]
+    ) -> Tuple[object, bool]:
+        """Return the call result and whether it was shared with an earlier caller."""
+        task = self._calls.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            # The call runs in its own task so cancelling one caller
+            # does not cancel the request the others are waiting on.
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            self._waiters[task] = 0
+            task.add_done_callback(lambda _: self._forget(key, task))
+
+        self._waiters[task] += 1
+        try:
+            return await asyncio.shield(task), shared
+        finally:
+            self._waiters[task] -= 1
+            if task.done() and not self._waiters[task]:
+                del self._waiters[task]
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if self._waiters.get(task) == 0:
+            del self._waiters[task]
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    @property
+    def waiters(self) -> int:
+        """Callers currently awaiting an in-flight call, leaders included."""
+        return sum(self._waiters.values())
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiters": self.waiters,
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
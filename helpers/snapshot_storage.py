@@ -0,0 +1,190 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""In-memory bot state kept as immutable pickled snapshots."""
+
+import pickle
+from typing import Dict, List
+
+from botbuilder.core import ConversationState, Storage, StoreItem, TurnContext, UserState
+from botbuilder.core.bot_state import CachedBotState
+
+# Snapshot of a whole item, for items that are not property dictionaries.
+WHOLE_ITEM = None
+
+# {property name: pickled value}
+Snapshot = Dict[str, bytes]
+
+
+def take_snapshot(item) -> Snapshot:
+    if isinstance(item, dict):
+        return {
+            name: pickle.dumps(value, pickle.HIGHEST_PROTOCOL) for name, value in item.items()
+        }
+    return {WHOLE_ITEM: pickle.dumps(item, pickle.HIGHEST_PROTOCOL)}
+
+
+def restore_snapshot(snapshot: Snapshot):
+    if WHOLE_ITEM in snapshot:
+        return pickle.loads(snapshot[WHOLE_ITEM])
+    return {name: pickle.loads(value) for name, value in snapshot.items()}
+
+
+def _snapshot_e_tag(snapshot: Snapshot):
+    if WHOLE_ITEM in snapshot:
+        return getattr(pickle.loads(snapshot[WHOLE_ITEM]), "e_tag", None)
+    if "e_tag" in snapshot:
+        return pickle.loads(snapshot["e_tag"])
+    return None
+
+
+class SnapshotMemoryStorage(Storage):
+    """
+    Storage keeping each item as a dictionary of pickled properties.
+
+    Snapshots are immutable bytes: a write replaces only the properties whose
+    bytes changed and shares the others with the previous version, and a
+    write that changes nothing is skipped. Reads return fresh objects, so
+    callers can never mutate what is stored. ETags follow MemoryStorage.
+    """
+
+    def __init__(self):
+        super(SnapshotMemoryStorage, self).__init__()
+        self.memory: Dict[str, Snapshot] = {}
+        self._e_tag = 0
+
+        self.writes = 0
+        self.skipped_writes = 0
+        self.dirty_properties = 0
+
+    async def read(self, keys: List[str]) -> Dict[str, StoreItem]:
+        return {
+            key: restore_snapshot(snapshot)
+            for key, snapshot in self.read_snapshots(keys).items()
+        }
+
+    def read_snapshots(self, keys: List[str]) -> Dict[str, Snapshot]:
+        return {key: self.memory[key] for key in keys or () if key in self.memory}
+
+    async def write(self, changes: Dict[str, StoreItem]):
+        if changes is None:
+            raise Exception("Changes are required when writing")
+        self.write_snapshots({key: take_snapshot(change) for key, change in changes.items()})
+
+    def write_snapshots(self, changes: Dict[str, Snapshot]) -> None:
+        for key, snapshot in changes.items():
+            old = self.memory.get(key)
+            old_e_tag = _snapshot_e_tag(old) if old else None
+            new_e_tag = _snapshot_e_tag(snapshot)
+            if new_e_tag == "":
+                raise Exception("snapshot_memory_storage.write(): etag missing")
+            if (
+                old_e_tag is not None
+                and new_e_tag is not None
+                and new_e_tag != "*"
+                and new_e_tag != old_e_tag
+            ):
+                raise KeyError(
+                    "Etag conflict.\nOriginal: %s\r\nCurrent: %s" % (new_e_tag, old_e_tag)
+                )
+
+            if old_e_tag:
+                # As in MemoryStorage, items only get a fresh e_tag once they have one.
+                snapshot = self._with_e_tag(snapshot, str(self._e_tag))
+            self._e_tag += 1
+
+            if old == snapshot:
+                self.skipped_writes += 1
+                continue
+            old = old or {}
+            merged = {}
+            for name, value in snapshot.items():
+                previous = old.get(name)
+                if previous == value:
+                    merged[name] = previous
+                else:
+                    merged[name] = value
+                    self.dirty_properties += 1
+            self.memory[key] = merged
+            self.writes += 1
+
+    @staticmethod
+    def _with_e_tag(snapshot: Snapshot, e_tag: str) -> Snapshot:
+        if WHOLE_ITEM not in snapshot:
+            return {**snapshot, "e_tag": pickle.dumps(e_tag, pickle.HIGHEST_PROTOCOL)}
+        item = restore_snapshot(snapshot)
+        item.e_tag = e_tag
+        return take_snapshot(item)
+
+    async def delete(self, keys: List[str]):
+        for key in keys:
+            self.memory.pop(key, None)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.memory),
+            "bytes": sum(
+                len(value) for snapshot in self.memory.values() for value in snapshot.values()
+            ),
+            "writes": self.writes,
+            "skipped_writes": self.skipped_writes,
+            "dirty_properties": self.dirty_properties,
+        }
+
+
+class _SnapshotCachedBotState(CachedBotState):
+    """Change detection on pickled snapshots instead of jsonpickle flattening."""
+
+    def __init__(self, state: Dict[str, object] = None, snapshot: Snapshot = None):
+        # pylint: disable=super-init-not-called
+        self.state = state if state is not None else {}
+        self.hash = snapshot if snapshot is not None else self.compute_hash(self.state)
+
+    def compute_hash(self, obj: object) -> Snapshot:
+        return take_snapshot(obj or {})
+
+
+class SnapshotStateMixin:
+    """
+    BotState that loads state from its snapshots and saves only when a
+    property's pickled bytes changed. With SnapshotMemoryStorage the
+    snapshots taken for change detection are stored as they are, so a turn
+    costs one unpickle on load and one pickle on save.
+    """
+
+    async def load(self, turn_context: TurnContext, force: bool = False) -> None:
+        cached_state = self.get_cached_state(turn_context)
+        if force or not cached_state or not cached_state.state:
+            storage_key = self.get_storage_key(turn_context)
+            if isinstance(self._storage, SnapshotMemoryStorage):
+                snapshot = self._storage.read_snapshots([storage_key]).get(storage_key)
+                state = restore_snapshot(snapshot) if snapshot else None
+                cached_state = _SnapshotCachedBotState(state, snapshot)
+            else:
+                items = await self._storage.read([storage_key])
+                cached_state = _SnapshotCachedBotState(items.get(storage_key))
+            turn_context.turn_state[self._context_service_key] = cached_state
+
+    async def save_changes(self, turn_context: TurnContext, force: bool = False) -> None:
+        cached_state = self.get_cached_state(turn_context)
+        if cached_state is None:
+            return
+
+        snapshot = take_snapshot(cached_state.state)
+        if not force and snapshot == cached_state.hash:
+            return
+
+        storage_key = self.get_storage_key(turn_context)
+        if isinstance(self._storage, SnapshotMemoryStorage):
+            self._storage.write_snapshots({storage_key: snapshot})
+        else:
+            await self._storage.write({storage_key: cached_state.state})
+        cached_state.hash = snapshot
+
+
+class SnapshotConversationState(SnapshotStateMixin, ConversationState):
+    pass
+
+
+class SnapshotUserState(SnapshotStateMixin, UserState):
+    pass
@@ -0,0 +1,263 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Bot state storage in a local SQLite file."""
+
+import asyncio
+import pickle
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from botbuilder.core import Storage, StoreItem
+
+# (version, e_tag, pickled value) of a stored item.
+Row = Tuple[int, Optional[str], bytes]
+
+
+def _get_e_tag(item) -> Optional[str]:
+    if isinstance(item, dict):
+        return item.get("e_tag", None)
+    return getattr(item, "e_tag", None)
+
+
+def _set_e_tag(item, e_tag: str) -> None:
+    if isinstance(item, dict):
+        item["e_tag"] = e_tag
+    elif hasattr(item, "e_tag"):
+        item.e_tag = e_tag
+
+
+class SqliteStorage(Storage):
+    """
+    Storage in a SQLite database in WAL mode, so state survives restarts and
+    can be opened by several processes.
+
+    Items are pickled. ETags follow MemoryStorage: a write carrying an e_tag
+    other than "*" fails with KeyError unless it matches the stored one.
+
+    Writes arriving while a transaction runs are queued and committed together
+    in the next one; every caller still waits for the commit holding its write,
+    so conflicts surface to the caller. Reads go through an LRU cache of the
+    pickled rows. With ``shared=True`` each read first asks SQLite whether
+    another connection committed since the last check and drops the cache if so;
+    without it the cache assumes this process is the only writer.
+
+    All SQLite calls run on one dedicated thread, off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        cache_size: int = 10000,
+        max_batch: int = 512,
+        shared: bool = False,
+    ):
+        super(SqliteStorage, self).__init__()
+        self.path = path
+        self.cache_size = cache_size
+        self.max_batch = max_batch
+        self.shared = shared
+
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="sqlite-storage")
+        self._connection: sqlite3.Connection = self._executor.submit(self._connect).result()
+        self._data_version = None
+
+        self._cache: "OrderedDict[str, Row]" = OrderedDict()
+        self._pending: List[tuple] = []
+        self._flush_task: asyncio.Future = None
+
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.commits = 0
+        self.writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode NORMAL only syncs at checkpoints: a power loss may drop
+        # the last commits but never corrupts the file.
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "key TEXT PRIMARY KEY, version INTEGER NOT NULL, e_tag TEXT, value BLOB NOT NULL)"
+        )
+        return connection
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def read(self, keys: List[str]) -> Dict[str, StoreItem]:
+        data = {}
+        if not keys:
+            return data
+
+        misses = [key for key in keys if key not in self._cache]
+        self.cache_hits += len(keys) - len(misses)
+        self.cache_misses += len(misses)
+        rows = {}
+        if misses or self.shared:
+            stale, rows = await self._run(self._select, misses, keys if self.shared else ())
+            if stale:
+                self._cache.clear()
+            for key, row in rows.items():
+                self._remember(key, row)
+
+        for key in keys:
+            row = rows.get(key) or self._cache.get(key)
+            if row is None:
+                continue
+            item = pickle.loads(row[2])
+            if row[1] is not None:
+                _set_e_tag(item, row[1])
+            data[key] = item
+        return data
+
+    def _select(self, misses: List[str], all_keys) -> Tuple[bool, Dict[str, Row]]:
+        stale = bool(all_keys) and self._changed_elsewhere()
+        if stale:
+            misses = list(all_keys)
+        if not misses:
+            return stale, {}
+        placeholders = ",".join("?" * len(misses))
+        cursor = self._connection.execute(
+            f"SELECT key, version, e_tag, value FROM state WHERE key IN ({placeholders})",
+            misses,
+        )
+        return stale, {key: (version, e_tag, value) for key, version, e_tag, value in cursor}
+
+    def _changed_elsewhere(self) -> bool:
+        """Whether another connection committed since the last call (own commits do not count)."""
+        version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+        changed = self._data_version is not None and version != self._data_version
+        self._data_version = version
+        return changed
+
+    async def write(self, changes: Dict[str, StoreItem]):
+        if changes is None:
+            raise Exception("Changes are required when writing")
+        if not changes:
+            return
+
+        operations = []
+        for key, change in changes.items():
+            e_tag = _get_e_tag(change)
+            if e_tag == "":
+                raise Exception("sqlite_storage.write(): etag missing")
+            # Pickled now, so later changes by the caller are not written.
+            operations.append(("write", key, e_tag, pickle.dumps(change, pickle.HIGHEST_PROTOCOL)))
+        await asyncio.gather(*[self._enqueue(operation) for operation in operations])
+
+    async def delete(self, keys: List[str]):
+        await asyncio.gather(*[self._enqueue(("delete", key, None, None)) for key in keys])
+
+    def _enqueue(self, operation: tuple) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(operation + (future,))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush())
+        return future
+
+    async def _flush(self):
+        while self._pending:
+            batch = self._pending[: self.max_batch]
+            del self._pending[: self.max_batch]
+            try:
+                stale, results = await self._run(
+                    self._commit, [operation[:4] for operation in batch]
+                )
+            except Exception as error:  # pylint: disable=broad-except
+                stale, results = True, [error] * len(batch)
+            if stale:
+                self._cache.clear()
+
+            self.commits += 1
+            for (operation, key, _, _, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    if not future.done():
+                        future.set_exception(result)
+                    continue
+                if operation == "delete":
+                    self._cache.pop(key, None)
+                else:
+                    self.writes += 1
+                    self._remember(key, result)
+                if not future.done():
+                    future.set_result(None)
+
+    def _commit(self, batch: List[tuple]) -> Tuple[bool, List[object]]:
+        """Apply a batch in one transaction, failing only the conflicting writes."""
+        results = []
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # No one else can commit while we hold the write lock.
+            stale = self.shared and self._changed_elsewhere()
+            for operation, key, new_e_tag, value in batch:
+                if operation == "delete":
+                    connection.execute("DELETE FROM state WHERE key = ?", (key,))
+                    results.append(None)
+                    continue
+
+                old = connection.execute(
+                    "SELECT version, e_tag FROM state WHERE key = ?", (key,)
+                ).fetchone()
+                old_version, old_e_tag = old if old else (0, None)
+                if (
+                    old_e_tag is not None
+                    and new_e_tag is not None
+                    and new_e_tag != "*"
+                    and new_e_tag != old_e_tag
+                ):
+                    results.append(
+                        KeyError(
+                            "Etag conflict.\nOriginal: %s\r\nCurrent: %s" % (new_e_tag, old_e_tag)
+                        )
+                    )
+                    continue
+
+                version = old_version + 1
+                # As in MemoryStorage, items only get a fresh e_tag once they have one.
+                e_tag = str(version) if old_e_tag else new_e_tag
+                connection.execute(
+                    "INSERT OR REPLACE INTO state (key, version, e_tag, value) VALUES (?, ?, ?, ?)",
+                    (key, version, e_tag, value),
+                )
+                results.append((version, e_tag, value))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return stale, results
+
+    def _remember(self, key: str, row: Row) -> None:
+        if self.cache_size <= 0:
+            return
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > row[0]:
+            return
+        self._cache[key] = row
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def close(self) -> None:
+        """Wait for queued writes, then close the database."""
+        if self._flush_task is not None:
+            await self._flush_task
+        if self._connection is not None:
+            await self._run(self._connection.close)
+            self._connection = None
+        self._executor.shutdown(wait=True)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "cached": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "writes": self.writes,
+            "commits": self.commits,
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,285 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Validate each inbound Bot Framework token once, with signing keys kept warm."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import aiohttp
+from botframework.connector.auth import (
+    AuthenticationConstants,
+    ChannelValidation,
+    ClaimsIdentity,
+    JwtTokenExtractor,
+)
+from jwt.algorithms import RSAAlgorithm
+
+from helpers.metrics import LatencyHistogram
+from helpers.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class VerifiedTokenCache:
+    """
+    Keeps the claims of inbound tokens that passed validation, keyed by a
+    SHA-256 of the Authorization header with the channel id and service URL
+    they were checked against. An entry lives until the token's ``exp`` claim;
+    tokens without one are never cached, nor are failed validations. Least
+    recently used entries are evicted past ``max_size``. Concurrent requests
+    carrying the same new token share one validation.
+    """
+
+    def __init__(self, max_size: int = 10000, clock: Callable[[], float] = time.time):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+
+        self.max_size = max_size
+        # Wall-clock time, to compare with the tokens' exp claims.
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, ClaimsIdentity]]" = OrderedDict()
+        self._validations = SingleFlight()
+
+        self.validation_time = LatencyHistogram()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(auth_header: str, channel_id: str, service_url: str) -> str:
+        material = "\n".join((auth_header, channel_id or "", service_url or ""))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[ClaimsIdentity]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, identity = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return _copy_identity(identity)
+
+    def put(self, key: str, identity: ClaimsIdentity) -> None:
+        try:
+            expires_at = float(identity.claims["exp"])
+        except (KeyError, TypeError, ValueError):
+            return
+        if not identity.is_authenticated or expires_at <= self._clock():
+            return
+
+        self._entries[key] = (expires_at, _copy_identity(identity))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def validate(
+        self,
+        auth_header: str,
+        channel_id: str,
+        service_url: str,
+        validate: Callable[[], Awaitable[ClaimsIdentity]],
+    ) -> ClaimsIdentity:
+        """The cached identity for the header, or the result of ``validate()``."""
+        key = self.make_key(auth_header, channel_id, service_url)
+        identity = self.get(key)
+        if identity is not None:
+            self.hits += 1
+            return identity
+
+        self.misses += 1
+
+        async def validate_and_store() -> ClaimsIdentity:
+            started = time.perf_counter()
+            identity = await validate()
+            self.validation_time.observe(time.perf_counter() - started)
+            self.put(key, identity)
+            return identity
+
+        identity, _ = await self._validations.do(key, validate_and_store)
+        return _copy_identity(identity)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self._validations.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "validation": self.validation_time.snapshot,
+        }
+
+
+def _copy_identity(identity: ClaimsIdentity) -> ClaimsIdentity:
+    # Callers may add claims, so never hand out the cached instance.
+    return ClaimsIdentity(
+        dict(identity.claims), identity.is_authenticated, identity.authentication_type
+    )
+
+
+class SigningKey(NamedTuple):
+    """A parsed OpenID signing key, as JwtTokenExtractor expects it."""
+
+    public_key: object
+    endorsements: List[str]
+
+
+class OpenIdSigningKeys:
+    """
+    The signing keys of one OpenID metadata document, parsed once per refresh.
+
+    Stands in for botframework-connector's metadata cache entry, which
+    re-parses the key on every token and, once a day, fetches new keys with
+    blocking HTTP calls on the event loop. Here ``refresh`` runs in the
+    background; a token only waits for it on first use, or when it names a
+    key that is unknown and the keys are older than ``min_refresh_interval``
+    seconds (a key rollover).
+    """
+
+    def __init__(self, url: str, min_refresh_interval: float = 300, timeout: float = 10):
+        self.url = url
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self._keys: Dict[str, SigningKey] = {}
+        self._refreshed_at: float = None
+        self._refreshing: asyncio.Task = None
+
+        self.refreshes = 0
+        self.failures = 0
+
+    async def get(self, key_id: str) -> SigningKey:
+        if self._refreshed_at is None:
+            await self.refresh()
+        key = self._keys.get(key_id)
+        if key is None and time.monotonic() - self._refreshed_at >= self.min_refresh_interval:
+            await self.refresh()
+            key = self._keys.get(key_id)
+        if key is None:
+            raise PermissionError(f"Unknown signing key {key_id!r}")
+        return key
+
+    async def refresh(self) -> None:
+        """Fetch the keys; callers arriving during a refresh wait for the same one."""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self._refresh())
+        await asyncio.shield(self._refreshing)
+
+    async def _refresh(self) -> None:
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        try:
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(self.url) as response:
+                    response.raise_for_status()
+                    keys_url = (await response.json(content_type=None))["jwks_uri"]
+                async with session.get(keys_url) as response:
+                    response.raise_for_status()
+                    keys = (await response.json(content_type=None))["keys"]
+            self._keys = {
+                key["kid"]: SigningKey(
+                    RSAAlgorithm.from_jwk(json.dumps(key)), key.get("endorsements", [])
+                )
+                for key in keys
+            }
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            # A failed refresh keeps the old keys and is not retried per token.
+            self._refreshed_at = time.monotonic()
+        self.refreshes += 1
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._keys),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "age": None if self._refreshed_at is None else time.monotonic() - self._refreshed_at,
+        }
+
+
+def default_metadata_urls() -> List[str]:
+    return [
+        ChannelValidation.open_id_metadata_endpoint
+        or AuthenticationConstants.TO_BOT_FROM_CHANNEL_OPENID_METADATA_URL,
+        AuthenticationConstants.TO_BOT_FROM_EMULATOR_OPENID_METADATA_URL,
+    ]
+
+
+class SigningKeyRefresher:
+    """
+    Installs OpenIdSigningKeys for ``urls`` in JwtTokenExtractor's metadata
+    cache, so the stock validators use them, and refreshes them all every
+    ``interval`` seconds. A failed refresh keeps the previous keys and is
+    retried after ``retry_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str] = None,
+        interval: float = 12 * 3600,
+        retry_interval: float = 60,
+    ):
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.signing_keys = {
+            url: OpenIdSigningKeys(url) for url in (urls or default_metadata_urls())
+        }
+        self._task: asyncio.Task = None
+
+    def install(self) -> None:
+        for url, keys in self.signing_keys.items():
+            JwtTokenExtractor.metadataCache[url] = keys
+
+    def start(self) -> None:
+        self.install()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh(self) -> bool:
+        """Refresh every document now; True when they all succeeded."""
+        results = await asyncio.gather(
+            *[keys.refresh() for keys in self.signing_keys.values()], return_exceptions=True
+        )
+        for url, result in zip(self.signing_keys, results):
+            if isinstance(result, Exception):
+                logger.warning("Could not refresh the signing keys of %s: %s", url, result)
+        return not any(isinstance(result, Exception) for result in results)
+
+    async def _run(self) -> None:
+        while True:
+            refreshed = await self.refresh()
+            await asyncio.sleep(self.interval if refreshed else self.retry_interval)
+
+    @property
+    def stats(self) -> dict:
+        return {url: keys.stats for url, keys in self.signing_keys.items()}
@@ -0,0 +1,167 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Native async client for the LUIS v3 prediction endpoint."""
+
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+from botbuilder.core import IntentScore, Recognizer, RecognizerResult, TurnContext
+
+from config import DefaultConfig
+
+# Machine learned entities LuisHelper reads as plain strings.
+TEXT_ENTITIES = ("dst_city", "or_city", "str_date", "end_date", "budget")
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LuisPredictionError(Exception):
+    """Raised when LUIS cannot give a prediction before the deadline."""
+
+
+class LuisPredictionClient(Recognizer):
+    """
+    Calls the LUIS v3 prediction endpoint over one keep-alive connection pool
+    shared by the whole process. Each query gets a deadline covering all of its
+    attempts, and failed attempts are retried with jittered exponential backoff.
+    Only the fields LuisHelper consumes are parsed from the response.
+    """
+
+    _session: Optional[aiohttp.ClientSession] = None
+    _session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __init__(
+        self,
+        configuration: DefaultConfig,
+        slot: str = "production",
+    ):
+        endpoint = configuration.LUIS_API_HOST_NAME
+        if "://" not in endpoint:
+            endpoint = "https://" + endpoint
+        self._url = (
+            f"{endpoint.rstrip('/')}/luis/prediction/v3.0/apps/"
+            f"{configuration.LUIS_APP_ID}/slots/{slot}/predict"
+        )
+        self._headers = {"Ocp-Apim-Subscription-Key": configuration.LUIS_API_KEY}
+        self._timeout = configuration.LUIS_TIMEOUT
+        self._max_retries = configuration.LUIS_MAX_RETRIES
+        self._backoff = configuration.LUIS_RETRY_BACKOFF
+        self._pool_size = configuration.LUIS_POOL_SIZE
+
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    @classmethod
+    def session(cls, pool_size: int = 100) -> aiohttp.ClientSession:
+        """The process-wide session, created on first use in the running loop."""
+        loop = asyncio.get_running_loop()
+        if cls._session is None or cls._session.closed or cls._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=pool_size, keepalive_timeout=60, ttl_dns_cache=300
+            )
+            cls._session = aiohttp.ClientSession(connector=connector)
+            cls._session_loop = loop
+        return cls._session
+
+    @classmethod
+    async def close(cls) -> None:
+        if cls._session is not None and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+        cls._session_loop = None
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        return await self.predict(turn_context.activity.text)
+
+    async def predict(self, utterance: str) -> RecognizerResult:
+        deadline = time.monotonic() + self._timeout
+        body = {"query": utterance, "options": {"preferExternalEntities": True}}
+        params = {"verbose": "false", "show-all-intents": "false", "log": "true"}
+
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.failures += 1
+                raise LuisPredictionError(f"LUIS deadline of {self._timeout}s exceeded")
+
+            self.requests += 1
+            try:
+                async with self.session(self._pool_size).post(
+                    self._url,
+                    json=body,
+                    params=params,
+                    headers=self._headers,
+                    timeout=aiohttp.ClientTimeout(total=remaining),
+                ) as response:
+                    if response.status == 200:
+                        return self.parse(utterance, await response.json())
+                    error = LuisPredictionError(f"LUIS returned HTTP {response.status}")
+                    retryable = response.status in RETRY_STATUSES
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
+                error = LuisPredictionError(f"LUIS request failed: {exception!r}")
+                retryable = True
+
+            if not retryable or attempt >= self._max_retries:
+                self.failures += 1
+                raise error
+
+            # Full jitter keeps retrying workers from hitting LUIS in lockstep.
+            delay = random.uniform(0, self._backoff * 2 ** attempt)
+            await asyncio.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            attempt += 1
+            self.retries += 1
+
+    @staticmethod
+    def parse(utterance: str, payload: dict) -> RecognizerResult:
+        """Map a v3 prediction to the entity shape LuisHelper reads."""
+        prediction = payload.get("prediction", {})
+        top_intent = prediction.get("topIntent")
+        intents = {}
+        if top_intent:
+            score = prediction.get("intents", {}).get(top_intent, {}).get("score", 0.0)
+            intents[top_intent] = IntentScore(score)
+
+        luis_entities = prediction.get("entities", {})
+        entities: Dict[str, List] = {}
+
+        for name in TEXT_ENTITIES:
+            values = [value for value in luis_entities.get(name, []) if isinstance(value, str)]
+            if values:
+                entities[name] = values
+
+        cities = [
+            geography["value"]
+            for geography in luis_entities.get("geographyV2", [])
+            if geography.get("type") == "city"
+        ]
+        if cities:
+            entities["geographyV2_city"] = cities
+
+        if luis_entities.get("number"):
+            entities["number"] = list(luis_entities["number"])
+
+        datetimes = [
+            {
+                "type": datetime_entity.get("type"),
+                "timex": [value["timex"] for value in datetime_entity.get("values", [])],
+            }
+            for datetime_entity in luis_entities.get("datetimeV2", [])
+        ]
+        if datetimes:
+            entities["datetime"] = datetimes
+
+        return RecognizerResult(
+            text=utterance, altered_text=None, intents=intents, entities=entities
+        )
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
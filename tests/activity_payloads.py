@@ -0,0 +1,150 @@
+"""Incoming activities as the channels post them to /api/messages."""
+
+EMULATOR_CONVERSATION_UPDATE = {
+    "type": "conversationUpdate",
+    "id": "0f3a7c10-8ab4-11ed-9d8e-0b3c1f1e2d3a",
+    "timestamp": "2023-01-02T09:14:03.123Z",
+    "localTimestamp": "2023-01-02T10:14:03+01:00",
+    "localTimezone": "Europe/Paris",
+    "serviceUrl": "http://localhost:58391",
+    "channelId": "emulator",
+    "from": {"id": "3c8e3c52-4a73-4e46-9f0c-1b3f3f0e6c11", "name": "User", "role": "user"},
+    "conversation": {"id": "1f2b2ae0-8ab4-11ed-9d8e-0b3c1f1e2d3a|livechat"},
+    "recipient": {"id": "1e7d0a40-8ab4-11ed-9d8e-0b3c1f1e2d3a", "name": "Bot", "role": "bot"},
+    "membersAdded": [
+        {"id": "1e7d0a40-8ab4-11ed-9d8e-0b3c1f1e2d3a", "name": "Bot"},
+        {"id": "3c8e3c52-4a73-4e46-9f0c-1b3f3f0e6c11", "name": "User"},
+    ],
+    "membersRemoved": [],
+}
+
+EMULATOR_MESSAGE = {
+    "type": "message",
+    "id": "2a5e1f90-8ab4-11ed-a1b2-2d4c6e8f0a1b",
+    "timestamp": "2023-01-02T09:14:12.456Z",
+    "localTimestamp": "2023-01-02T10:14:12+01:00",
+    "localTimezone": "Europe/Paris",
+    "serviceUrl": "http://localhost:58391",
+    "channelId": "emulator",
+    "from": {"id": "3c8e3c52-4a73-4e46-9f0c-1b3f3f0e6c11", "name": "User", "role": "user"},
+    "conversation": {"id": "1f2b2ae0-8ab4-11ed-9d8e-0b3c1f1e2d3a|livechat"},
+    "recipient": {"id": "1e7d0a40-8ab4-11ed-9d8e-0b3c1f1e2d3a", "name": "Bot", "role": "bot"},
+    "textFormat": "plain",
+    "locale": "en-US",
+    "text": "book a flight from Paris to London on May 5th for 500 euros",
+    "attachments": [],
+    "entities": [
+        {
+            "type": "ClientCapabilities",
+            "requiresBotState": True,
+            "supportsListening": True,
+            "supportsTts": True,
+        }
+    ],
+    "channelData": {"clientActivityID": "16726508524560.h1bj5x0k1yr", "clientTimestamp": "2023-01-02T09:14:12.456Z"},
+}
+
+WEBCHAT_MESSAGE = {
+    "type": "message",
+    "id": "Ab3dEfGhIjK5LmNoPqRsTu-us|0000004",
+    "timestamp": "2023-01-02T09:20:41.9186043Z",
+    "localTimestamp": "2023-01-02T10:20:41.703+01:00",
+    "localTimezone": "Europe/Paris",
+    "serviceUrl": "https://webchat.botframework.com/",
+    "channelId": "webchat",
+    "from": {"id": "dl_16726512417030.w6ik3s7g0bk", "name": "You"},
+    "conversation": {"id": "Ab3dEfGhIjK5LmNoPqRsTu-us"},
+    "recipient": {"id": "flight-booking-bot@Zq1x2y3w4v5", "name": "flight-booking-bot"},
+    "textFormat": "plain",
+    "locale": "fr-FR",
+    "text": "from 2023-05-05 to 2023-05-12",
+    "entities": [
+        {
+            "type": "ClientCapabilities",
+            "requiresBotState": True,
+            "supportsListening": True,
+            "supportsTts": True,
+        }
+    ],
+    "channelData": {"clientActivityID": "16726512417030.a3k0x2lq9ul"},
+}
+
+TEAMS_MESSAGE = {
+    "text": "<at>Flight Booking</at> I want to go to Berlin",
+    "textFormat": "plain",
+    "attachments": [
+        {
+            "contentType": "text/html",
+            "content": "<div><div><span itemscope=\"\" itemtype=\"http://schema.skype.com/Mention\" itemid=\"0\">Flight Booking</span> I want to go to Berlin</div></div>",
+        }
+    ],
+    "type": "message",
+    "timestamp": "2023-01-02T09:31:55.4417251Z",
+    "localTimestamp": "2023-01-02T10:31:55.4417251+01:00",
+    "id": "1672651915418",
+    "channelId": "msteams",
+    "serviceUrl": "https://smba.trafficmanager.net/emea/",
+    "from": {
+        "id": "29:1XJKJMvc5GBtc2JwZq0oj8tHZmzrQgFmB39ATiQWA85gQtHieVkKilBZ9XHoq9j7Zaqt7CZ-NJWi7me2kHTL3Bw",
+        "name": "Megan Bowen",
+        "aadObjectId": "a1b2c3d4-e5f6-4a5b-8c9d-0e1f2a3b4c5d",
+    },
+    "conversation": {
+        "isGroup": True,
+        "conversationType": "channel",
+        "tenantId": "72f988bf-86f1-41af-91ab-2d7cd011db47",
+        "id": "19:a1b2c3d4e5f64a5b8c9d0e1f2a3b4c5d@thread.skype;messageid=1672651915418",
+    },
+    "recipient": {"id": "28:0a1b2c3d-4e5f-6a7b-8c9d-0e1f2a3b4c5d", "name": "Flight Booking"},
+    "entities": [
+        {
+            "mentioned": {"id": "28:0a1b2c3d-4e5f-6a7b-8c9d-0e1f2a3b4c5d", "name": "Flight Booking"},
+            "text": "<at>Flight Booking</at>",
+            "type": "mention",
+        },
+        {"locale": "en-US", "country": "US", "platform": "Web", "timezone": "Europe/Paris", "type": "clientInfo"},
+    ],
+    "channelData": {
+        "teamsChannelId": "19:a1b2c3d4e5f64a5b8c9d0e1f2a3b4c5d@thread.skype",
+        "teamsTeamId": "19:f0e1d2c3b4a54968a7b6c5d4e3f2a1b0@thread.skype",
+        "channel": {"id": "19:a1b2c3d4e5f64a5b8c9d0e1f2a3b4c5d@thread.skype"},
+        "team": {"id": "19:f0e1d2c3b4a54968a7b6c5d4e3f2a1b0@thread.skype"},
+        "tenant": {"id": "72f988bf-86f1-41af-91ab-2d7cd011db47"},
+    },
+    "locale": "en-US",
+    "localTimezone": "Europe/Paris",
+}
+
+DIRECT_LINE_CARD_ANSWER = {
+    "type": "message",
+    "id": "Hb8kQ2nYz3JFw1xAjzT9Q1-eu|0000012",
+    "timestamp": "2023-01-02T09:40:10.0000000Z",
+    "serviceUrl": "https://europe.directline.botframework.com/",
+    "channelId": "directline",
+    "from": {"id": "user-42", "name": "Traveller"},
+    "conversation": {"id": "Hb8kQ2nYz3JFw1xAjzT9Q1-eu"},
+    "recipient": {"id": "flight-booking-bot", "name": "flight-booking-bot"},
+    "locale": "en-GB",
+    "replyToId": "Hb8kQ2nYz3JFw1xAjzT9Q1-eu|0000011",
+    "value": {"action": "confirm", "budget": "500 euros"},
+    "attachments": [
+        {
+            "contentType": "application/vnd.microsoft.card.hero",
+            "content": {"title": "Confirm", "buttons": [{"type": "imBack", "title": "Yes", "value": "yes"}]},
+        }
+    ],
+    "suggestedActions": {
+        "to": ["user-42"],
+        "actions": [{"type": "imBack", "title": "Yes", "value": "yes"}],
+    },
+    "callerId": "urn:botframework:azure",
+    "someFutureField": {"ignored": True},
+}
+
+PAYLOADS = {
+    "emulator conversationUpdate": EMULATOR_CONVERSATION_UPDATE,
+    "emulator message": EMULATOR_MESSAGE,
+    "webchat message": WEBCHAT_MESSAGE,
+    "teams channel message": TEAMS_MESSAGE,
+    "directline card answer": DIRECT_LINE_CARD_ANSWER,
+}
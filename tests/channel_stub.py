@@ -0,0 +1,100 @@
+"""Local stand-in for a channel's Connector service and its token endpoint.
+
+Run it on its own with ``python -m tests.channel_stub --port 8020`` and use
+http://127.0.0.1:8020 as the serviceUrl of the activities posted to the bot.
+"""
+
+import argparse
+import asyncio
+import uuid
+
+from aiohttp import web
+
+ACTIVITIES_ROUTE = "/v3/conversations/{conversation_id}/activities"
+REPLY_ROUTE = "/v3/conversations/{conversation_id}/activities/{activity_id}"
+TOKEN_ROUTE = "/{tenant}/oauth2/v2.0/token"
+
+
+class ChannelStub:
+    """
+    Accepts the activities a bot sends and issues its app tokens, counting
+    requests, connections and tokens. Requests signed with a revoked token
+    get a 401.
+    """
+
+    def __init__(self, delay: float = 0.0, token_lifetime: int = 3600):
+        self.delay = delay
+        self.token_lifetime = token_lifetime
+        self.activities = []
+        self.authorizations = []
+        self.connections = set()
+        self.token_requests = 0
+        self.revoked = set()
+        self._runner = None
+        self.port = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def login_endpoint(self) -> str:
+        """The oauth_endpoint of credentials getting their tokens here."""
+        return f"{self.endpoint}/botframework.com"
+
+    async def start(self, port: int = 0) -> "ChannelStub":
+        app = web.Application()
+        app.router.add_post(ACTIVITIES_ROUTE, self._activity)
+        app.router.add_post(REPLY_ROUTE, self._activity)
+        app.router.add_post(TOKEN_ROUTE, self._token)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+    async def _activity(self, request: web.Request) -> web.Response:
+        self.connections.add(request.transport.get_extra_info("peername"))
+        authorization = request.headers.get("Authorization")
+        if authorization and authorization.split(" ", 1)[-1] in self.revoked:
+            return web.json_response({"error": {"code": "Unauthorized"}}, status=401)
+
+        self.authorizations.append(authorization)
+        self.activities.append(await request.json())
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return web.json_response({"id": str(uuid.uuid4())})
+
+    async def _token(self, request: web.Request) -> web.Response:
+        self.connections.add(request.transport.get_extra_info("peername"))
+        self.token_requests += 1
+        form = await request.post()
+        if form.get("client_secret") != "secret":
+            return web.json_response(
+                {"error": "invalid_client", "error_description": "Invalid client secret."},
+                status=401,
+            )
+        return web.json_response({
+            "token_type": "Bearer",
+            "expires_in": self.token_lifetime,
+            "access_token": f"token-{self.token_requests}",
+        })
+
+
+async def _serve(port: int, delay: float) -> None:
+    stub = await ChannelStub(delay=delay).start(port)
+    print(f"Channel stub listening on {stub.endpoint}")
+    while True:
+        await asyncio.sleep(3600)
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--port", type=int, default=8020)
+    PARSER.add_argument("--delay", type=float, default=0.0)
+    ARGS = PARSER.parse_args()
+    asyncio.run(_serve(ARGS.port, ARGS.delay))
@@ -0,0 +1,138 @@
+"""Local stand-in for the LUIS v3 prediction endpoint.
+
+Run it on its own with ``python -m tests.luis_stub --port 8010`` and point
+LuisAPIHostName at http://127.0.0.1:8010 to exercise the bot without LUIS.
+"""
+
+import argparse
+import asyncio
+import uuid
+
+from aiohttp import web
+from botbuilder.core import TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+)
+
+from config import DefaultConfig
+
+PREDICT_ROUTE = "/luis/prediction/v3.0/apps/{app_id}/slots/{slot}/predict"
+
+
+def book_flight_prediction(query: str) -> dict:
+    return {
+        "query": query,
+        "prediction": {
+            "topIntent": "BookFlight",
+            "intents": {"BookFlight": {"score": 0.97}},
+            "entities": {
+                "dst_city": ["paris"],
+                "or_city": ["lille"],
+                "geographyV2": [
+                    {"value": "paris", "type": "city"},
+                    {"value": "lille", "type": "city"},
+                ],
+                "datetimeV2": [
+                    {
+                        "type": "date",
+                        "values": [{"timex": "2023-01-01", "resolution": []}],
+                    }
+                ],
+                "number": [1000],
+            },
+        },
+    }
+
+
+def stub_config(endpoint: str) -> DefaultConfig:
+    """Bot configuration sending the stock v3 recognizer's queries to a stub."""
+    config = DefaultConfig()
+    config.LUIS_APP_ID = str(uuid.uuid4())
+    config.LUIS_API_KEY = str(uuid.uuid4())
+    config.LUIS_API_HOST_NAME = endpoint
+    config.LUIS_PREDICTION_VERSION = "v3"
+    config.RECOGNITION_MODE = "luis"
+    # Without the cache, every query the recognizer does not coalesce reaches the stub.
+    config.LUIS_CACHE_SIZE = 0
+    return config
+
+
+def make_turn(adapter: TestAdapter, index: int, text: str) -> TurnContext:
+    return TurnContext(
+        adapter,
+        Activity(
+            type=ActivityTypes.message,
+            channel_id="test",
+            text=text,
+            from_property=ChannelAccount(id=f"user{index}"),
+            recipient=ChannelAccount(id="bot"),
+            conversation=ConversationAccount(id=f"conversation{index}"),
+            service_url="https://test.com",
+        ),
+    )
+
+
+class LuisStub:
+    """Serves canned predictions on a local port and counts requests and connections."""
+
+    def __init__(
+        self,
+        delay: float = 0.0,
+        prediction=book_flight_prediction,
+        fail_first: int = 0,
+        fail_status: int = 503,
+    ):
+        self.delay = delay
+        self.prediction = prediction
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests = 0
+        self.connections = set()
+        self._runner = None
+        self.port = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self, port: int = 0) -> "LuisStub":
+        app = web.Application()
+        app.router.add_post(PREDICT_ROUTE, self._predict)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+    async def _predict(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        self.connections.add(request.transport.get_extra_info("peername"))
+        body = await request.json()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.requests <= self.fail_first:
+            return web.Response(status=self.fail_status)
+        return web.json_response(self.prediction(body["query"]))
+
+
+async def _serve(port: int, delay: float) -> None:
+    stub = await LuisStub(delay=delay).start(port)
+    print(f"LUIS stub listening on {stub.endpoint}")
+    while True:
+        await asyncio.sleep(3600)
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--port", type=int, default=8010)
+    PARSER.add_argument("--delay", type=float, default=0.0)
+    ARGS = PARSER.parse_args()
+    asyncio.run(_serve(ARGS.port, ARGS.delay))
@@ -0,0 +1,69 @@
+import copy
+import json
+
+import aiounittest
+
+from botbuilder.schema import Activity, Attachment, Entity
+
+from helpers.activity_decoder import decode_activity
+from tests.activity_payloads import DIRECT_LINE_CARD_ANSWER, PAYLOADS, TEAMS_MESSAGE
+
+
+def model_state(value):
+    """Every schema field, nested models included, as plain values."""
+    if hasattr(value, "_attribute_map"):
+        state = {name: model_state(getattr(value, name)) for name in value._attribute_map}
+        state["additional_properties"] = value.additional_properties
+        return state
+    if isinstance(value, list):
+        return [model_state(item) for item in value]
+    return value
+
+
+def body(payload: dict) -> bytes:
+    return json.dumps(payload).encode("utf-8")
+
+
+class ActivityDecoderTest(aiounittest.AsyncTestCase):
+
+    def test_decodes_like_msrest(self):
+        for name, payload in PAYLOADS.items():
+            with self.subTest(name):
+                expected = Activity().deserialize(payload)
+                activity = decode_activity(body(payload))
+                self.assertIsInstance(activity, Activity)
+                self.assertEqual(model_state(expected), model_state(activity))
+                self.assertEqual(expected.serialize(), decode_activity(body(payload)).serialize())
+
+    def test_rare_fields_are_decoded_on_first_read(self):
+        activity = decode_activity(body(TEAMS_MESSAGE))
+        self.assertIn("attachments", activity._raw_fields)
+        self.assertIn("entities", activity._raw_fields)
+
+        self.assertIsInstance(activity.entities[0], Entity)
+        self.assertNotIn("entities", activity._raw_fields)
+        self.assertIs(activity.entities, activity.entities)
+
+    def test_assigned_field_wins_over_the_raw_one(self):
+        activity = decode_activity(body(DIRECT_LINE_CARD_ANSWER))
+        activity.attachments = []
+        self.assertEqual([], activity.attachments)
+        self.assertEqual([], activity.serialize()["attachments"])
+
+    def test_copies_decode_their_own_fields(self):
+        activity = decode_activity(body(DIRECT_LINE_CARD_ANSWER))
+        duplicate = copy.copy(activity)
+
+        self.assertIsInstance(activity.attachments[0], Attachment)
+        self.assertEqual(
+            model_state(activity.attachments), model_state(duplicate.attachments)
+        )
+        duplicate.attachments = None
+        self.assertIsNotNone(activity.attachments)
+
+    def test_unexpected_types_fall_back_to_msrest(self):
+        payload = {**TEAMS_MESSAGE, "id": 1672651915418, "from": None}
+        self.assertEqual(
+            model_state(Activity().deserialize(payload)),
+            model_state(decode_activity(body(payload))),
+        )
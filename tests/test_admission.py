@@ -0,0 +1,133 @@
+import asyncio
+from http import HTTPStatus
+
+import aiounittest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from helpers.admission import AdmissionController, admission_middleware
+
+
+def block_loop(seconds: float) -> None:
+    loop = asyncio.get_running_loop()
+    blocked_until = loop.time() + seconds
+    while loop.time() < blocked_until:
+        pass
+
+
+class AdmissionControllerTest(aiounittest.AsyncTestCase):
+
+    async def test_waiters_are_admitted_in_arrival_order(self):
+        controller = AdmissionController(max_concurrent=2, max_queue=10)
+        running, peak, order = [0], [0], []
+
+        async def work(index):
+            await controller.acquire()
+            try:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+                order.append(index)
+                await asyncio.sleep(0)
+            finally:
+                running[0] -= 1
+                controller.release()
+
+        await asyncio.gather(*[work(index) for index in range(10)])
+
+        self.assertEqual(list(range(10)), order)
+        self.assertEqual(2, peak[0])
+        self.assertEqual((0, 0, 10), (controller.active, controller.queued, controller.admitted))
+
+    async def test_excess_is_refused_before_running(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=1, max_wait=0.01)
+        await controller.acquire()
+
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        with self.assertRaises(asyncio.QueueFull):
+            await controller.acquire()
+        with self.assertRaises(asyncio.TimeoutError):
+            await waiter
+
+        controller.release()
+        self.assertEqual(0, controller.active)
+        self.assertEqual((1, 1), (controller.rejected, controller.timeouts))
+
+    async def test_cancelled_waiter_does_not_hold_a_slot(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=2)
+        await controller.acquire()
+        cancelled = asyncio.ensure_future(controller.acquire())
+        queued = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        controller.release()
+        await asyncio.wait_for(queued, 1)
+        controller.release()
+        self.assertEqual((0, 0), (controller.active, controller.queued))
+
+    async def test_lagging_loop_sheds_every_request(self):
+        controller = AdmissionController(max_concurrent=8, max_loop_lag=0.01, lag_interval=0.01)
+        controller.start()
+        try:
+            await asyncio.sleep(0)
+            # Hold the loop, sample after sample, as a burst of CPU-bound turns would.
+            for _ in range(controller.lag_samples + 1):
+                block_loop(0.03)
+                await asyncio.sleep(0.005)
+
+            with self.assertRaises(asyncio.QueueFull):
+                await controller.acquire()
+            self.assertEqual(1, controller.shed)
+
+            await asyncio.sleep(0.05)
+            await controller.acquire()
+            controller.release()
+        finally:
+            await controller.stop()
+
+    async def test_one_lag_spike_sheds_nothing(self):
+        controller = AdmissionController(max_concurrent=8, max_loop_lag=0.01, lag_interval=0.01)
+        controller.start()
+        try:
+            await asyncio.sleep(0)
+            # One blocking call, such as a stock LUIS request, is a single late sample.
+            block_loop(0.05)
+            await asyncio.sleep(0.005)
+
+            self.assertGreater(controller.loop_lag, controller.max_loop_lag)
+            await controller.acquire()
+            controller.release()
+            self.assertEqual(0, controller.shed)
+        finally:
+            await controller.stop()
+
+    async def test_middleware_answers_503_with_retry_after(self):
+        controller = AdmissionController(max_concurrent=1)
+        release = asyncio.Event()
+
+        async def slow(request):
+            await release.wait()
+            return web.Response(text="done")
+
+        async def health(request):
+            return web.Response(text="ok")
+
+        app = web.Application(middlewares=[admission_middleware(controller, ["/slow"], retry_after=3)])
+        app.router.add_get("/slow", slow)
+        app.router.add_get("/health", health)
+
+        async with TestClient(TestServer(app)) as client:
+            first = asyncio.ensure_future(client.get("/slow"))
+            while not controller.active:
+                await asyncio.sleep(0.01)
+
+            refused = await client.get("/slow")
+            self.assertEqual(HTTPStatus.SERVICE_UNAVAILABLE, refused.status)
+            self.assertEqual("3", refused.headers["Retry-After"])
+            # Other paths are not counted against the limit.
+            self.assertEqual(HTTPStatus.OK, (await client.get("/health")).status)
+
+            release.set()
+            self.assertEqual("done", await (await first).text())
+        self.assertEqual(0, controller.active)
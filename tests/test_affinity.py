@@ -0,0 +1,151 @@
+import json
+import os
+import socket
+import tempfile
+from collections import Counter
+from http import HTTPStatus
+
+import aiohttp
+import aiounittest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from helpers.affinity import AffinityDispatcher, AffinityServer, HashRing, conversation_key
+
+KEYS = [f"conversation-{index}" for index in range(10000)]
+
+
+def pid_app(argv):
+    async def messages(request):
+        body = await request.json()
+        return web.json_response({"pid": os.getpid(), "id": body["conversation"]["id"]})
+
+    app = web.Application()
+    app.router.add_post("/api/messages", messages)
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class HashRingTest(aiounittest.AsyncTestCase):
+
+    def test_keys_spread_over_the_nodes(self):
+        ring = HashRing(["a", "b", "c", "d"])
+        shares = Counter(ring.get(key) for key in KEYS)
+        for node in "abcd":
+            self.assertGreater(shares[node], len(KEYS) * 0.15)
+            self.assertLess(shares[node], len(KEYS) * 0.35)
+
+    def test_adding_a_node_only_moves_keys_to_it(self):
+        ring = HashRing(["a", "b", "c", "d"])
+        before = {key: ring.get(key) for key in KEYS}
+        ring.add("e")
+        moved = {key: ring.get(key) for key in KEYS if ring.get(key) != before[key]}
+
+        self.assertEqual({"e"}, set(moved.values()))
+        self.assertLess(len(moved), len(KEYS) * 0.3)
+
+        ring.remove("e")
+        self.assertEqual(before, {key: ring.get(key) for key in KEYS})
+
+    def test_empty_ring(self):
+        with self.assertRaises(LookupError):
+            HashRing().get("conversation")
+
+    def test_conversation_key(self):
+        self.assertEqual("abc", conversation_key(b'{"conversation": {"id": "abc"}}'))
+        self.assertEqual("", conversation_key(b'{"type": "message"}'))
+        self.assertEqual("", conversation_key(b"not json"))
+
+
+class AffinityDispatcherTest(aiounittest.AsyncTestCase):
+
+    async def dispatch(self, worker_path: str) -> aiohttp.ClientResponse:
+        dispatcher = AffinityDispatcher()
+        dispatcher.add_worker("worker-0", worker_path)
+        app = web.Application()
+        app.router.add_post("/api/messages", dispatcher.messages)
+        try:
+            async with TestClient(TestServer(app)) as client:
+                response = await client.post(
+                    "/api/messages", data=json.dumps({"conversation": {"id": "conversation"}})
+                )
+                await response.read()
+        finally:
+            await dispatcher.close()
+        self.assertEqual(1, dispatcher.errors)
+        return response
+
+    async def test_turn_is_not_resent_after_the_worker_got_it(self):
+        received = []
+
+        async def messages(request):
+            received.append(await request.read())
+            # The worker dies mid-turn, after the turn reached it.
+            request.transport.close()
+            return web.Response()
+
+        worker = web.Application()
+        worker.router.add_post("/api/messages", messages)
+        runner = web.AppRunner(worker)
+        await runner.setup()
+        with tempfile.TemporaryDirectory() as socket_dir:
+            path = os.path.join(socket_dir, "worker-0.sock")
+            await web.UnixSite(runner, path).start()
+            try:
+                response = await self.dispatch(path)
+            finally:
+                await runner.cleanup()
+
+        self.assertEqual(HTTPStatus.SERVICE_UNAVAILABLE, response.status)
+        self.assertEqual(1, len(received))
+
+    async def test_unreachable_worker_gets_a_503(self):
+        with tempfile.TemporaryDirectory() as socket_dir:
+            response = await self.dispatch(os.path.join(socket_dir, "missing.sock"))
+
+        self.assertEqual(HTTPStatus.SERVICE_UNAVAILABLE, response.status)
+        self.assertEqual("1", response.headers["Retry-After"])
+
+
+class AffinityServerTest(aiounittest.AsyncTestCase):
+
+    async def test_turns_of_a_conversation_stay_on_one_worker(self):
+        port = free_port()
+        server = AffinityServer(pid_app, "127.0.0.1", port, workers=2, shutdown_timeout=5)
+        await server.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+
+                async def served_by(conversation: str) -> int:
+                    async with session.post(
+                        f"http://127.0.0.1:{port}/api/messages",
+                        data=json.dumps({"conversation": {"id": conversation}}),
+                        headers={"Content-Type": "application/json"},
+                    ) as response:
+                        body = await response.json()
+                    self.assertEqual(conversation, body["id"])
+                    return body["pid"]
+
+                conversations = [f"conversation-{index}" for index in range(40)]
+                first = {conversation: await served_by(conversation) for conversation in conversations}
+                self.assertEqual(2, len(set(first.values())))
+                for conversation in conversations:
+                    self.assertEqual(first[conversation], await served_by(conversation))
+
+                # A new worker only takes conversations over; none move between the others.
+                await server.add_worker()
+                scaled = {conversation: await served_by(conversation) for conversation in conversations}
+                moved = {scaled[c] for c in conversations if scaled[c] != first[c]}
+                self.assertEqual(1, len(moved))
+                self.assertNotIn(moved.pop(), first.values())
+
+                await server.remove_worker()
+                self.assertEqual(first, {c: await served_by(c) for c in conversations})
+        finally:
+            await server.stop()
+        self.assertEqual(0, server.dispatcher.errors)
@@ -0,0 +1,127 @@
+import copy
+import pickle
+import unittest
+
+import jsonpickle
+
+from booking_details import BookingDetails
+
+
+class LegacyBookingDetails:
+    """BookingDetails as it was pickled before it had slots."""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+def legacy_pickle(fields: dict) -> bytes:
+    """Pickle of an old BookingDetails carrying ``fields`` as its __dict__."""
+    # Protocol 0 names classes in plain text lines, so they can be renamed.
+    data = pickle.dumps(LegacyBookingDetails(**fields), 0)
+    return data.replace(__name__.encode(), b"booking_details").replace(
+        b"LegacyBookingDetails", b"BookingDetails"
+    )
+
+
+class BookingDetailsTest(unittest.TestCase):
+
+    def make_details(self) -> BookingDetails:
+        return BookingDetails(
+            destination="Paris",
+            origin="Lille",
+            start_date="2023-01-01",
+            end_date="2023-01-31T10",
+            budget="1000 Euro",
+            geo_list=["Paris", "Lille"],
+            number_list=["1000"],
+        )
+
+    def assert_same(self, expected: BookingDetails, actual: BookingDetails):
+        for name in (
+            "destination", "origin", "start_date", "start_ordinal", "end_date",
+            "end_ordinal", "budget", "unsupported_airports", "geo_list", "number_list",
+        ):
+            self.assertEqual(getattr(expected, name), getattr(actual, name), name)
+
+    def test_lists_are_not_shared(self):
+        first, second = BookingDetails(), BookingDetails()
+        first.geo_list.append("Paris")
+        first.number_list.append("1000")
+
+        self.assertEqual([], second.geo_list)
+        self.assertEqual([], second.number_list)
+
+    def test_round_trips(self):
+        details = self.make_details()
+        self.assert_same(details, pickle.loads(pickle.dumps(details)))
+        self.assert_same(details, copy.deepcopy(details))
+
+        details.budget = "1000.50 euros"
+        details.start_date = "XXXX-01-01"
+        self.assert_same(details, pickle.loads(pickle.dumps(details)))
+
+    def test_compact_encoding(self):
+        state = self.make_details().__getstate__()
+
+        self.assertEqual(738521, state[3])
+        self.assertEqual("2023-01-31T10", state[4])
+        self.assertEqual((1000, 0), state[5])
+
+    def test_budget_amount_and_currency(self):
+        details = BookingDetails(budget="1900 Dollars")
+        self.assertEqual(1900, details.budget_amount)
+        self.assertEqual("USD", details.budget_currency)
+
+        details.budget = "1900"
+        self.assertIsNone(details.budget_amount)
+        self.assertIsNone(details.budget_currency)
+
+    def test_cities_are_interned(self):
+        restored = pickle.loads(pickle.dumps(self.make_details()))
+        self.assertIs(self.make_details().destination, restored.destination)
+        self.assertIs(self.make_details().geo_list[0], restored.geo_list[0])
+
+    def test_old_state_is_readable(self):
+        before_ordinals = pickle.loads(
+            legacy_pickle(
+                {
+                    "destination": "Paris", "origin": "Lille", "start_date": "2023-01-01",
+                    "end_date": "2023-01-31", "budget": "1000 Euro",
+                    "unsupported_airports": None, "geo_list": [], "number_list": [],
+                }
+            )
+        )
+        with_ordinals = pickle.loads(
+            legacy_pickle(
+                {
+                    "destination": "Paris", "origin": "Lille", "_start_date": "2023-01-01",
+                    "start_ordinal": 738521, "_end_date": "2023-01-31", "end_ordinal": 738551,
+                    "budget": "1000 Euro", "unsupported_airports": None,
+                    "geo_list": [], "number_list": [],
+                }
+            )
+        )
+
+        for details in (before_ordinals, with_ordinals):
+            self.assertIsInstance(details, BookingDetails)
+            self.assertEqual("2023-01-31", details.end_date)
+            self.assertEqual(738551, details.end_ordinal)
+
+    def test_jsonpickle_hashing_sees_changes(self):
+        details = self.make_details()
+        before = jsonpickle.Pickler().flatten(details)
+        details.budget = "2000 Euro"
+        self.assertNotEqual(before, jsonpickle.Pickler().flatten(details))
+
+    def test_compact_pickle_is_smaller(self):
+        legacy = LegacyBookingDetails(**{
+            "destination": "Paris", "origin": "Lille", "_start_date": "2023-01-01",
+            "start_ordinal": 738521, "_end_date": "2023-01-31", "end_ordinal": 738551,
+            "budget": "1000 Euro", "unsupported_airports": None,
+            "geo_list": [], "number_list": [],
+        })
+        compact = BookingDetails("Paris", "Lille", "2023-01-01", "2023-01-31", "1000 Euro")
+        self.assertLess(
+            len(pickle.dumps(compact, pickle.HIGHEST_PROTOCOL)),
+            len(pickle.dumps(legacy, pickle.HIGHEST_PROTOCOL)) / 2,
+        )
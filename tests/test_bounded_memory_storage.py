@@ -0,0 +1,79 @@
+import asyncio
+
+import aiounittest
+
+from botbuilder.core import StoreItem
+
+from helpers.bounded_memory_storage import BoundedMemoryStorage
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class SimpleStoreItem(StoreItem):
+    def __init__(self, counter=1, e_tag="*"):
+        super(SimpleStoreItem, self).__init__()
+        self.counter = counter
+        self.e_tag = e_tag
+
+
+class BoundedMemoryStorageTest(aiounittest.AsyncTestCase):
+
+    async def test_least_recently_used_is_evicted(self):
+        storage = BoundedMemoryStorage(max_entries=2)
+        await storage.write({"a": {"value": 1}, "b": {"value": 2}})
+        await storage.read(["a"])
+        await storage.write({"c": {"value": 3}})
+
+        self.assertEqual(["a", "c"], sorted(await storage.read(["a", "b", "c"])))
+        self.assertEqual(1, storage.stats["evictions"])
+
+    async def test_idle_entries_expire(self):
+        clock = FakeClock()
+        storage = BoundedMemoryStorage(ttl=10, clock=clock)
+        await storage.write({"idle": {"value": 1}, "active": {"value": 2}})
+
+        clock.now = 8
+        await storage.read(["active"])
+        clock.now = 12
+
+        self.assertEqual(1, storage.sweep())
+        self.assertEqual(["active"], list(await storage.read(["idle", "active"])))
+        clock.now = 30
+        self.assertEqual({}, await storage.read(["active"]))
+        self.assertEqual(2, storage.stats["expirations"])
+        self.assertEqual(0, storage.stats["entries"])
+        self.assertEqual(0, storage.stats["bytes"])
+
+    async def test_bytes_follow_the_stored_items(self):
+        storage = BoundedMemoryStorage()
+        await storage.write({"small": {"text": "x"}})
+        small = storage.stats["bytes"]
+        await storage.write({"small": {"text": "x" * 1000}})
+        self.assertGreater(storage.stats["bytes"], small + 900)
+
+        await storage.delete(["small"])
+        self.assertEqual(0, storage.stats["bytes"])
+
+    async def test_e_tags_behave_like_memory_storage(self):
+        storage = BoundedMemoryStorage()
+        await storage.write({"item": SimpleStoreItem(e_tag="1")})
+        await storage.write({"item": SimpleStoreItem(counter=2, e_tag="*")})
+
+        with self.assertRaises(KeyError):
+            await storage.write({"item": SimpleStoreItem(counter=3, e_tag="bad")})
+        self.assertEqual(2, (await storage.read(["item"]))["item"].counter)
+
+    async def test_sweeper_runs_in_background(self):
+        storage = BoundedMemoryStorage(ttl=0.01, sweep_interval=0.01)
+        await storage.write({"idle": {"value": 1}})
+        storage.start()
+        await asyncio.sleep(0.05)
+        await storage.stop()
+
+        self.assertEqual(0, storage.stats["entries"])
@@ -0,0 +1,102 @@
+import json
+
+import aiounittest
+
+from botbuilder.core import ConversationState, MemoryStorage, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import DialogSet, DialogTurnStatus
+from botbuilder.schema import Activity, ActivityTypes
+
+from booking_details import BookingDetails
+from dialogs.budget_resolver_dialog import BudgetResolverDialog
+from gazetteer_recognizer import FRAMES_FILE
+from helpers.budget_parser import BUDGET_PARSER, fast_parse
+from helpers.parsing_service import parse_text
+from helpers.recognizer_models import ModelType
+
+
+def frame_budgets():
+    with open(FRAMES_FILE, encoding="utf-8") as frames_file:
+        frames = json.load(frames_file)
+    return sorted(
+        {
+            frame["text"][entity["startPos"]:entity["endPos"] + 1]
+            for frame in frames
+            for entity in frame["entities"]
+            if entity["entity"] == "budget"
+        }
+    )
+
+
+def message(text: str, locale: str) -> Activity:
+    return Activity(type=ActivityTypes.message, text=text, locale=locale)
+
+
+class BudgetParserTest(aiounittest.AsyncTestCase):
+
+    def test_fast_path_matches_recognizer(self):
+        handled = 0
+        # Every fourth distinct budget keeps the recognizer runs short.
+        for text in frame_budgets()[::4] + ["1000 Euro", "$ 2500", "400 €", "300£", "3000 USD", "400 gbp"]:
+            results = fast_parse(text)
+            if results is not None:
+                handled += 1
+                self.assertEqual(parse_text(ModelType.CURRENCY, "en-us", text), results, text)
+        self.assertGreater(handled, 100)
+
+    def test_unusual_forms_fall_back(self):
+        for text in ["2 grand", "1000.50 euros", "a thousand euros", "$01000", "increase my budget by $200"]:
+            self.assertIsNone(fast_parse(text), text)
+
+    async def test_budget_is_parsed_once_per_answer(self):
+        adapter = self.budget_resolver_adapter()
+
+        parses = BUDGET_PARSER.fast_hits + BUDGET_PARSER.fallbacks
+        step1 = await adapter.test("hi", "Please provide me with your budget")
+        await step1.test("1000 euros", "1000 Euro")
+
+        self.assertEqual(parses + 1, BUDGET_PARSER.fast_hits + BUDGET_PARSER.fallbacks)
+
+    async def test_channel_locale_uses_fast_path(self):
+        adapter = self.budget_resolver_adapter()
+
+        fast_hits, fallbacks = BUDGET_PARSER.fast_hits, BUDGET_PARSER.fallbacks
+        step1 = await adapter.test(
+            message("hi", "en-US"), "Please provide me with your budget"
+        )
+        await step1.test(message("1000 euros", "en-US"), "1000 Euro")
+
+        self.assertEqual(fast_hits + 1, BUDGET_PARSER.fast_hits)
+        self.assertEqual(fallbacks, BUDGET_PARSER.fallbacks)
+
+    async def test_other_locales_read_amounts_in_english(self):
+        for locale, text, budget in [
+            ("fr-FR", "1,500 euros", "1500 Euro"),
+            ("es-ES", "2500 dollars", "2500 Dollar"),
+        ]:
+            with self.subTest(locale):
+                adapter = self.budget_resolver_adapter()
+
+                fallbacks = BUDGET_PARSER.fallbacks
+                step1 = await adapter.test(
+                    message("hi", locale), "Please provide me with your budget"
+                )
+                await step1.test(message(text, locale), budget)
+
+                self.assertEqual(fallbacks + 1, BUDGET_PARSER.fallbacks)
+
+    @staticmethod
+    def budget_resolver_adapter() -> TestAdapter:
+        async def exec_test(turn_context: TurnContext):
+            dialog_context = await dialogs.create_context(turn_context)
+            results = await dialog_context.continue_dialog()
+            if results.status == DialogTurnStatus.Empty:
+                await dialog_context.begin_dialog(BudgetResolverDialog.__name__, BookingDetails())
+            elif results.status == DialogTurnStatus.Complete:
+                await turn_context.send_activity(results.result)
+            await conv_state.save_changes(turn_context)
+
+        conv_state = ConversationState(MemoryStorage())
+        dialogs = DialogSet(conv_state.create_property("dialog_state"))
+        dialogs.add(BudgetResolverDialog())
+        return TestAdapter(exec_test)
@@ -0,0 +1,190 @@
+import asyncio
+import time
+import uuid
+
+import aiounittest
+from botbuilder.core import BotFrameworkAdapterSettings, ConversationState, MemoryStorage
+from botbuilder.schema import Activity, ActivityTypes, ChannelAccount, ConversationAccount
+from botframework.connector.auth import ClaimsIdentity, MicrosoftAppCredentials
+
+from adapter_with_error_handler import AdapterWithErrorHandler
+from helpers.connector_pool import AppTokenCache, ConnectorPool, HttpSessionPool
+from tests.channel_stub import ChannelStub
+
+APP_ID = str(uuid.uuid4())
+
+
+async def two_replies(turn_context):
+    # As many messages as the error handler sends.
+    await turn_context.send_activity("The bot encountered an error or bug.")
+    await turn_context.send_activity("To continue to run this bot, please fix the bot source code.")
+
+
+class ConnectorPoolTest(aiounittest.AsyncTestCase):
+
+    async def set_up(self, app_id: str = APP_ID, password: str = "secret", clock=time.monotonic):
+        self.channel = await ChannelStub().start()
+        credentials = MicrosoftAppCredentials(app_id, password)
+        credentials.oauth_endpoint = self.channel.login_endpoint
+        self.pool = ConnectorPool()
+        self.pool.tokens = AppTokenCache(self.pool.sessions, clock=clock)
+        self.adapter = AdapterWithErrorHandler(
+            BotFrameworkAdapterSettings(app_id, password, app_credentials=credentials),
+            ConversationState(MemoryStorage()),
+            connector_pool=self.pool,
+        )
+        self.identity = ClaimsIdentity({"aud": app_id} if app_id else {}, True)
+
+    async def tear_down(self):
+        await self.pool.close()
+        await self.channel.stop()
+
+    async def turn(self, logic=two_replies):
+        activity = Activity(
+            type=ActivityTypes.message,
+            id=str(uuid.uuid4()),
+            text="hi",
+            channel_id="msteams",
+            service_url=self.channel.endpoint,
+            conversation=ConversationAccount(id="conversation"),
+            from_property=ChannelAccount(id="user"),
+            recipient=ChannelAccount(id="bot"),
+        )
+        await self.adapter.process_activity_with_identity(activity, self.identity, logic)
+
+    async def refreshed(self):
+        for _ in range(100):
+            if not self.pool.tokens._fetches.in_flight:
+                return
+            await asyncio.sleep(0.01)
+
+    async def test_turns_share_one_connection_and_one_token(self):
+        await self.set_up()
+        try:
+            for _ in range(3):
+                await self.turn()
+
+            self.assertEqual(6, len(self.channel.activities))
+            self.assertEqual(["Bearer token-1"] * 6, self.channel.authorizations)
+            self.assertEqual(1, self.channel.token_requests)
+            self.assertEqual(1, len(self.channel.connections))
+            self.assertEqual(7, self.pool.stats["http"]["requests"])
+            self.assertEqual(1, self.pool.stats["http"]["connections"])
+        finally:
+            await self.tear_down()
+
+    async def test_token_is_refreshed_before_it_expires(self):
+        now = [0.0]
+        await self.set_up(clock=lambda: now[0])
+        try:
+            await self.turn()
+            now[0] = 3600 - 300
+            # The expiring token still signs this turn while a new one is fetched.
+            await self.turn()
+            await self.refreshed()
+            await self.turn()
+
+            self.assertEqual(
+                ["Bearer token-1"] * 4 + ["Bearer token-2"] * 2, self.channel.authorizations
+            )
+            self.assertEqual(2, self.channel.token_requests)
+            self.assertEqual(1, self.pool.tokens.refreshes)
+        finally:
+            await self.tear_down()
+
+    async def test_rejected_token_is_replaced(self):
+        await self.set_up()
+        try:
+            await self.turn()
+            self.channel.revoked.add("token-1")
+            await self.turn()
+
+            self.assertEqual(
+                ["Bearer token-1"] * 2 + ["Bearer token-2"] * 2, self.channel.authorizations
+            )
+            self.assertEqual(2, self.channel.token_requests)
+        finally:
+            await self.tear_down()
+
+    async def test_token_errors_are_not_cached(self):
+        await self.set_up(password="wrong")
+        try:
+            for _ in range(2):
+                with self.assertRaises(PermissionError):
+                    await self.turn()
+
+            self.assertEqual([], self.channel.activities)
+            self.assertEqual(0, self.pool.tokens.stats["tokens"])
+            self.assertEqual(self.channel.token_requests, self.pool.tokens.failures)
+        finally:
+            await self.tear_down()
+
+    async def test_anonymous_replies_are_not_signed(self):
+        await self.set_up(app_id="", password="")
+        try:
+            await self.turn()
+
+            self.assertEqual([None, None], self.channel.authorizations)
+            self.assertEqual(0, self.channel.token_requests)
+        finally:
+            await self.tear_down()
+
+
+class HttpSessionPoolTest(aiounittest.AsyncTestCase):
+
+    async def test_evicted_session_finishes_its_requests(self):
+        channel = await ChannelStub(delay=0.2).start()
+        pool = HttpSessionPool(max_sessions=1)
+        try:
+            url = f"{channel.endpoint}/v3/conversations/conversation/activities"
+            reply = asyncio.ensure_future(self.post(pool, url, {"text": "hi"}))
+            while not channel.activities:
+                await asyncio.sleep(0.01)
+            session = pool.session(url)
+            pool.session("http://localhost:1/")
+
+            self.assertEqual(1, pool.stats["evictions"])
+            self.assertEqual(1, pool.stats["retired"])
+            self.assertFalse(session.closed)
+            self.assertEqual(200, await reply)
+            self.assertTrue(session.closed)
+            self.assertEqual(0, pool.stats["retired"])
+        finally:
+            await pool.close()
+            await channel.stop()
+
+    @staticmethod
+    async def post(pool: HttpSessionPool, url: str, body: dict) -> int:
+        async with pool.request("POST", url, json=body) as response:
+            await response.read()
+            return response.status
+
+    def test_sessions_of_a_previous_loop_are_closed(self):
+        pool = HttpSessionPool()
+
+        async def session():
+            return pool.session("http://localhost:1/")
+
+        async def settle():
+            await asyncio.sleep(0)
+
+        first_loop = asyncio.new_event_loop()
+        second_loop = asyncio.new_event_loop()
+        third_loop = asyncio.new_event_loop()
+        try:
+            first = first_loop.run_until_complete(session())
+            first_loop.close()
+            # A closed loop's sessions are closed from the loop replacing it...
+            second = second_loop.run_until_complete(session())
+            second_loop.run_until_complete(settle())
+            self.assertTrue(first.closed)
+            self.assertFalse(second.closed)
+
+            # ...and a live loop's on that loop.
+            third_loop.run_until_complete(session())
+            second_loop.run_until_complete(settle())
+            self.assertTrue(second.closed)
+            third_loop.run_until_complete(pool.close())
+        finally:
+            second_loop.close()
+            third_loop.close()
@@ -0,0 +1,119 @@
+import datetime
+
+import aiounittest
+
+from botbuilder.core import ConversationState, MemoryStorage, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import DialogSet, DialogTurnStatus
+from botbuilder.schema import Activity, ActivityTypes
+
+from booking_details import BookingDetails
+from dialogs.date_resolver_dialog import DateResolverDialog
+from helpers.date_parser import DATE_PARSER, date_range_timex, fast_parse
+from helpers.parsing_service import parse_text
+from helpers.recognizer_models import ModelType
+
+FAST_DATES = [
+    "2023-01-31",
+    "2016/8/13",
+    "31-01-2023",
+    "13/01/2023",
+    "01/13/2023",
+    "5/5/2023",
+    "january 31, 2023",
+    "Sept 6th 2023",
+    "22nd of september, 2016.",
+    " 3 MAR 2024 ",
+]
+
+
+class DateParserTest(aiounittest.AsyncTestCase):
+
+    def test_fast_path_matches_recognizer(self):
+        for text in FAST_DATES:
+            results = fast_parse(text)
+            self.assertIsNotNone(results, text)
+            self.assertEqual(parse_text(ModelType.DATETIME, "en-us", text), results, text)
+
+    def test_numeric_dates_match_recognizer_or_fall_back(self):
+        days = ["1", "05", "9", "12", "13", "18", "22", "30"]
+        for sep in "-/.":
+            for first in days:
+                for second in days:
+                    text = f"{first}{sep}{second}{sep}2024"
+                    results = fast_parse(text)
+                    if results is not None:
+                        self.assertEqual(
+                            parse_text(ModelType.DATETIME, "en-us", text), results, text
+                        )
+
+    def test_ambiguous_and_unusual_dates_fall_back(self):
+        for text in ["01-02-2023", "31-02-2023", "sept 6th", "18nd of oct 2016", "next friday", "2016"]:
+            self.assertIsNone(fast_parse(text), text)
+
+    def test_ranges_give_both_dates(self):
+        for text in ["from aug 13 2016 to aug 20 2016", "between 13th and 20th of august 2016"]:
+            results = parse_text(ModelType.DATETIME, "en-us", text)
+            self.assertEqual("(2016-08-13,2016-08-20,P7D)", date_range_timex(results), text)
+
+        results = parse_text(ModelType.DATETIME, "en-us", "for two weeks from Monday")
+        start, end, duration = date_range_timex(results)[1:-1].split(",")
+        self.assertEqual(0, datetime.date.fromisoformat(start).weekday())
+        self.assertEqual("P14D", duration)
+
+    def test_ranges_need_two_definite_days(self):
+        for text in ["from aug 13 to aug 20", "august 13, 2016", "for two weeks"]:
+            results = parse_text(ModelType.DATETIME, "en-us", text)
+            self.assertIsNone(date_range_timex(results), text)
+
+    async def test_range_answer_skips_the_return_prompt(self):
+        adapter = self.date_resolver_adapter()
+
+        step1 = await adapter.test("hi", "On what date would you like to start your travel?")
+        await step1.test("1 jan 2023 to 31 jan 2023", "2023-01-01 2023-01-31")
+
+    async def test_prompt_answers_use_fast_path(self):
+        adapter = self.date_resolver_adapter()
+
+        fast_hits, fallbacks = DATE_PARSER.fast_hits, DATE_PARSER.fallbacks
+        step1 = await adapter.test("hi", "On what date would you like to start your travel?")
+        step2 = await step1.test("2023-01-01", "On what date would you like to return from your travel?")
+        await step2.test("31-01-2023", "2023-01-01 2023-01-31")
+
+        self.assertEqual(fast_hits + 2, DATE_PARSER.fast_hits)
+        self.assertEqual(fallbacks, DATE_PARSER.fallbacks)
+
+    async def test_channel_locale_uses_fast_path(self):
+        adapter = self.date_resolver_adapter()
+
+        def message(text: str) -> Activity:
+            return Activity(type=ActivityTypes.message, text=text, locale="en-US")
+
+        fast_hits, fallbacks = DATE_PARSER.fast_hits, DATE_PARSER.fallbacks
+        step1 = await adapter.test(
+            message("hi"), "On what date would you like to start your travel?"
+        )
+        step2 = await step1.test(
+            message("2023-01-01"), "On what date would you like to return from your travel?"
+        )
+        await step2.test(message("31-01-2023"), "2023-01-01 2023-01-31")
+
+        self.assertEqual(fast_hits + 2, DATE_PARSER.fast_hits)
+        self.assertEqual(fallbacks, DATE_PARSER.fallbacks)
+
+    @staticmethod
+    def date_resolver_adapter() -> TestAdapter:
+        async def exec_test(turn_context: TurnContext):
+            dialog_context = await dialogs.create_context(turn_context)
+            results = await dialog_context.continue_dialog()
+            if results.status == DialogTurnStatus.Empty:
+                await dialog_context.begin_dialog(DateResolverDialog.__name__, BookingDetails())
+            elif results.status == DialogTurnStatus.Complete:
+                details = results.result
+                await turn_context.send_activity(f"{details.start_date} {details.end_date}")
+            await conv_state.save_changes(turn_context)
+
+        conv_state = ConversationState(MemoryStorage())
+        dialogs = DialogSet(conv_state.create_property("dialog_state"))
+        dialogs.add(DateResolverDialog())
+        return TestAdapter(exec_test)
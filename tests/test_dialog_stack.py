@@ -0,0 +1,73 @@
+import pickle
+
+import aiounittest
+
+from botbuilder.core import ConversationState, MemoryStorage, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import DialogSet, DialogTurnStatus
+
+from booking_details import BookingDetails
+from dialogs import BookingDialog
+from helpers.dialog_helper import DialogHelper
+
+REJECTIONS = 100
+SAME_CITIES = (
+    "I have understood you want to travel to : Paris which is identical to your origin : Paris "
+    "Please confirm you want to proceed. (1) Yes or (2) No"
+)
+REVERSED_DATES = (
+    "You have indicated wanting to start your on travel on : 2023-01-31 "
+    "which is after your return date requested on : 2023-01-31 "
+    "Please confirm you want to proceed. (1) Yes or (2) No"
+)
+
+
+class DialogStackTest(aiounittest.AsyncTestCase):
+
+    def setUp(self):
+        async def exec_test(turn_context: TurnContext):
+            dialog_context = await dialogs.create_context(turn_context)
+            results = await dialog_context.continue_dialog()
+            if results.status == DialogTurnStatus.Empty:
+                await dialog_context.begin_dialog(BookingDialog.__name__, BookingDetails())
+            await self.conv_state.save_changes(turn_context)
+            self.depths.append(DialogHelper.stack_depth(await dialog_state.get(turn_context)))
+
+        self.storage = MemoryStorage()
+        self.conv_state = ConversationState(self.storage)
+        self.depths = []
+        dialog_state = self.conv_state.create_property("dialog_state")
+        dialogs = DialogSet(dialog_state)
+        dialogs.add(BookingDialog())
+        self.adapter = TestAdapter(exec_test)
+
+    def state_size(self) -> int:
+        return len(pickle.dumps(self.storage.memory, pickle.HIGHEST_PROTOCOL))
+
+    async def test_rejecting_identical_cities_restarts_in_place(self):
+        await self.adapter.test("Hello", "To what city would you like to travel?")
+        sizes = []
+        for _ in range(REJECTIONS):
+            await self.adapter.test("Paris", "From what city will you be travelling?")
+            await self.adapter.test("Paris", SAME_CITIES)
+            await self.adapter.test("no", "To what city would you like to travel?")
+            sizes.append(self.state_size())
+
+        self.assertEqual(1, len(set(sizes)))
+        self.assertEqual(max(self.depths[:4]), max(self.depths))
+
+    async def test_rejecting_reversed_dates_restarts_in_place(self):
+        await self.adapter.test("Hello", "To what city would you like to travel?")
+        await self.adapter.test("Paris", "From what city will you be travelling?")
+        await self.adapter.test("Lille", "On what date would you like to start your travel?")
+        sizes = []
+        for _ in range(REJECTIONS):
+            await self.adapter.test(
+                "31-01-2023", "On what date would you like to return from your travel?"
+            )
+            await self.adapter.test("01-01-2023", REVERSED_DATES)
+            await self.adapter.test("no", "On what date would you like to start your travel?")
+            sizes.append(self.state_size())
+
+        self.assertEqual(1, len(set(sizes)))
+        self.assertEqual(max(self.depths[:6]), max(self.depths))
@@ -0,0 +1,74 @@
+import aiounittest
+
+from botbuilder.core import ConversationState, MemoryStorage, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import DialogSet, DialogTurnStatus
+
+from config import DefaultConfig
+from dialogs import MainDialog, BookingDialog
+from flight_booking_recognizer import FlightBookingRecognizer
+from gazetteer_recognizer import GazetteerRecognizer, BOOK_FLIGHT, NONE_INTENT
+
+
+class OfflineConfig(DefaultConfig):
+    LUIS_APP_ID = ""
+    LUIS_API_KEY = ""
+    LUIS_API_HOST_NAME = ""
+
+
+class GazetteerRecognizerTest(aiounittest.AsyncTestCase):
+
+    def test_entities_match_luis_shape(self):
+        result = GazetteerRecognizer().recognize_text(
+            "yes, how about going to neverland from caprica on august 13, 2016 "
+            "and back on february 02, 2017 for 5 adults. "
+            "for this trip, my budget would be 1900."
+        )
+
+        self.assertEqual([BOOK_FLIGHT], list(result.intents))
+        self.assertEqual(["neverland"], result.entities["dst_city"])
+        self.assertEqual(["caprica"], result.entities["or_city"])
+        self.assertEqual(["neverland", "caprica"], result.entities["geographyV2_city"])
+        self.assertEqual(["august 13, 2016"], result.entities["str_date"])
+        self.assertEqual(["february 02, 2017"], result.entities["end_date"])
+        self.assertEqual(["1900"], result.entities["budget"])
+        self.assertEqual([5, 1900], result.entities["number"])
+
+    def test_off_topic_is_none_intent(self):
+        result = GazetteerRecognizer().recognize_text("I want to dance")
+
+        self.assertEqual([NONE_INTENT], list(result.intents))
+        self.assertEqual({}, result.entities)
+
+    async def test_main_dialog_with_offline_recognizer(self):
+        async def exec_test(turn_context: TurnContext):
+            dialog_context = await dialogs.create_context(turn_context)
+            results = await dialog_context.continue_dialog()
+            if results.status == DialogTurnStatus.Empty:
+                await dialog_context.begin_dialog(MainDialog.__name__)
+
+            await conv_state.save_changes(turn_context)
+
+        adapter = TestAdapter(exec_test)
+        conv_state = ConversationState(MemoryStorage())
+        recognizer = FlightBookingRecognizer(
+            OfflineConfig(), fallback_recognizer=GazetteerRecognizer()
+        )
+
+        dialogs = DialogSet(conv_state.create_property("dialog_state"))
+        dialogs.add(MainDialog(recognizer, BookingDialog()))
+
+        step1 = await adapter.test("hi", "What can I help you with today?")
+        step2 = await step1.test(
+            "yes, how about going to neverland from caprica on august 13, 2016 "
+            "and back on february 02, 2017 for 5 adults. "
+            "for this trip, my budget would be 1900.",
+            "Please select a currency\n\n   1. Dollar\n   2. Euro\n   3. Pound\n   4. Yen",
+        )
+        step3 = await step2.send("Dollar")
+        await step3.assert_reply(
+            "Please confirm, I have you traveling to: Neverland"
+            " from: Caprica on: 2016-08-13."
+            " Returning on: 2017-02-02 with a budget of : 1900 Dollars."
+            " (1) Yes or (2) No"
+        )
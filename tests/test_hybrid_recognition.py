@@ -0,0 +1,67 @@
+import aiounittest
+
+from botbuilder.core import IntentScore, RecognizerResult
+from botbuilder.core.adapters import TestAdapter
+
+from flight_booking_recognizer import FlightBookingRecognizer, RecognitionPath
+from tests.luis_stub import LuisStub, make_turn, stub_config
+
+THRESHOLD = 0.7
+
+
+class ScoredRecognizer:
+    """Local recognizer answering BookFlight with a set score."""
+
+    def __init__(self, score: float):
+        self.score = score
+
+    def recognize_text(self, text: str) -> RecognizerResult:
+        return RecognizerResult(
+            text=text,
+            intents={"BookFlight": IntentScore(self.score)},
+            entities={"dst_city": ["berlin"]},
+        )
+
+
+class HybridRecognitionTest(aiounittest.AsyncTestCase):
+
+    async def recognize(self, scores):
+        """Recognize one turn per local score, against the LUIS stub."""
+        stub = await LuisStub().start()
+        try:
+            config = stub_config(stub.endpoint)
+            config.RECOGNITION_MODE = "hybrid"
+            config.HYBRID_CONFIDENCE_THRESHOLD = THRESHOLD
+            local_recognizer = ScoredRecognizer(0.0)
+            recognizer = FlightBookingRecognizer(config, local_recognizer=local_recognizer)
+
+            adapter = TestAdapter()
+            results = []
+            for index, score in enumerate(scores):
+                local_recognizer.score = score
+                turn = make_turn(adapter, index, "Book a flight from Lille to Paris")
+                results.append(await recognizer.recognize(turn))
+        finally:
+            await stub.stop()
+        return recognizer, stub, results
+
+    async def test_confident_local_result_skips_luis(self):
+        recognizer, stub, results = await self.recognize([THRESHOLD, 0.95])
+
+        self.assertEqual(0, stub.requests)
+        self.assertEqual([["berlin"]] * 2, [result.entities["dst_city"] for result in results])
+        self.assertEqual({RecognitionPath.LOCAL: 2}, recognizer.stats["paths"])
+        self.assertEqual(1.0, recognizer.stats["fast_path_ratio"])
+
+    async def test_unsure_local_result_goes_to_luis(self):
+        recognizer, stub, results = await self.recognize([THRESHOLD - 0.01, 0.95, 0.1, 0.2])
+
+        self.assertEqual(3, stub.requests)
+        self.assertEqual(
+            [["paris"], ["berlin"], ["paris"], ["paris"]],
+            [result.entities["dst_city"] for result in results],
+        )
+        stats = recognizer.stats
+        self.assertEqual({RecognitionPath.LOCAL: 1, RecognitionPath.LUIS: 3}, stats["paths"])
+        self.assertEqual(0.25, stats["fast_path_ratio"])
+        self.assertEqual(3, stats["latency"][RecognitionPath.LUIS]["count"])
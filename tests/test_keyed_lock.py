@@ -0,0 +1,144 @@
+import asyncio
+import os
+import tempfile
+
+import aiounittest
+
+from botbuilder.core import (
+    BotFrameworkAdapterSettings,
+    ConversationState,
+    MemoryStorage,
+    UserState,
+)
+from botbuilder.schema import Activity, ActivityTypes, ChannelAccount, ConversationAccount, DeliveryModes
+
+from adapter_with_error_handler import AdapterWithErrorHandler
+from bots import DialogAndWelcomeBot
+from config import DefaultConfig
+from dialogs import BookingDialog, MainDialog
+from flight_booking_recognizer import FlightBookingRecognizer
+from helpers.keyed_lock import KeyedLock
+from helpers.sqlite_storage import SqliteStorage
+
+CONVERSATIONS = 5
+BURST = 12
+SCRIPT = ["hi", "Paris", "Lille", "2023-01-01", "2023-01-31", "1000 euros", "yes"]
+
+
+class OfflineConfig(DefaultConfig):
+    LUIS_APP_ID = ""
+    LUIS_API_KEY = ""
+    LUIS_API_HOST_NAME = ""
+
+
+def message(conversation: str, index: int, text: str) -> Activity:
+    return Activity(
+        type=ActivityTypes.message,
+        id=f"{conversation}-{index}",
+        text=text,
+        channel_id="test",
+        service_url="http://localhost:1",
+        delivery_mode=DeliveryModes.expect_replies,
+        conversation=ConversationAccount(id=conversation),
+        from_property=ChannelAccount(id=f"user-{conversation}"),
+        recipient=ChannelAccount(id="bot"),
+    )
+
+
+def bot_adapter(storage, turn_lock: KeyedLock):
+    conversation_state = ConversationState(storage)
+    adapter = AdapterWithErrorHandler(
+        BotFrameworkAdapterSettings("", ""), conversation_state, turn_lock
+    )
+    dialog = MainDialog(FlightBookingRecognizer(OfflineConfig()), BookingDialog())
+    bot = DialogAndWelcomeBot(conversation_state, UserState(MemoryStorage()), dialog, None)
+    return adapter, bot
+
+
+async def replies(adapter, bot, activity: Activity):
+    response = await adapter.process_activity(activity, "", bot.on_turn)
+    return [
+        reply["text"]
+        for reply in response.body["activities"]
+        if reply["type"] == ActivityTypes.message
+    ]
+
+
+class KeyedLockTest(aiounittest.AsyncTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    async def test_same_key_runs_one_at_a_time_in_arrival_order(self):
+        lock = KeyedLock()
+        running, order = set(), []
+
+        async def work(key, index):
+            async with lock.hold(key):
+                self.assertNotIn(key, running)
+                running.add(key)
+                await asyncio.sleep(0)
+                order.append((key, index))
+                running.discard(key)
+
+        await asyncio.gather(*[work(index % 2, index) for index in range(20)])
+
+        self.assertEqual(list(range(0, 20, 2)), [index for key, index in order if key == 0])
+        self.assertEqual(list(range(1, 20, 2)), [index for key, index in order if key == 1])
+        self.assertEqual(0, lock.stats["held"])
+
+    async def test_waiting_is_bounded(self):
+        lock = KeyedLock(max_wait=0.01, max_waiters=1)
+        await lock.acquire("conversation")
+
+        waiter = asyncio.ensure_future(lock.acquire("conversation"))
+        await asyncio.sleep(0)
+        with self.assertRaises(asyncio.QueueFull):
+            await lock.acquire("conversation")
+        with self.assertRaises(asyncio.TimeoutError):
+            await waiter
+
+        lock.release("conversation")
+        self.assertFalse(lock.locked("conversation"))
+        self.assertEqual((1, 1), (lock.timeouts, lock.rejected))
+
+    async def test_cancelled_waiter_does_not_block_the_queue(self):
+        lock = KeyedLock()
+        await lock.acquire("conversation")
+        cancelled = asyncio.ensure_future(lock.acquire("conversation"))
+        queued = asyncio.ensure_future(lock.acquire("conversation"))
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        lock.release("conversation")
+        await asyncio.wait_for(queued, 1)
+        self.assertTrue(lock.locked("conversation"))
+
+    async def test_bursts_to_one_conversation_replay_as_if_sequential(self):
+        adapter, bot = bot_adapter(MemoryStorage(), None)
+        expected = [
+            await replies(adapter, bot, message("sequential", index, text))
+            for index, text in enumerate((SCRIPT * 2)[:BURST])
+        ]
+
+        # State reads and writes suspend the turn, as they do in production.
+        storage = SqliteStorage(os.path.join(self.directory.name, "state.db"))
+        turn_lock = KeyedLock(max_wait=30)
+        adapter, bot = bot_adapter(storage, turn_lock)
+        bursts = await asyncio.gather(*[
+            asyncio.gather(*[
+                replies(adapter, bot, message(f"conversation-{conversation}", index, text))
+                for index, text in enumerate((SCRIPT * 2)[:BURST])
+            ])
+            for conversation in range(CONVERSATIONS)
+        ])
+        await storage.close()
+
+        for burst in bursts:
+            self.assertEqual(expected, list(burst))
+        self.assertEqual(CONVERSATIONS * BURST, turn_lock.acquired)
+        self.assertGreater(turn_lock.contended, 0)
+        self.assertEqual(0, turn_lock.stats["held"])
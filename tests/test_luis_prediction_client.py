@@ -0,0 +1,104 @@
+import asyncio
+import uuid
+
+import aiounittest
+from botbuilder.core.adapters import TestAdapter
+
+from config import DefaultConfig
+from flight_booking_recognizer import FlightBookingRecognizer
+from helpers.luis_helper import LuisHelper
+from luis_prediction_client import LuisPredictionClient, LuisPredictionError
+from tests.luis_stub import LuisStub, make_turn, stub_config
+
+
+def client_config(endpoint: str, timeout: float = 3.0) -> DefaultConfig:
+    config = DefaultConfig()
+    config.LUIS_APP_ID = str(uuid.uuid4())
+    config.LUIS_API_KEY = str(uuid.uuid4())
+    config.LUIS_API_HOST_NAME = endpoint
+    config.LUIS_TIMEOUT = timeout
+    config.LUIS_MAX_RETRIES = 2
+    config.LUIS_RETRY_BACKOFF = 0.01
+    return config
+
+
+class LuisPredictionClientTest(aiounittest.AsyncTestCase):
+
+    async def test_parses_only_the_fields_luis_helper_reads(self):
+        stub = await LuisStub().start()
+        try:
+            client = LuisPredictionClient(client_config(stub.endpoint))
+            result = await client.predict("from lille to paris on 2023-01-01")
+        finally:
+            await LuisPredictionClient.close()
+            await stub.stop()
+
+        self.assertEqual(0.97, result.intents["BookFlight"].score)
+        self.assertEqual(["paris"], result.entities["dst_city"])
+        self.assertEqual(["lille"], result.entities["or_city"])
+        self.assertEqual(["paris", "lille"], result.entities["geographyV2_city"])
+        self.assertEqual(
+            [{"type": "date", "timex": ["2023-01-01"]}], result.entities["datetime"]
+        )
+        self.assertEqual([1000], result.entities["number"])
+
+    async def test_stock_v3_recognizer_gives_the_same_booking_details(self):
+        stub = await LuisStub().start()
+        try:
+            details = []
+            for client in ("native", "botbuilder"):
+                config = stub_config(stub.endpoint)
+                config.LUIS_CLIENT = client
+                recognizer = FlightBookingRecognizer(config)
+                turn = make_turn(TestAdapter(), 0, "from lille to paris on 2023-01-01")
+                intent, result = await LuisHelper.execute_luis_query(recognizer, turn)
+                self.assertEqual("BookFlight", intent, client)
+                details.append(result)
+        finally:
+            await LuisPredictionClient.close()
+            await stub.stop()
+
+        native, stock = details
+        self.assertEqual(["Paris", "Lille"], native.geo_list)
+        self.assertEqual(native.__getstate__(), stock.__getstate__())
+
+    async def test_requests_reuse_pooled_connections(self):
+        stub = await LuisStub().start()
+        try:
+            client = LuisPredictionClient(client_config(stub.endpoint))
+            for _ in range(20):
+                await client.predict("to paris")
+        finally:
+            await LuisPredictionClient.close()
+            await stub.stop()
+
+        self.assertEqual(20, stub.requests)
+        self.assertEqual(1, len(stub.connections))
+
+    async def test_retries_server_errors(self):
+        stub = await LuisStub(fail_first=2).start()
+        try:
+            client = LuisPredictionClient(client_config(stub.endpoint))
+            result = await client.predict("to paris")
+        finally:
+            await LuisPredictionClient.close()
+            await stub.stop()
+
+        self.assertEqual(["paris"], result.entities["dst_city"])
+        self.assertEqual(3, stub.requests)
+        self.assertEqual(2, client.retries)
+
+    async def test_deadline_covers_every_attempt(self):
+        stub = await LuisStub(delay=0.5).start()
+        try:
+            client = LuisPredictionClient(client_config(stub.endpoint, timeout=0.2))
+            start = asyncio.get_running_loop().time()
+            with self.assertRaises(LuisPredictionError):
+                await client.predict("to paris")
+            elapsed = asyncio.get_running_loop().time() - start
+        finally:
+            await LuisPredictionClient.close()
+            await stub.stop()
+
+        self.assertLess(elapsed, 0.45)
+        self.assertEqual(1, client.failures)
@@ -0,0 +1,72 @@
+import aiounittest
+
+from helpers.parsing_service import ParsingService, parse_text
+from helpers.recognizer_models import ModelType
+
+UTTERANCES = {
+    ModelType.DATETIME: "from May 5th to next Friday",
+    ModelType.NUMBER: "two adults and 3 children",
+    ModelType.CURRENCY: "a budget of 500 euros",
+}
+
+
+class ParsingServiceTest(aiounittest.AsyncTestCase):
+
+    async def parse_all(self, service: ParsingService) -> dict:
+        return {
+            model_type: await service.parse(model_type, text)
+            for model_type, text in UTTERANCES.items()
+        }
+
+    async def test_every_mode_gives_the_same_results(self):
+        expected = {
+            model_type: parse_text(model_type, "en-us", text)
+            for model_type, text in UTTERANCES.items()
+        }
+        self.assertTrue(all(expected.values()))
+
+        for mode in (ParsingService.INLINE, ParsingService.THREAD, ParsingService.PROCESS):
+            with self.subTest(mode):
+                service = ParsingService()
+                service.configure(mode, 1)
+                service.start()
+                try:
+                    self.assertEqual(expected, await self.parse_all(service))
+                finally:
+                    service.shutdown()
+
+    async def test_shutdown_stops_the_workers(self):
+        for mode in (ParsingService.THREAD, ParsingService.PROCESS):
+            with self.subTest(mode):
+                service = ParsingService()
+                service.configure(mode, 1)
+                service.start()
+                await service.parse(ModelType.NUMBER, "two")
+                executor = service._executor
+
+                service.shutdown()
+                self.assertIsNone(service._executor)
+                with self.assertRaises(RuntimeError):
+                    executor.submit(parse_text, ModelType.NUMBER, "en-us", "two")
+                # A second shutdown is harmless, and the pool can be started again.
+                service.shutdown()
+                with self.assertRaises(RuntimeError):
+                    await service.parse(ModelType.NUMBER, "two")
+                service.start()
+                self.assertEqual(
+                    parse_text(ModelType.NUMBER, "en-us", "two"),
+                    await service.parse(ModelType.NUMBER, "two"),
+                )
+                service.shutdown()
+
+    async def test_pools_are_not_started_by_a_turn(self):
+        for mode in (ParsingService.THREAD, ParsingService.PROCESS):
+            with self.subTest(mode):
+                service = ParsingService(mode, 1)
+                with self.assertRaises(RuntimeError):
+                    await service.parse(ModelType.NUMBER, "two")
+                self.assertIsNone(service._executor)
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ParsingService().configure("fork")
@@ -0,0 +1,78 @@
+import os
+import socket
+import unittest
+import urllib.request
+
+from aiohttp import web
+
+from helpers.prefork import PreforkServer
+
+
+def pid_app(argv):
+    async def pid(request):
+        return web.Response(text=str(os.getpid()))
+
+    app = web.Application()
+    app.router.add_get("/pid", pid)
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class PreforkServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.port = free_port()
+        self.server = PreforkServer(pid_app, "127.0.0.1", self.port, workers=2, shutdown_timeout=5)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def served_by(self, requests: int = 40) -> set:
+        # A new connection per request, so the kernel picks a worker every time.
+        return {
+            int(urllib.request.urlopen(f"http://127.0.0.1:{self.port}/pid", timeout=5).read())
+            for _ in range(requests)
+        }
+
+    def worker_pids(self) -> set:
+        return {process.pid for process in self.server._processes}
+
+    def test_workers_share_the_port(self):
+        self.server.start()
+        self.assertEqual(self.worker_pids(), self.served_by())
+
+    def test_rolling_restart_replaces_every_worker(self):
+        self.server.start()
+        before = self.worker_pids()
+
+        self.server.rolling_restart()
+
+        after = self.worker_pids()
+        self.assertEqual(2, len(after))
+        self.assertFalse(before & after)
+        self.assertTrue(self.served_by() <= after)
+
+    def test_dead_worker_is_replaced(self):
+        self.server.start()
+        crashed = self.server._processes[0]
+        crashed.kill()
+        crashed.join()
+
+        self.server._replace_dead_workers()
+
+        self.assertEqual(1, self.server.crashes)
+        self.assertNotIn(crashed.pid, self.worker_pids())
+        self.assertTrue(self.served_by() <= self.worker_pids())
+
+    def test_importing_the_app_builds_nothing(self):
+        # The supervisor and every spawned worker import app.py; only the
+        # workers build the bot, through init_func.
+        import app
+
+        self.assertIsNone(app.BOT)
+        self.assertIsNone(app.MEMORY)
@@ -0,0 +1,126 @@
+import asyncio
+
+import aiounittest
+
+from botbuilder.core import (
+    ConversationState,
+    IntentScore,
+    MemoryStorage,
+    RecognizerResult,
+    TurnContext,
+)
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import DialogSet, DialogTurnStatus
+from botbuilder.schema import ActivityTypes
+
+from dialogs import MainDialog, BookingDialog
+from helpers.circuit_breaker import CircuitBreaker
+from luis_prediction_client import LuisPredictionError
+
+
+class SlowRecognizer:
+    """Recognizer taking ``delay`` seconds to answer BookFlight."""
+
+    is_configured = True
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return RecognizerResult(
+            text=turn_context.activity.text,
+            intents={"BookFlight": IntentScore(0.9)},
+            entities={"dst_city": ["paris"]},
+        )
+
+
+class FailingRecognizer:
+    """Recognizer whose deadline runs out before the turn budget does."""
+
+    is_configured = True
+
+    def __init__(self):
+        self.calls = 0
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        self.calls += 1
+        raise LuisPredictionError("LUIS deadline of 0.01s exceeded")
+
+
+def make_adapter(recognizer, circuit_breaker=None) -> TestAdapter:
+    async def exec_test(turn_context: TurnContext):
+        dialog_context = await dialogs.create_context(turn_context)
+        results = await dialog_context.continue_dialog()
+        if results.status == DialogTurnStatus.Empty:
+            await dialog_context.begin_dialog(MainDialog.__name__)
+
+        await conv_state.save_changes(turn_context)
+
+    conv_state = ConversationState(MemoryStorage())
+    dialogs = DialogSet(conv_state.create_property("dialog_state"))
+    dialogs.add(
+        MainDialog(
+            recognizer,
+            BookingDialog(),
+            recognition_timeout=0.2,
+            typing_delay=0.05,
+            circuit_breaker=circuit_breaker,
+        )
+    )
+    return TestAdapter(exec_test)
+
+
+def is_typing(activity, description=None):
+    assert activity.type == ActivityTypes.typing
+
+
+class RecognitionBudgetTest(aiounittest.AsyncTestCase):
+
+    async def test_fast_recognition_is_used(self):
+        adapter = make_adapter(SlowRecognizer(delay=0))
+
+        step1 = await adapter.test("hi", "What can I help you with today?")
+        await step1.test("book a flight", "From what city will you be travelling?")
+
+    async def test_slow_recognition_falls_back_to_prompts(self):
+        adapter = make_adapter(SlowRecognizer(delay=1))
+
+        step1 = await adapter.test("hi", "What can I help you with today?")
+        step2 = await step1.send("book a flight to paris")
+        step3 = await step2.assert_reply(is_typing)
+        await step3.assert_reply("To what city would you like to travel?")
+
+    async def test_breaker_skips_luis_after_repeated_timeouts(self):
+        recognizer = SlowRecognizer(delay=1)
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+        adapter = make_adapter(recognizer, breaker)
+
+        step1 = await adapter.test("hi", "What can I help you with today?")
+        step2 = await step1.send("book a flight to paris")
+        step3 = await step2.assert_reply(is_typing)
+        step4 = await step3.assert_reply("To what city would you like to travel?")
+        step5 = await step4.test("cancel", "Cancelling")
+        step6 = await step5.assert_reply("What else can I do for you?")
+        # The breaker is open: no typing indicator, no recognizer call.
+        await step6.test("book a flight to paris", "To what city would you like to travel?")
+
+        self.assertEqual(1, recognizer.calls)
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+
+    async def test_recognizer_errors_fall_back_and_open_the_breaker(self):
+        recognizer = FailingRecognizer()
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+        adapter = make_adapter(recognizer, breaker)
+
+        step = await adapter.test("hi", "What can I help you with today?")
+        for _ in range(2):
+            step = await step.test("book a flight to paris", "To what city would you like to travel?")
+            step = await step.test("cancel", "Cancelling")
+            step = await step.assert_reply("What else can I do for you?")
+        await step.test("book a flight to paris", "To what city would you like to travel?")
+
+        self.assertEqual(2, recognizer.calls)
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
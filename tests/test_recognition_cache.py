@@ -0,0 +1,78 @@
+import aiounittest
+
+from botbuilder.core import IntentScore, RecognizerResult
+
+from helpers.recognition_cache import RecognitionCache
+
+
+def result(intent: str, text: str = "book a flight to paris") -> RecognizerResult:
+    return RecognizerResult(
+        text=text,
+        intents={intent: IntentScore(0.9)},
+        entities={"dst_city": ["paris"]},
+    )
+
+
+class RecognitionCacheTest(aiounittest.AsyncTestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.cache = RecognitionCache(max_size=2, ttl=10, none_ttl=100, clock=lambda: self.now)
+
+    def test_entries_expire_after_ttl(self):
+        key = RecognitionCache.make_key("app", "0.1", "Book a  flight")
+        self.cache.put(key, result("BookFlight"))
+
+        self.now = 9.9
+        self.assertEqual("BookFlight", next(iter(self.cache.get(key).intents)))
+        self.now = 10
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(0, len(self.cache))
+        self.assertEqual(1, self.cache.expirations)
+
+    def test_none_intent_results_use_none_ttl(self):
+        key = RecognitionCache.make_key("app", "0.1", "what is the weather")
+        self.cache.put(key, result(RecognitionCache.NONE_INTENT))
+
+        self.now = 99
+        self.assertIsNotNone(self.cache.get(key))
+        self.assertEqual(1, self.cache.negative_hits)
+        self.now = 100
+        self.assertIsNone(self.cache.get(key))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        first, second, third = (
+            RecognitionCache.make_key("app", "0.1", text) for text in ("one", "two", "three")
+        )
+        self.cache.put(first, result("BookFlight"))
+        self.cache.put(second, result("BookFlight"))
+        self.cache.get(first)
+        self.cache.put(third, result("BookFlight"))
+
+        self.assertIsNotNone(self.cache.get(first))
+        self.assertIsNone(self.cache.get(second))
+        self.assertIsNotNone(self.cache.get(third))
+        self.assertEqual(1, self.cache.evictions)
+
+    def test_cached_results_are_copies(self):
+        key = RecognitionCache.make_key("app", "0.1", "book a flight to paris")
+        stored = result("BookFlight")
+        self.cache.put(key, stored)
+        stored.entities["dst_city"].append("london")
+
+        served = self.cache.get(key)
+        self.assertEqual(["paris"], served.entities["dst_city"])
+        served.entities["dst_city"].clear()
+        self.assertEqual(["paris"], self.cache.get(key).entities["dst_city"])
+
+    def test_counters(self):
+        key = RecognitionCache.make_key("app", "0.1", "book a flight")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, result("BookFlight"))
+        # Case and whitespace do not make a different utterance.
+        self.cache.get(RecognitionCache.make_key("app", "0.1", "  BOOK a flight "))
+        self.cache.get(RecognitionCache.make_key("app", "0.2", "book a flight"))
+
+        stats = self.cache.stats
+        self.assertEqual((1, 2, 0), (stats["hits"], stats["misses"], stats["negative_hits"]))
+        self.assertEqual(1, stats["size"])
@@ -0,0 +1,24 @@
+import aiounittest
+
+from recognizers_text import Culture
+
+from helpers.recognizer_models import ModelType, RecognizerModelRegistry, normalize_culture
+
+
+class RecognizerModelRegistryTest(aiounittest.AsyncTestCase):
+
+    def test_warm_models_serve_channel_locales(self):
+        registry = RecognizerModelRegistry()
+        registry.warm(model_types=[ModelType.NUMBER])
+        model = registry.get(ModelType.NUMBER)
+
+        for locale in ("en-US", "en-us", "EN-us", "en-GB", None):
+            self.assertIs(model, registry.get(ModelType.NUMBER, locale), locale)
+        self.assertEqual(["en-us/number"], list(registry.build_times))
+
+    def test_locales_map_to_supported_cultures(self):
+        self.assertEqual(Culture.French, normalize_culture("fr-CA"))
+        self.assertEqual(Culture.Portuguese, normalize_culture("pt"))
+        # Recognizers-Text parses unsupported cultures in English.
+        self.assertEqual(Culture.English, normalize_culture("de-DE"))
+        self.assertEqual(Culture.English, normalize_culture(""))
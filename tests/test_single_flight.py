@@ -0,0 +1,59 @@
+import asyncio
+
+import aiounittest
+
+from botbuilder.core.adapters import TestAdapter
+
+from flight_booking_recognizer import FlightBookingRecognizer
+from tests.luis_stub import LuisStub, make_turn, stub_config
+
+CONCURRENT_TURNS = 300
+
+
+class SingleFlightTest(aiounittest.AsyncTestCase):
+
+    async def test_concurrent_identical_turns_share_one_request(self):
+        stub = await LuisStub(delay=0.2).start()
+        try:
+            recognizer = FlightBookingRecognizer(stub_config(stub.endpoint))
+            adapter = TestAdapter()
+            turns = [
+                make_turn(adapter, index, "Book a flight from Lille to Paris")
+                for index in range(CONCURRENT_TURNS)
+            ]
+
+            pending = [
+                asyncio.ensure_future(recognizer.recognize(turn)) for turn in turns
+            ]
+            await asyncio.sleep(0.1)
+            self.assertEqual(CONCURRENT_TURNS, recognizer.single_flight.waiters)
+            self.assertEqual(1, recognizer.single_flight.in_flight)
+
+            results = await asyncio.gather(*pending)
+        finally:
+            await stub.stop()
+
+        self.assertEqual(1, stub.requests)
+        self.assertEqual(0, recognizer.single_flight.waiters)
+        self.assertEqual(CONCURRENT_TURNS - 1, recognizer.single_flight.coalesced)
+        for result in results:
+            self.assertEqual(["paris"], result.entities["dst_city"])
+        # Every waiter got its own copy of the shared result.
+        self.assertEqual(CONCURRENT_TURNS, len({id(result) for result in results}))
+
+    async def test_different_utterances_are_not_coalesced(self):
+        stub = await LuisStub(delay=0.05).start()
+        try:
+            recognizer = FlightBookingRecognizer(stub_config(stub.endpoint))
+            adapter = TestAdapter()
+            await asyncio.gather(
+                *[
+                    recognizer.recognize(make_turn(adapter, index, f"to city {index}"))
+                    for index in range(10)
+                ]
+            )
+        finally:
+            await stub.stop()
+
+        self.assertEqual(10, stub.requests)
+        self.assertEqual(0, recognizer.single_flight.coalesced)
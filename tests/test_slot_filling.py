@@ -0,0 +1,67 @@
+import aiounittest
+
+from botbuilder.core import ConversationState, MemoryStorage, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import DialogSet, DialogTurnStatus
+
+from booking_details import BookingDetails
+from dialogs import BookingDialog
+from gazetteer_recognizer import GazetteerRecognizer
+
+FULL_REQUEST = (
+    "from caprica to neverland on august 13, 2016 and back on august 20, 2016 "
+    "with a budget of 1900 euros"
+)
+
+
+def booking_adapter(booking_dialog: BookingDialog, results: list) -> TestAdapter:
+    async def exec_test(turn_context: TurnContext):
+        dialog_context = await dialogs.create_context(turn_context)
+        turn_results = await dialog_context.continue_dialog()
+        if turn_results.status == DialogTurnStatus.Empty:
+            await dialog_context.begin_dialog(BookingDialog.__name__, BookingDetails())
+        elif turn_results.status == DialogTurnStatus.Complete:
+            results.append(turn_results.result)
+        await conv_state.save_changes(turn_context)
+
+    conv_state = ConversationState(MemoryStorage())
+    dialogs = DialogSet(conv_state.create_property("dialog_state"))
+    dialogs.add(booking_dialog)
+    return TestAdapter(exec_test)
+
+
+class SlotFillingTest(aiounittest.AsyncTestCase):
+
+    async def test_one_answer_fills_every_slot(self):
+        results = []
+        adapter = booking_adapter(BookingDialog(slot_recognizer=GazetteerRecognizer()), results)
+
+        await adapter.test("Hello", "To what city would you like to travel?")
+        await adapter.test(
+            FULL_REQUEST,
+            "Please confirm, I have you traveling to: Neverland from: Caprica on: 2016-08-13."
+            " Returning on: 2016-08-20 with a budget of : 1900 Euro. (1) Yes or (2) No",
+        )
+        await adapter.send("yes")
+
+        booking = results[0]
+        self.assertEqual(("Neverland", "Caprica"), (booking.destination, booking.origin))
+        self.assertEqual(("2016-08-13", "2016-08-20"), (booking.start_date, booking.end_date))
+        self.assertEqual("1900 Euro", booking.budget)
+
+    async def test_partial_answer_only_skips_the_slots_it_fills(self):
+        adapter = booking_adapter(BookingDialog(slot_recognizer=GazetteerRecognizer()), [])
+
+        await adapter.test("Hello", "To what city would you like to travel?")
+        await adapter.test(
+            "to neverland on august 13, 2016", "From what city will you be travelling?"
+        )
+        await adapter.test(
+            "Caprica", "On what date would you like to return from your travel?"
+        )
+
+    async def test_without_slot_recognizer_the_answer_is_the_destination(self):
+        adapter = booking_adapter(BookingDialog(), [])
+
+        await adapter.test("Hello", "To what city would you like to travel?")
+        await adapter.test(FULL_REQUEST, "From what city will you be travelling?")
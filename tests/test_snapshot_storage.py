@@ -0,0 +1,81 @@
+import aiounittest
+
+from botbuilder.core import MemoryStorage, StoreItem, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import DialogSet, DialogTurnStatus
+
+from booking_details import BookingDetails
+from dialogs import BookingDialog
+from helpers.snapshot_storage import SnapshotConversationState, SnapshotMemoryStorage
+
+
+class SimpleStoreItem(StoreItem):
+    def __init__(self, counter=1, e_tag="*"):
+        super(SimpleStoreItem, self).__init__()
+        self.counter = counter
+        self.e_tag = e_tag
+
+
+def booking_adapter(conv_state) -> TestAdapter:
+    async def exec_test(turn_context: TurnContext):
+        dialog_context = await dialogs.create_context(turn_context)
+        results = await dialog_context.continue_dialog()
+        if results.status == DialogTurnStatus.Empty:
+            await dialog_context.begin_dialog(BookingDialog.__name__, BookingDetails())
+        await conv_state.save_changes(turn_context)
+
+    dialogs = DialogSet(conv_state.create_property("dialog_state"))
+    dialogs.add(BookingDialog())
+    return TestAdapter(exec_test)
+
+
+class SnapshotStorageTest(aiounittest.AsyncTestCase):
+
+    async def test_reads_never_expose_stored_objects(self):
+        storage = SnapshotMemoryStorage()
+        await storage.write({"user": {"details": BookingDetails(destination="Paris")}})
+        first = await storage.read(["user"])
+        first["user"]["details"].destination = "Rome"
+
+        second = await storage.read(["user"])
+        self.assertEqual("Paris", second["user"]["details"].destination)
+
+    async def test_only_dirty_properties_are_replaced(self):
+        storage = SnapshotMemoryStorage()
+        await storage.write({"user": {"a": [1, 2, 3], "b": "x"}})
+        untouched = storage.memory["user"]["a"]
+
+        await storage.write({"user": {"a": [1, 2, 3], "b": "y"}})
+        await storage.write({"user": {"a": [1, 2, 3], "b": "y"}})
+
+        self.assertIs(untouched, storage.memory["user"]["a"])
+        self.assertEqual(3, storage.stats["dirty_properties"])
+        self.assertEqual(1, storage.stats["skipped_writes"])
+
+    async def test_e_tags_behave_like_memory_storage(self):
+        storage = SnapshotMemoryStorage()
+        await storage.write({"item": SimpleStoreItem(e_tag="1")})
+        await storage.write({"item": SimpleStoreItem(counter=2, e_tag="*")})
+        current = (await storage.read(["item"]))["item"]
+
+        with self.assertRaises(KeyError):
+            await storage.write({"item": SimpleStoreItem(counter=3, e_tag="bad")})
+        current.counter = 4
+        await storage.write({"item": current})
+        self.assertEqual(4, (await storage.read(["item"]))["item"].counter)
+
+    async def test_booking_dialog_runs_on_snapshots(self):
+        storage = SnapshotMemoryStorage()
+        adapter = booking_adapter(SnapshotConversationState(storage))
+
+        step1 = await adapter.test("Hello", "To what city would you like to travel?")
+        step2 = await step1.test("Paris", "From what city will you be travelling?")
+        await step2.test("Lille", "On what date would you like to start your travel?")
+
+        self.assertEqual(3, storage.stats["writes"])
+
+    async def test_snapshot_state_works_with_other_storages(self):
+        adapter = booking_adapter(SnapshotConversationState(MemoryStorage()))
+
+        step1 = await adapter.test("Hello", "To what city would you like to travel?")
+        await step1.test("Paris", "From what city will you be travelling?")
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import tempfile
+
+import aiounittest
+
+from botbuilder.core import ConversationState, StoreItem
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import DialogSet, DialogTurnStatus
+
+from booking_details import BookingDetails
+from dialogs import BookingDialog
+from helpers.sqlite_storage import SqliteStorage
+
+
+class SimpleStoreItem(StoreItem):
+    def __init__(self, counter=1, e_tag="*"):
+        super(SimpleStoreItem, self).__init__()
+        self.counter = counter
+        self.e_tag = e_tag
+
+
+class SqliteStorageTest(aiounittest.AsyncTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "state.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    async def test_state_survives_a_restart(self):
+        storage = SqliteStorage(self.path)
+        await storage.write({"details": {"booking": BookingDetails(destination="Paris")}})
+        await storage.close()
+
+        storage = SqliteStorage(self.path)
+        data = await storage.read(["details", "missing"])
+        await storage.close()
+
+        self.assertEqual(["details"], list(data))
+        self.assertEqual("Paris", data["details"]["booking"].destination)
+
+    async def test_reads_are_copies(self):
+        storage = SqliteStorage(self.path)
+        await storage.write({"user": {"count": 1}})
+        first = await storage.read(["user"])
+        first["user"]["count"] = 2
+        second = await storage.read(["user"])
+        await storage.close()
+
+        self.assertEqual(1, second["user"]["count"])
+
+    async def test_stale_e_tag_is_rejected(self):
+        storage = SqliteStorage(self.path)
+        await storage.write({"item": SimpleStoreItem(e_tag="1")})
+        await storage.write({"item": SimpleStoreItem(counter=2, e_tag="*")})
+        current = (await storage.read(["item"]))["item"]
+
+        with self.assertRaises(KeyError):
+            await storage.write({"item": SimpleStoreItem(counter=3, e_tag="1")})
+        current.counter = 4
+        await storage.write({"item": current})
+        data = await storage.read(["item"])
+        await storage.close()
+
+        self.assertEqual(4, data["item"].counter)
+
+    async def test_delete(self):
+        storage = SqliteStorage(self.path)
+        await storage.write({"a": {"value": 1}, "b": {"value": 2}})
+        await storage.delete(["a"])
+        data = await storage.read(["a", "b"])
+        await storage.close()
+
+        self.assertEqual(["b"], list(data))
+
+    async def test_concurrent_writes_are_batched(self):
+        storage = SqliteStorage(self.path)
+        await asyncio.gather(
+            *[storage.write({f"conversation/{i}": {"turn": i}}) for i in range(200)]
+        )
+        await storage.close()
+        storage_after = SqliteStorage(self.path, cache_size=0)
+        data = await storage_after.read([f"conversation/{i}" for i in range(200)])
+        await storage_after.close()
+
+        self.assertEqual(200, len(data))
+        self.assertEqual(200, storage.stats["writes"])
+        self.assertLess(storage.stats["commits"], 10)
+
+    async def test_shared_storage_sees_other_writers(self):
+        first = SqliteStorage(self.path, shared=True)
+        second = SqliteStorage(self.path, shared=True)
+        await first.write({"key": {"value": 1}})
+        self.assertEqual(1, (await second.read(["key"]))["key"]["value"])
+
+        await first.write({"key": {"value": 2}})
+        self.assertEqual(2, (await second.read(["key"]))["key"]["value"])
+        await first.close()
+        await second.close()
+
+    async def test_dialog_resumes_after_restart(self):
+        async def exec_test(turn_context):
+            dialog_context = await dialogs.create_context(turn_context)
+            results = await dialog_context.continue_dialog()
+            if results.status == DialogTurnStatus.Empty:
+                await dialog_context.begin_dialog(BookingDialog.__name__, BookingDetails())
+            await conv_state.save_changes(turn_context)
+
+        storage = SqliteStorage(self.path)
+        conv_state = ConversationState(storage)
+        dialogs = DialogSet(conv_state.create_property("dialog_state"))
+        dialogs.add(BookingDialog())
+        adapter = TestAdapter(exec_test)
+        await adapter.test("hi", "To what city would you like to travel?")
+        await storage.close()
+
+        # A new process: same file, fresh storage and dialogs.
+        storage = SqliteStorage(self.path)
+        conv_state = ConversationState(storage)
+        dialogs = DialogSet(conv_state.create_property("dialog_state"))
+        dialogs.add(BookingDialog())
+        adapter = TestAdapter(exec_test)
+        await adapter.test("Paris", "From what city will you be travelling?")
+        await storage.close()
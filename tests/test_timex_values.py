@@ -0,0 +1,49 @@
+import datetime
+import unittest
+
+from booking_details import BookingDetails
+from dialogs import DateResolverDialog
+from timex_values import date_ordinal, date_range, is_definite, timex_info
+
+
+class TimexValuesTest(unittest.TestCase):
+
+    def test_definite_dates_have_ordinals(self):
+        self.assertTrue(is_definite("2023-01-31"))
+        self.assertEqual(datetime.date(2023, 1, 31).toordinal(), date_ordinal("2023-01-31"))
+        self.assertEqual(datetime.date(2023, 1, 31).toordinal(), date_ordinal("2023-01-31T10"))
+
+    def test_ambiguous_and_impossible_dates_have_none(self):
+        self.assertFalse(is_definite("XXXX-01-31"))
+        self.assertFalse(is_definite(None))
+        self.assertIsNone(date_ordinal("XXXX-01-31"))
+        self.assertIsNone(date_ordinal("2023-02-31"))
+        self.assertIsNone(date_ordinal(None))
+
+    def test_ranges_with_definite_ends(self):
+        self.assertEqual(("2016-08-13", "2016-08-20"), date_range("(2016-08-13,2016-08-20,P7D)"))
+        self.assertIsNone(date_range("(XXXX-08-13,XXXX-08-20,P7D)"))
+        self.assertIsNone(date_range("2016-08-13"))
+        self.assertIsNone(date_range(None))
+
+    def test_analysis_is_memoized(self):
+        timex_info("2031-05-17")
+        hits = timex_info.cache_info().hits
+        for _ in range(3):
+            is_definite("2031-05-17")
+            date_ordinal("2031-05-17")
+        self.assertEqual(hits + 6, timex_info.cache_info().hits)
+
+    def test_booking_details_carry_ordinals(self):
+        details = BookingDetails(start_date="2022-12-31", end_date="2023-01-01")
+        self.assertEqual(details.start_ordinal + 1, details.end_ordinal)
+
+        details.end_date = "XXXX-01-01"
+        self.assertIsNone(details.end_ordinal)
+
+    def test_range_check_compares_days(self):
+        same_day = BookingDetails(start_date="2023-01-31T10", end_date="2023-01-31")
+        self.assertFalse(DateResolverDialog.is_reversed(same_day))
+
+        reversed_dates = BookingDetails(start_date="2023-02-01", end_date="2023-01-31")
+        self.assertTrue(DateResolverDialog.is_reversed(reversed_dates))
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import time
+import uuid
+
+import aiounittest
+import jwt
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from botbuilder.core import BotFrameworkAdapterSettings, ConversationState, MemoryStorage
+from botbuilder.schema import (
+    Activity,
+    ActivityTypes,
+    ChannelAccount,
+    ConversationAccount,
+    DeliveryModes,
+)
+from botframework.connector.auth import (
+    AuthenticationConstants,
+    ChannelValidation,
+    JwtTokenExtractor,
+)
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from adapter_with_error_handler import AdapterWithErrorHandler
+from helpers.token_validation import SigningKeyRefresher, VerifiedTokenCache
+
+APP_ID = str(uuid.uuid4())
+SERVICE_URL = "https://smba.trafficmanager.net/emea/"
+
+
+class SigningAuthority:
+    """Mints channel tokens and serves their keys from a stand-in OpenID endpoint."""
+
+    def __init__(self):
+        self.private_keys = {}
+        self.requests = 0
+        self.server: TestServer = None
+        self.rotate()
+
+    def rotate(self) -> str:
+        key_id = str(uuid.uuid4())
+        self.private_keys[key_id] = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.key_id = key_id
+        return key_id
+
+    def mint(self, lifetime: float = 3600, **claims) -> str:
+        now = int(time.time())
+        payload = {
+            "iss": AuthenticationConstants.TO_BOT_FROM_CHANNEL_TOKEN_ISSUER,
+            "aud": APP_ID,
+            "serviceurl": SERVICE_URL,
+            "nbf": now - 10,
+            "exp": now + lifetime,
+            **claims,
+        }
+        return jwt.encode(
+            payload, self.private_keys[self.key_id], algorithm="RS256", headers={"kid": self.key_id}
+        )
+
+    async def start(self) -> "SigningAuthority":
+        async def metadata(request):
+            return web.json_response({"jwks_uri": str(self.server.make_url("/keys"))})
+
+        async def keys(request):
+            self.requests += 1
+            published = []
+            for key_id, private_key in self.private_keys.items():
+                jwk = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+                published.append({**jwk, "kid": key_id, "endorsements": ["msteams"]})
+            return web.json_response({"keys": published})
+
+        app = web.Application()
+        app.router.add_get("/.well-known/openidconfiguration", metadata)
+        app.router.add_get("/keys", keys)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        return self
+
+    @property
+    def metadata_url(self) -> str:
+        return str(self.server.make_url("/.well-known/openidconfiguration"))
+
+
+def message(text: str = "hi") -> Activity:
+    return Activity(
+        type=ActivityTypes.message,
+        text=text,
+        channel_id="msteams",
+        service_url=SERVICE_URL,
+        delivery_mode=DeliveryModes.expect_replies,
+        conversation=ConversationAccount(id="conversation"),
+        from_property=ChannelAccount(id="user"),
+        recipient=ChannelAccount(id="bot"),
+    )
+
+
+async def echo(turn_context):
+    await turn_context.send_activity(turn_context.activity.text)
+
+
+class TokenValidationTest(aiounittest.AsyncTestCase):
+
+    async def set_up(self, token_cache: VerifiedTokenCache = None):
+        self.authority = await SigningAuthority().start()
+        ChannelValidation.open_id_metadata_endpoint = self.authority.metadata_url
+        self.refresher = SigningKeyRefresher([self.authority.metadata_url], interval=3600)
+        self.refresher.signing_keys[self.authority.metadata_url].min_refresh_interval = 0
+        self.refresher.start()
+        await self.refresher.refresh()
+        self.token_cache = token_cache if token_cache is not None else VerifiedTokenCache()
+        self.adapter = AdapterWithErrorHandler(
+            BotFrameworkAdapterSettings(APP_ID, "secret"),
+            ConversationState(MemoryStorage()),
+            token_cache=self.token_cache,
+        )
+
+    async def tear_down(self):
+        await self.refresher.stop()
+        JwtTokenExtractor.metadataCache.pop(self.authority.metadata_url, None)
+        ChannelValidation.open_id_metadata_endpoint = None
+        await self.authority.server.close()
+
+    async def send(self, token: str, text: str = "hi"):
+        response = await self.adapter.process_activity(message(text), f"Bearer {token}", echo)
+        return [reply["text"] for reply in response.body["activities"]]
+
+    async def test_valid_token_is_validated_once(self):
+        await self.set_up()
+        try:
+            token = self.authority.mint()
+            self.assertEqual(["hi"], await self.send(token))
+            self.assertEqual(["again"], await self.send(token, "again"))
+
+            self.assertEqual((1, 1), (self.token_cache.misses, self.token_cache.hits))
+            self.assertEqual(1, self.token_cache.stats["validation"]["count"])
+            # The keys were fetched in the background, never while validating.
+            self.assertEqual(1, self.authority.requests)
+        finally:
+            await self.tear_down()
+
+    async def test_rejected_tokens_are_not_cached(self):
+        await self.set_up()
+        try:
+            forged = self.authority.mint(aud=str(uuid.uuid4()))
+            tampered = self.authority.mint()[:-4] + "AAAA"
+            for token in (forged, forged, tampered):
+                with self.assertRaises(Exception):
+                    await self.send(token)
+            self.assertEqual(0, len(self.token_cache))
+            self.assertEqual(3, self.token_cache.misses)
+        finally:
+            await self.tear_down()
+
+    async def test_entry_lives_until_the_token_expires(self):
+        now = [time.time()]
+        await self.set_up(VerifiedTokenCache(clock=lambda: now[0]))
+        try:
+            token = self.authority.mint(lifetime=600)
+            expires_at = jwt.decode(token, options={"verify_signature": False})["exp"]
+            await self.send(token)
+            now[0] = expires_at - 1
+            await self.send(token)
+            now[0] = expires_at
+            await self.send(token)
+
+            self.assertEqual((2, 1, 1), (
+                self.token_cache.misses, self.token_cache.hits, self.token_cache.expirations
+            ))
+        finally:
+            await self.tear_down()
+
+    async def test_concurrent_requests_share_one_validation(self):
+        await self.set_up()
+        try:
+            token = self.authority.mint()
+            replies = await asyncio.gather(*[self.send(token, str(index)) for index in range(10)])
+            self.assertEqual([[str(index)] for index in range(10)], replies)
+            self.assertEqual(1, self.token_cache.stats["validation"]["count"])
+        finally:
+            await self.tear_down()
+
+    async def test_unknown_key_refreshes_the_keys(self):
+        await self.set_up()
+        try:
+            self.authority.rotate()
+            self.assertEqual(["rolled"], await self.send(self.authority.mint(), "rolled"))
+            self.assertEqual(2, self.authority.requests)
+        finally:
+            await self.tear_down()
@@ -0,0 +1,58 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Memoized Timex analysis and ordinal dates for the booking dialogs."""
+
+import datetime
+from functools import lru_cache
+from typing import FrozenSet, NamedTuple, Optional, Tuple
+
+from datatypes_date_time.timex import Timex
+
+TIMEX_CACHE_SIZE = 4096
+
+
+class TimexInfo(NamedTuple):
+    """What the dialogs need from a timex, computed once per distinct string."""
+
+    types: FrozenSet[str]
+    # Proleptic Gregorian ordinal of the date, when the timex names one day.
+    ordinal: Optional[int]
+
+    @property
+    def definite(self) -> bool:
+        return "definite" in self.types
+
+
+@lru_cache(maxsize=TIMEX_CACHE_SIZE)
+def timex_info(timex: str) -> TimexInfo:
+    # Timex objects are mutable; only the immutable summary is shared.
+    timex_property = Timex(timex)
+    ordinal = None
+    if "definite" in timex_property.types:
+        try:
+            ordinal = datetime.date(
+                timex_property.year, timex_property.month, timex_property.day_of_month
+            ).toordinal()
+        except (TypeError, ValueError):
+            ordinal = None
+    return TimexInfo(frozenset(timex_property.types), ordinal)
+
+
+def is_definite(timex: str) -> bool:
+    return bool(timex) and timex_info(timex).definite
+
+
+def date_ordinal(timex: str) -> Optional[int]:
+    """Ordinal of a definite date timex ("2023-01-31"), else None."""
+    return timex_info(timex).ordinal if timex else None
+
+
+@lru_cache(maxsize=TIMEX_CACHE_SIZE)
+def date_range(timex: str) -> Optional[Tuple[str, str]]:
+    """Start and end of a "(start,end,duration)" timex whose ends are definite days, else None."""
+    if not timex or not timex.startswith("(") or not timex.endswith(")"):
+        return None
+    parts = timex[1:-1].split(",")
+    if len(parts) != 3 or date_ordinal(parts[0]) is None or date_ordinal(parts[1]) is None:
+        return None
+    return parts[0], parts[1]